@@ -0,0 +1,91 @@
+"""
+CBAA decide benchmark: per-task bidding loop and dict-by-dict winning-bid merge vs the array-backed path
+(decision_making.CBAA.vectorized off / on): rewards and known winning bids as vectors aligned to the task table,
+and the neighbors' winning bids merged with a single fmax over a (1 + neighbors) x tasks matrix.
+
+Every tick the robot moves a small step (rewards are recomputed) and each neighbor sends winning bids for a random
+subset of the tasks. Odd ticks bid (Line 5-10), even ticks merge and check the winner (Line 4-5 of the consensus
+phase). Timings are per `decide()` call; both paths must return the same tasks and end with the same bids.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cbaa --tasks 100 --neighbors 50
+"""
+import argparse
+import random
+import time
+import types
+
+import pygame
+
+from modules.utils import set_config, TaskRecord
+
+set_config('scenarios/simple/configs/cbaa.yaml')
+from modules.task_table import TaskTable, DistanceCache  # noqa: E402
+import plugins.mrta.cbaa.cbaa as cbaa_module  # noqa: E402  (reads config at import)
+
+
+def build_cbaa(num_tasks, extent):
+    tasks = {}
+    for i in range(num_tasks):
+        task_id = f"Fire_{i}"
+        tasks[task_id] = TaskRecord(task_id=task_id, x=random.uniform(-extent, extent), y=random.uniform(-extent, extent),
+                                    z=0.0, radius=random.uniform(0.5, 3.0))
+    agent = types.SimpleNamespace(agent_id='Fire_UGV_1', position=pygame.math.Vector2(0, 0), message_to_share={},
+                                  messages_received=[],
+                                  blackboard={'local_tasks_info': tasks, 'task_table': TaskTable(tasks)})
+    agent.distances = DistanceCache(agent)
+    return cbaa_module.CBAA(agent), agent, list(tasks)
+
+
+def neighbor_messages(num_neighbors, task_ids, rng):
+    messages = []
+    for i in range(num_neighbors):
+        bid_ids = rng.sample(task_ids, rng.randint(1, len(task_ids)))
+        messages.append({'agent_id': f"Fire_UGV_{i + 2}", 'winning_bids': {t: rng.uniform(0.5, 1.0) for t in bid_ids}})
+    return messages
+
+
+def run(num_tasks, num_neighbors, extent, ticks, vectorized, seed):
+    random.seed(seed)
+    cbaa, agent, task_ids = build_cbaa(num_tasks, extent)
+    cbaa_module.VECTORIZED = vectorized
+    rng = random.Random(seed + 1)
+    choices = []
+    elapsed = 0.0
+    for tick in range(ticks):
+        agent.position += pygame.math.Vector2(rng.uniform(-1, 1), rng.uniform(-1, 1))
+        agent.messages_received = neighbor_messages(num_neighbors, task_ids, rng)
+        if tick % 2 == 0:
+            # Bidding phase again, starting from the bids known so far
+            cbaa.satisfied = False
+            cbaa.assigned_task = None
+        start = time.perf_counter()
+        choice = cbaa.decide(agent.blackboard)
+        elapsed += time.perf_counter() - start
+        choices.append(choice)
+    return elapsed / ticks, choices, cbaa.y
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CBAA: per-task loop vs vectorized bidding and bid merge')
+    parser.add_argument('--tasks', type=int, nargs='+', default=[100])
+    parser.add_argument('--neighbors', type=int, nargs='+', default=[50])
+    parser.add_argument('--extent', type=float, default=300.0, help='half side of the map [m]')
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"extent={args.extent} ticks={args.ticks}")
+    print(f"{'tasks':>6} {'neighbors':>10} {'loop[us]':>9} {'vector[us]':>11} {'speedup':>8}  same")
+    for num_tasks in args.tasks:
+        for num_neighbors in args.neighbors:
+            loop, loop_choices, loop_bids = run(num_tasks, num_neighbors, args.extent, args.ticks, False, args.seed)
+            vector, vector_choices, vector_bids = run(num_tasks, num_neighbors, args.extent, args.ticks, True,
+                                                      args.seed)
+            same = loop_choices == vector_choices and list(loop_bids.items()) == list(vector_bids.items())
+            print(f"{num_tasks:>6} {num_neighbors:>10} {loop * 1e6:>9.1f} {vector * 1e6:>11.1f} "
+                  f"{loop / vector:>7.2f}x  {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+CBBA bundle construction benchmark: `build_bundle` with the per-insertion path re-walk vs the incremental
+InsertionScorer (decision_making.CBBA.incremental_bundle off / on).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cbba_bundle --tasks 25 50 100 200
+"""
+import argparse
+import random
+import timeit
+import types
+
+import pygame
+
+from modules.utils import set_config, TaskRecord
+
+set_config('scenarios/simple/configs/cbba.yaml')
+from modules.task_table import TaskTable, DistanceCache  # noqa: E402
+import plugins.mrta.cbba.cbba as cbba_module  # noqa: E402  (reads config at import)
+
+
+def build_agent(num_tasks):
+    tasks = {}
+    for i in range(num_tasks):
+        task_id = f"Fire_{i}"
+        tasks[task_id] = TaskRecord(task_id=task_id, x=random.uniform(-50, 50), y=random.uniform(-50, 50),
+                                    z=0.0, radius=random.uniform(0.5, 3.0))
+    agent = types.SimpleNamespace(agent_id='Fire_UGV_1', position=pygame.math.Vector2(0, 0), message_to_share={},
+                                  blackboard={'local_tasks_info': tasks, 'task_table': TaskTable(tasks)})
+    agent.distances = DistanceCache(agent)
+    return agent, tasks
+
+
+def run_build_bundle(agent, tasks):
+    cbba = cbba_module.CBBA(agent)
+    cbba.build_bundle(tasks)
+    return cbba.bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CBBA build_bundle: path re-walk vs incremental insertion scores')
+    parser.add_argument('--tasks', type=int, nargs='+', default=[25, 50, 100, 200])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"max_tasks_per_agent={cbba_module.MAX_TASKS_PER_AGENT} repeat={args.repeat}")
+    print(f"{'tasks':>6} {'re-walk[ms]':>12} {'incremental[ms]':>16} {'speedup':>8}  same bundle")
+    for num_tasks in args.tasks:
+        random.seed(num_tasks)
+        agent, tasks = build_agent(num_tasks)
+        timings = {}
+        bundles = {}
+        for incremental in (False, True):
+            cbba_module.INCREMENTAL_BUNDLE = incremental
+            bundles[incremental] = run_build_bundle(agent, tasks)
+            timings[incremental] = timeit.timeit(lambda: run_build_bundle(agent, tasks), number=args.repeat) / args.repeat
+        print(f"{num_tasks:>6} {timings[False] * 1e3:>12.2f} {timings[True] * 1e3:>16.2f} "
+              f"{timings[False] / timings[True]:>7.1f}x  {bundles[False] == bundles[True]}")
+
+
+if __name__ == '__main__':
+    main()
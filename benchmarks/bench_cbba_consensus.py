@@ -0,0 +1,102 @@
+"""
+CBBA consensus throughput: per-pair rule ladder vs the vectorized rule table, one agent resolving
+against every other agent's message (10 to 200 agents).
+
+"table (cold)" starts without cached encodings (every neighbor changed since the last round),
+"table (warm)" keeps them (unchanged neighbors reuse their cached encoding).
+
+--state random:    every neighbor holds an independent random z/y/s (entries flip at almost every neighbor)
+--state converged: neighbors share one z/y/s and disagree on --disagree of the entries (typical later rounds)
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cbba_consensus --agents 10 50 100 200 --tasks 50 --state converged
+"""
+import argparse
+import random
+import timeit
+import types
+
+import pygame
+
+from modules.utils import set_config
+
+set_config('scenarios/simple/configs/cbba.yaml')
+from plugins.mrta.cbba.cbba import CBBA, CBBA_MESSAGE  # noqa: E402  (reads config at import)
+from plugins.mrta.cbba.consensus import ConsensusTable  # noqa: E402
+
+
+def build_state(num_agents, num_tasks, converged=False, disagree=0.1):
+    agent_ids = [f"Fire_UGV_{i}" for i in range(1, num_agents + 1)]
+    task_ids = [f"Fire_{i}" for i in range(num_tasks)]
+
+    def state():
+        z = {j: random.choice(agent_ids + [None]) for j in task_ids}
+        y = {j: random.random() for j in task_ids}
+        s = {a: random.randint(1_760_000_000, 1_760_000_005) for a in agent_ids}
+        return z, y, s
+
+    shared = state()
+
+    def neighbor_state():
+        if not converged:
+            return state()
+        z_k, y_k, s_k = (dict(part) for part in shared)
+        z_r, y_r, s_r = state()
+        for j in z_k:
+            if random.random() < disagree:
+                z_k[j], y_k[j] = z_r[j], y_r[j]
+        for a in s_k:
+            if random.random() < disagree:
+                s_k[a] = s_r[a]
+        return z_k, y_k, s_k
+
+    me = agent_ids[0]
+    raw_messages = []
+    for k in agent_ids[1:]:
+        z_k, y_k, s_k = neighbor_state()
+        raw_messages.append({'agent_id': k, 'winning_agents': z_k, 'winning_bids': y_k,
+                             'message_received_time_stamp': s_k})
+    return me, task_ids, neighbor_state(), raw_messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CBBA consensus throughput: rule ladder vs rule table')
+    parser.add_argument('--agents', type=int, nargs='+', default=[10, 25, 50, 100, 200])
+    parser.add_argument('--tasks', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--state', choices=['random', 'converged'], default='random')
+    parser.add_argument('--disagree', type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"tasks={args.tasks} repeat={args.repeat} state={args.state} (one agent, all other agents as neighbors)")
+    print(f"{'agents':>7} {'ladder[ms]':>11} {'table cold[ms]':>15} {'table warm[ms]':>15} {'pairs/s ladder':>15} {'pairs/s warm':>13}")
+    for num_agents in args.agents:
+        random.seed(num_agents)
+        me, task_ids, (z, y, s), raw_messages = build_state(num_agents, args.tasks, args.state == 'converged', args.disagree)
+        decoded = [CBBA_MESSAGE.decode(m) for m in raw_messages]
+
+        agent = types.SimpleNamespace(agent_id=me, position=pygame.math.Vector2(0, 0), message_to_share={})
+        cbba = CBBA(agent)
+        candidates = [types.SimpleNamespace(task_id=j) for j in task_ids]
+
+        def ladder():
+            cbba.z, cbba.y = dict(z), dict(y)
+            cbba.s = s
+            cbba.resolve_conflicts_legacy(candidates, decoded)
+
+        def table_cold():
+            ConsensusTable().resolve(me, dict(z), dict(y), s, task_ids, decoded)
+
+        warm = ConsensusTable()
+
+        def table_warm():
+            warm.resolve(me, dict(z), dict(y), s, task_ids, decoded)
+
+        timings = [timeit.timeit(fn, number=args.repeat) / args.repeat for fn in (ladder, table_cold, table_warm)]
+        pairs = args.tasks * len(raw_messages)
+        print(f"{num_agents:>7} {timings[0] * 1e3:>11.2f} {timings[1] * 1e3:>15.2f} {timings[2] * 1e3:>15.2f} "
+              f"{pairs / timings[0]:>15.0f} {pairs / timings[2]:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+local_comm codec benchmark: encode/decode time and bytes on the wire per MRTA plugin message.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_codec --tasks 100 --agents 20
+"""
+import argparse
+import random
+import timeit
+
+import pygame
+
+from modules.local_comm import compress_payload
+from modules.utils import MESSAGE_CODECS, NeighborState, TaskRecord, decode_message
+
+
+def _task(i):
+    x, y = random.uniform(-50, 50), random.uniform(-50, 50)
+    radius = random.uniform(0.5, 3.0)
+    return TaskRecord(task_id=f"Fire_{i}", x=x, y=y, z=0.0, radius=radius)
+
+
+def build_messages(num_tasks, num_agents):
+    """Synthetic outbox messages shaped like each plugin's `agent.message_to_share`."""
+    task_ids = [f"Fire_{i}" for i in range(num_tasks)]
+    agent_ids = [f"Fire_UGV_{i}" for i in range(1, num_agents + 1)]
+    me = agent_ids[0]
+
+    greedy = {
+        'agent_id': me,
+        'assigned_task_id': task_ids[0],
+        'task_position': {'x': 1.0, 'y': 2.0},
+        'cost': 12.5,
+    }
+    grape = {
+        'agent_id': me,
+        'assigned_task_id': task_ids[0],
+        'partition': {a: random.choice(task_ids) for a in agent_ids},  # agent_id -> task_id
+        'evolution_number': 42,
+        'time_stamp': random.random(),
+    }
+    cbaa = {
+        'agent_id': me,
+        'assigned_task_id': task_ids[0],
+        'winning_bids': {t: random.random() for t in task_ids},
+    }
+    cbba = {
+        'agent_id': me,
+        'assigned_task_id': task_ids[0],
+        'winning_agents': {t: random.choice(agent_ids) for t in task_ids},
+        'winning_bids': {t: random.random() for t in task_ids},
+        'message_received_time_stamp': {a: 1_760_000_000 + i for i, a in enumerate(agent_ids)},
+        'planned_tasks_id': task_ids[:5],
+    }
+    hungarian = {
+        'agent_id': me,
+        'link_states': {a: [random.randint(1, 50), sorted(random.sample(agent_ids, 3))] for a in agent_ids},
+        'link_state_version': 412,
+        'link_state_log': random.sample(agent_ids, 5),
+        'position': pygame.math.Vector2(3.0, 4.0),
+        'agents_info': [NeighborState(agent_id=a, position=pygame.math.Vector2(random.random(), random.random()))
+                        for a in agent_ids],
+        'tasks_info': [_task(i) for i in range(num_tasks)],
+        'completed_tasks': set(task_ids[:3]),
+        'assigned_task_id': task_ids[0],
+        'gamma': 17,
+    }
+    return {'Greedy': greedy, 'GRAPE': grape, 'CBAA': cbaa, 'CBBA': cbba, 'Hungarian': hungarian}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='local_comm codec benchmark')
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(0)
+    messages = build_messages(args.tasks, args.agents)
+    print(f"tasks={args.tasks} agents={args.agents} repeat={args.repeat}")
+    print(f"{'plugin':<10} {'codec':<7} {'bytes':>8} {'zlib bytes':>11} {'encode[us]':>11} {'decode[us]':>11}")
+    for plugin, message in messages.items():
+        for name, codec in MESSAGE_CODECS.items():
+            if not codec.available:
+                continue  # binary: msgpack not installed
+            data = codec.encode(message)
+            enc = timeit.timeit(lambda: codec.encode(message), number=args.repeat) / args.repeat
+            dec = timeit.timeit(lambda: decode_message(data), number=args.repeat) / args.repeat
+            compressed = compress_payload(data)
+            print(f"{plugin:<10} {name:<7} {len(data.encode('utf-8')):>8} {len(compressed):>11} "
+                  f"{enc * 1e6:>11.1f} {dec * 1e6:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+local_comm delta protocol benchmark: bytes per tick with and without keyframe/diff envelopes.
+
+Each plugin message from bench_codec is mutated a little every tick (a few bids / partition
+entries / time stamps change), then sent through LocalCommChannel-style packing.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_delta --tasks 100 --agents 20 --ticks 200
+"""
+import argparse
+import copy
+import random
+
+from benchmarks.bench_codec import build_messages
+from modules.local_comm import DeltaEncoder, DeltaDecoder
+from modules.utils import MESSAGE_CODECS, decode_message
+
+
+def mutate(message, changes):
+    """dict 값 필드의 항목 몇 개와 스칼라 필드를 바꿔 한 틱 분량의 상태 변화를 흉내낸다."""
+    for key, value in message.items():
+        if isinstance(value, dict) and value:
+            for k in random.sample(list(value), min(changes, len(value))):
+                v = value[k]
+                if isinstance(v, float):
+                    value[k] = random.random()
+                elif isinstance(v, int):
+                    value[k] = v + 1
+                elif isinstance(v, set):
+                    value[k] = set(random.sample(sorted(v), max(1, len(v) - 1)))
+                else:
+                    value[k] = v
+        elif isinstance(value, float):
+            message[key] = random.random()
+        elif isinstance(value, int) and not isinstance(value, bool):
+            message[key] = value + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='local_comm delta benchmark')
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--changes', type=int, default=3, help='entries changed per dict field per tick')
+    parser.add_argument('--keyframe-interval', type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"tasks={args.tasks} agents={args.agents} ticks={args.ticks} changes={args.changes} "
+          f"keyframe_interval={args.keyframe_interval}")
+    print(f"{'plugin':<10} {'codec':<7} {'full[B/tick]':>13} {'delta[B/tick]':>14} {'ratio':>7}")
+    for plugin, message in build_messages(args.tasks, args.agents).items():
+        for name, codec in MESSAGE_CODECS.items():
+            if not codec.available:
+                continue  # binary: msgpack not installed
+            msg = copy.deepcopy(message)
+            encoder, decoder = DeltaEncoder(args.keyframe_interval), DeltaDecoder()
+            full_bytes = delta_bytes = 0
+            for _ in range(args.ticks):
+                mutate(msg, args.changes)
+                full = codec.encode(msg)
+                delta = codec.encode(encoder.encode(msg))
+                full_bytes += len(full.encode('utf-8'))
+                delta_bytes += len(delta.encode('utf-8'))
+                restored = decoder.decode(decode_message(delta))
+                assert restored == decode_message(full), f"{plugin}/{name}: restored message differs"
+            print(f"{plugin:<10} {name:<7} {full_bytes / args.ticks:>13.0f} {delta_bytes / args.ticks:>14.0f} "
+                  f"{full_bytes / delta_bytes:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+GRAPE utility benchmark: per-task `compute_utility` loop vs the vectorized task-table path
+(`find_max_utility_task` with decision_making.GRAPE.vectorized off / on).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_grape --tasks 100 --agents 20
+"""
+import argparse
+import random
+import timeit
+import types
+
+import pygame
+
+from modules.utils import set_config, TaskRecord
+
+set_config('scenarios/simple/configs/grape.yaml')
+from modules.task_table import TaskTable, DistanceCache  # noqa: E402
+import plugins.mrta.grape.grape as grape_module  # noqa: E402  (reads config at import)
+
+
+def build_grape(num_tasks, num_agents):
+    tasks = {}
+    for i in range(num_tasks):
+        task_id = f"Fire_{i}"
+        tasks[task_id] = TaskRecord(task_id=task_id, x=random.uniform(-50, 50), y=random.uniform(-50, 50),
+                                    z=0.0, radius=random.uniform(0.5, 3.0))
+    agent = types.SimpleNamespace(agent_id='Fire_UGV_1', position=pygame.math.Vector2(0, 0), message_to_share={},
+                                  blackboard={'local_tasks_info': tasks, 'task_table': TaskTable(tasks)})
+    agent.distances = DistanceCache(agent)
+    grape = grape_module.GRAPE(agent)
+    agent_ids = [f"Fire_UGV_{i}" for i in range(1, num_agents + 1)]
+    for agent_id in agent_ids:
+        grape.partition.assign(agent_id, random.choice(list(tasks)))
+    return grape, list(tasks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GRAPE scalar vs vectorized utility evaluation benchmark')
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"tasks={args.tasks} agents={args.agents} repeat={args.repeat}")
+    print(f"{'path':<11} {'find_max_utility_task[us]':>26}  result")
+    for vectorized in (False, True):
+        random.seed(0)
+        grape, tasks = build_grape(args.tasks, args.agents)
+        grape_module.VECTORIZED = vectorized
+        result = grape.find_max_utility_task(tasks)
+        elapsed = timeit.timeit(lambda: grape.find_max_utility_task(tasks), number=args.repeat) / args.repeat
+        print(f"{'vectorized' if vectorized else 'scalar':<11} {elapsed * 1e6:>26.1f}  {result}")
+
+
+if __name__ == '__main__':
+    main()
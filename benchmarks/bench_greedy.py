@@ -0,0 +1,79 @@
+"""
+FirstClaimGreedy MinDist benchmark: scanning every local task (conflict filter + distance to each candidate) vs the
+grid index over the task table (decision_making.FirstClaimGreedy.spatial_index off / on).
+
+Fires are spread uniformly over a --extent square map; the robot moves a small step every tick, so distances are
+recomputed each tick while the task table (and its index) stays the same. --claims neighbors each claim one fire at
+random with a random cost. Timings are per `decide()` call and both paths must return the same tasks.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_greedy --tasks 50 100 500 2000 --claims 20
+"""
+import argparse
+import random
+import time
+import types
+
+import pygame
+
+from modules.utils import set_config, TaskRecord
+
+set_config('scenarios/simple/configs/greedy.yaml')
+from modules.task_table import TaskTable, DistanceCache  # noqa: E402
+import plugins.mrta.greedy.greedy as greedy_module  # noqa: E402  (reads config at import)
+
+
+def build_greedy(num_tasks, num_claims, extent):
+    tasks = {}
+    for i in range(num_tasks):
+        task_id = f"Fire_{i}"
+        tasks[task_id] = TaskRecord(task_id=task_id, x=random.uniform(-extent, extent), y=random.uniform(-extent, extent),
+                                    z=0.0, radius=random.uniform(0.5, 3.0))
+    agent = types.SimpleNamespace(agent_id='Fire_UGV_1', position=pygame.math.Vector2(0, 0), message_to_share={},
+                                  blackboard={'local_tasks_info': tasks, 'task_table': TaskTable(tasks)})
+    agent.distances = DistanceCache(agent)
+    agent.messages_received = [{'agent_id': f"Fire_UGV_{i + 2}", 'assigned_task_id': random.choice(list(tasks)),
+                                'cost': random.uniform(0, extent)} for i in range(num_claims)]
+    agent.new_messages_received = list(agent.messages_received)
+    return greedy_module.FirstClaimGreedy(agent), agent
+
+
+def run(num_tasks, num_claims, extent, ticks, spatial_index, seed):
+    random.seed(seed)
+    greedy, agent = build_greedy(num_tasks, num_claims, extent)
+    greedy_module.SPATIAL_INDEX = spatial_index
+    greedy_module.SPATIAL_INDEX_MIN_TASKS = 0
+    steps = random.Random(seed + 1)
+    choices = []
+    elapsed = 0.0
+    for _ in range(ticks):
+        agent.position += pygame.math.Vector2(steps.uniform(-1, 1), steps.uniform(-1, 1))
+        start = time.perf_counter()
+        choice = greedy.decide(agent.blackboard)
+        elapsed += time.perf_counter() - start
+        agent.blackboard['assigned_task_id'] = choice
+        agent.new_messages_received = []
+        choices.append(choice)
+    return elapsed / ticks, choices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FirstClaimGreedy MinDist: full scan vs grid index')
+    parser.add_argument('--tasks', type=int, nargs='+', default=[50, 100, 500, 2000])
+    parser.add_argument('--claims', type=int, default=20, help='neighbors claiming a fire')
+    parser.add_argument('--extent', type=float, default=300.0, help='half side of the map [m]')
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"claims={args.claims} extent={args.extent} ticks={args.ticks}")
+    print(f"{'tasks':>6} {'scan[us]':>9} {'index[us]':>10} {'speedup':>8}  same")
+    for num_tasks in args.tasks:
+        scan, scan_choices = run(num_tasks, args.claims, args.extent, args.ticks, False, args.seed)
+        index, index_choices = run(num_tasks, args.claims, args.extent, args.ticks, True, args.seed)
+        print(f"{num_tasks:>6} {scan * 1e6:>9.1f} {index * 1e6:>10.1f} {scan / index:>7.2f}x  "
+              f"{scan_choices == index_choices}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Per-tick assignment time of DistributedHungarian: scipy `linear_sum_assignment` from scratch vs the
+warm-started DynamicAssignment, against cluster size (agents; tasks = --task-ratio x agents).
+
+Each simulated tick moves --moving agents a small step towards their assigned task (every agent with
+--moving -1) and, with probability --churn, removes one fire and adds a new one. Timings include the
+weights: the cold path builds the full matrix every tick (as the plugin did), the warm path computes only
+the entries of moved / new agents and tasks. As in the plugin, clusters below warm_start_min_size skip the
+engine and call scipy directly ("direct"). Every warm-started matching must be the cold solve's matching:
+agents of a cluster act on their own row of independently computed solutions.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_hungarian --agents 8 16 32 64 128 --ticks 200
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from modules.utils import set_config
+
+set_config('scenarios/simple/configs/hungarian.yaml')
+from plugins.mrta.hungarian.dec_hungarian import (  # noqa: E402
+    LAMBDA, DUMMY_COST, EPSILON, FULL_SOLVE_FRACTION, WARM_START_MIN_SIZE)
+from plugins.mrta.hungarian.dynamic_hungarian import DynamicAssignment  # noqa: E402
+
+AGENT_SPEED = 0.5
+
+
+def weights(agent_pos, task_pos):
+    distances = np.sqrt(((agent_pos[:, np.newaxis, :] - task_pos[np.newaxis, :, :]) ** 2).sum(axis=2))
+    return 1.0 / (LAMBDA ** (distances / AGENT_SPEED))
+
+
+def cold_solve(agent_pos, task_pos):
+    cost = weights(agent_pos, task_pos)
+    n = max(cost.shape)
+    matrix = np.full((n, n), DUMMY_COST)
+    matrix[:cost.shape[0], :cost.shape[1]] = cost
+    rows, cols = linear_sum_assignment(np.where(np.isinf(matrix), 1e9, matrix))
+    return cost, np.where(cols[:cost.shape[0]] < cost.shape[1], cols[:cost.shape[0]], -1)
+
+
+def warm_solve(engine, agent_ids, task_ids, agent_pos, task_pos):
+    return engine.solve(agent_ids, task_ids, list(map(tuple, agent_pos.tolist())), list(map(tuple, task_pos.tolist())),
+                        lambda rows, cols: weights(agent_pos[rows], task_pos[cols]))
+
+
+def run(num_agents, num_tasks, ticks, moving, churn, seed):
+    rng = np.random.default_rng(seed)
+    agent_ids = [f"Fire_UGV_{i}" for i in range(num_agents)]
+    task_ids = [f"Fire_{i}" for i in range(num_tasks)]
+    agent_pos = rng.uniform(-50, 50, (num_agents, 2))
+    task_pos = rng.uniform(-50, 50, (num_tasks, 2))
+    next_task = num_tasks
+
+    engine = DynamicAssignment(DUMMY_COST, EPSILON, FULL_SOLVE_FRACTION, WARM_START_MIN_SIZE)
+    cold_time = warm_time = 0.0
+    modes = {}
+    col_for_row = None
+    for _ in range(ticks):
+        # Agents step towards their assigned task
+        if col_for_row is not None:
+            movers = range(num_agents) if moving < 0 else rng.choice(num_agents, size=min(moving, num_agents), replace=False)
+            for i in movers:
+                j = col_for_row[i]
+                if j >= 0:
+                    step = task_pos[j] - agent_pos[i]
+                    agent_pos[i] += step * min(1.0, 0.5 / max(np.linalg.norm(step), 1e-9))
+        if rng.random() < churn:
+            k = rng.integers(len(task_ids))
+            del task_ids[k]
+            task_pos = np.delete(task_pos, k, axis=0)
+            task_ids.append(f"Fire_{next_task}")
+            task_pos = np.vstack([task_pos, rng.uniform(-50, 50, 2)])
+            next_task += 1
+        start = time.perf_counter()
+        _, cold = cold_solve(agent_pos, task_pos)
+        cold_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        if max(num_agents, num_tasks) < WARM_START_MIN_SIZE:
+            _, col_for_row = cold_solve(agent_pos, task_pos)
+            mode = 'direct'
+        else:
+            col_for_row = warm_solve(engine, agent_ids, task_ids, agent_pos, task_pos)
+            mode = engine.last_mode
+        warm_time += time.perf_counter() - start
+        modes[mode] = modes.get(mode, 0) + 1
+
+        assert np.array_equal(col_for_row, cold)
+    return cold_time / ticks, warm_time / ticks, modes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DistributedHungarian per-tick assignment: cold vs warm-started')
+    parser.add_argument('--agents', type=int, nargs='+', default=[8, 16, 32, 64, 128])
+    parser.add_argument('--task-ratio', type=float, default=1.5)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--moving', type=int, default=1, help='agents moving per tick (-1: all)')
+    parser.add_argument('--churn', type=float, default=0.05, help='probability per tick that one fire is replaced')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"ticks={args.ticks} moving={args.moving} churn={args.churn} task_ratio={args.task_ratio}")
+    print(f"{'agents':>7} {'tasks':>6} {'scipy cold[us]':>15} {'warm[us]':>9} {'speedup':>8}  modes")
+    for num_agents in args.agents:
+        num_tasks = max(1, int(round(num_agents * args.task_ratio)))
+        cold, warm, modes = run(num_agents, num_tasks, args.ticks, args.moving, args.churn, args.seed)
+        print(f"{num_agents:>7} {num_tasks:>6} {cold * 1e6:>15.1f} {warm * 1e6:>9.1f} {cold / warm:>7.2f}x  {modes}")
+
+
+if __name__ == '__main__':
+    main()
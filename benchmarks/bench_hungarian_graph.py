@@ -0,0 +1,150 @@
+"""
+DistributedHungarian cluster (R) sync per tick: the previous full adjacency merge + BFS vs the link-state database
+(`LinkStateDatabase`: per-origin sequence numbers, only the LSAs a neighbor logged since the last tick are read,
+union-find components).
+
+Agents sit uniformly in a square with a fixed communication range (about --degree neighbors on average). Every
+tick --moving agents jump to a new random position, which changes their links. With --step they instead travel that
+many communication ranges in a random direction (the simple scenario: 1 m/s at 10 Hz with a 30 m range is about
+0.003), so links change only now and then. Messages are exchanged in memory
+(no codec), so the times are the graph sync alone, summed over every agent per tick. Both views are checked
+against the true connected component once the link-state databases have converged.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_hungarian_graph --agents 25 50 100 200 --moving 0 1 5
+    python -m benchmarks.bench_hungarian_graph --agents 10 --moving 10 --step 0.003 --ticks 500
+"""
+import argparse
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from plugins.mrta.hungarian.link_state import LinkStateDatabase
+
+
+def neighbor_sets(positions, comm_range):
+    diff = positions[:, np.newaxis, :] - positions[np.newaxis, :, :]
+    within = (diff ** 2).sum(axis=2) <= comm_range ** 2
+    np.fill_diagonal(within, False)
+    return [set(np.flatnonzero(row).tolist()) for row in within]
+
+
+def true_component(neighbors, start):
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for other in neighbors[queue.popleft()]:
+            if other not in seen:
+                seen.add(other)
+                queue.append(other)
+    return seen
+
+
+class LegacyGraph:
+    """The previous `_build_latest_graph` / `_update_message` graph handling."""
+
+    def __init__(self, agent_id):
+        self.agent_id = agent_id
+        self.global_adjacency = {}
+        self.message = {'agent_id': agent_id, 'adjacency_graph': {}}
+
+    def sync(self, inbox):
+        new_global_adj = {self.agent_id: {m['agent_id'] for m in inbox}}
+        for msg in inbox:
+            for node, neighbors in msg['adjacency_graph'].items():
+                if node not in new_global_adj:
+                    new_global_adj[node] = set(neighbors)
+                else:
+                    new_global_adj[node].update(neighbors)
+        self.global_adjacency = new_global_adj
+        visited = {self.agent_id}
+        queue = deque([self.agent_id])
+        while queue:
+            for n in self.global_adjacency.get(queue.popleft(), set()):
+                if n not in visited:
+                    visited.add(n)
+                    if n in self.global_adjacency:
+                        queue.append(n)
+        graph_to_send = self.global_adjacency.copy()
+        graph_to_send[self.agent_id] = {m['agent_id'] for m in inbox}
+        self.message = {'agent_id': self.agent_id, 'adjacency_graph': graph_to_send}
+        return visited
+
+
+class LinkStateGraph:
+    def __init__(self, agent_id):
+        self.db = LinkStateDatabase(agent_id)
+        self._publish()
+
+    def sync(self, inbox):
+        self.db.set_local_links(m['agent_id'] for m in inbox)
+        for msg in inbox:
+            self.db.receive(msg['agent_id'], msg['link_state_version'], msg['link_states'], msg['link_state_log'])
+        component = self.db.component()
+        self._publish()
+        return component
+
+    def _publish(self):
+        link_states, log = self.db.wire()
+        self.message = {'agent_id': self.db.origin, 'link_states': link_states,
+                        'link_state_version': self.db.version, 'link_state_log': log}
+
+
+def run(graph_cls, num_agents, degree, moving, ticks, seed, step=0.0):
+    rng = np.random.default_rng(seed)
+    comm_range = math.sqrt(degree / (math.pi * num_agents))  # unit square
+    positions = rng.uniform(0, 1, (num_agents, 2))
+    graphs = [graph_cls(i) for i in range(num_agents)]
+    elapsed = 0.0
+    for tick in range(ticks):
+        if tick and moving:
+            movers = rng.choice(num_agents, size=min(moving, num_agents), replace=False)
+            if step:
+                heading = rng.uniform(0, 2 * math.pi, len(movers))
+                moves = np.stack([np.cos(heading), np.sin(heading)], axis=1) * step * comm_range
+                positions[movers] = np.clip(positions[movers] + moves, 0, 1)
+            else:
+                positions[movers] = rng.uniform(0, 1, (len(movers), 2))
+        neighbors = neighbor_sets(positions, comm_range)
+        outbox = [g.message for g in graphs]
+        components = []
+        for i, g in enumerate(graphs):
+            inbox = [outbox[j] for j in sorted(neighbors[i])]
+            start = time.perf_counter()
+            components.append(g.sync(inbox))
+            elapsed += time.perf_counter() - start
+    return elapsed / ticks, neighbors, components
+
+
+def settle(num_agents, degree, seed, ticks):
+    """Link-state databases after `ticks` static ticks: every component must match the true one."""
+    _, neighbors, components = run(LinkStateGraph, num_agents, degree, 0, ticks, seed)
+    return all(set(c) == true_component(neighbors, i) for i, c in enumerate(components))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DistributedHungarian graph sync: full merge + BFS vs link state')
+    parser.add_argument('--agents', type=int, nargs='+', default=[25, 50, 100, 200])
+    parser.add_argument('--moving', type=int, nargs='+', default=[0, 1, 5], help='agents relocated per tick')
+    parser.add_argument('--step', type=float, default=0.0,
+                        help='distance a mover travels per tick, in communication ranges (0: jump to a random position)')
+    parser.add_argument('--degree', type=float, default=6.0, help='average number of neighbors')
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"ticks={args.ticks} degree={args.degree} step={args.step or 'jump'} (times: all agents, per tick)")
+    print(f"{'agents':>7} {'moving':>7} {'legacy[ms]':>11} {'link-state[ms]':>15} {'speedup':>8}  converged")
+    for num_agents in args.agents:
+        converged = settle(num_agents, args.degree, args.seed, num_agents + 2)
+        for moving in args.moving:
+            legacy, _, _ = run(LegacyGraph, num_agents, args.degree, moving, args.ticks, args.seed, args.step)
+            link_state, _, _ = run(LinkStateGraph, num_agents, args.degree, moving, args.ticks, args.seed, args.step)
+            print(f"{num_agents:>7} {moving:>7} {legacy * 1e3:>11.2f} {link_state * 1e3:>15.2f} "
+                  f"{legacy / link_state:>7.1f}x  {converged}")
+
+
+if __name__ == '__main__':
+    main()
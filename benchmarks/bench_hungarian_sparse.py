@@ -0,0 +1,95 @@
+"""
+DistributedHungarian on large clusters: dense padded assignment (weights + scipy `linear_sum_assignment` on the
+max(R, P)^2 matrix) vs the sparse k-nearest mode (`sparse_assignment`, k-d tree + sparse LAPJV).
+
+Reports the solve time per tick, the dense matrix size, and the quality of the sparse result against the dense
+optimum (total weight gap). When the k nearest fires cannot give every robot a task the dense solve would give
+one, the sparse mode falls back to the dense solve: the sparse time then includes both ("fallback").
+
+--layout uniform:   robots and fires uniformly over the area
+--layout clustered: fires in a few hotspots (many robots compete for the same nearest fires)
+
+Usage (from the repository root):
+    python -m benchmarks.bench_hungarian_sparse --sizes 100x170 300x500 600x1000 --k 5 10 20
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from modules.utils import set_config
+
+set_config('scenarios/simple/configs/hungarian.yaml')
+from plugins.mrta.hungarian.dec_hungarian import DistributedHungarian, DUMMY_COST  # noqa: E402
+from plugins.mrta.hungarian.sparse_assignment import sparse_assignment  # noqa: E402
+
+
+def build_layout(num_agents, num_tasks, layout, rng, extent=300.0):
+    agent_pos = rng.uniform(-extent, extent, (num_agents, 2))
+    if layout == 'uniform':
+        task_pos = rng.uniform(-extent, extent, (num_tasks, 2))
+    else:
+        hotspots = rng.uniform(-extent, extent, (5, 2))
+        task_pos = hotspots[rng.integers(len(hotspots), size=num_tasks)] + rng.normal(0, extent / 20, (num_tasks, 2))
+    return agent_pos, task_pos
+
+
+def dense_solve(agent_pos, task_pos):
+    num_agents, num_tasks = len(agent_pos), len(task_pos)
+    n = max(num_agents, num_tasks)
+    weights = np.full((n, n), DUMMY_COST)
+    weights[:num_agents, :num_tasks] = DistributedHungarian._weights(agent_pos, task_pos)
+    rows, cols = linear_sum_assignment(np.where(np.isinf(weights), 1e9, weights))
+    col_for_row = cols[:num_agents]
+    return np.where(col_for_row < num_tasks, col_for_row, -1), weights.nbytes
+
+
+def sparse_or_dense(agent_pos, task_pos, k):
+    col_for_row = sparse_assignment(agent_pos, task_pos, k, DistributedHungarian._weights_of_distances)
+    sparse_or_dense.fallback = col_for_row is None
+    if col_for_row is None:
+        col_for_row, _ = dense_solve(agent_pos, task_pos)
+    return col_for_row
+
+
+def total_weight(agent_pos, task_pos, col_for_row):
+    assigned = np.flatnonzero(col_for_row >= 0)
+    return DistributedHungarian._weights(agent_pos[assigned], task_pos[col_for_row[assigned]]).diagonal().sum()
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DistributedHungarian dense vs sparse k-nearest assignment')
+    parser.add_argument('--sizes', nargs='+', default=['100x170', '300x500', '600x1000'], help='AGENTSxFIRES')
+    parser.add_argument('--k', type=int, nargs='+', default=[5, 10, 20])
+    parser.add_argument('--layout', choices=['uniform', 'clustered'], default='uniform')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"layout={args.layout} repeat={args.repeat}")
+    print(f"{'agents':>7} {'fires':>6} {'dense[ms]':>10} {'dense MB':>9} {'k':>4} {'sparse[ms]':>11} {'speedup':>8} "
+          f"{'weight gap':>11} {'fallback':>9}")
+    for size in args.sizes:
+        num_agents, num_tasks = (int(part) for part in size.split('x'))
+        rng = np.random.default_rng(args.seed)
+        agent_pos, task_pos = build_layout(num_agents, num_tasks, args.layout, rng)
+        (dense, nbytes), dense_time = timed(lambda: dense_solve(agent_pos, task_pos), args.repeat)
+        dense_weight = total_weight(agent_pos, task_pos, dense)
+        for k in args.k:
+            sparse, sparse_time = timed(lambda: sparse_or_dense(agent_pos, task_pos, k), args.repeat)
+            gap = (total_weight(agent_pos, task_pos, sparse) - dense_weight) / dense_weight
+            print(f"{num_agents:>7} {num_tasks:>6} {dense_time * 1e3:>10.1f} {nbytes / 1e6:>9.1f} {k:>4} "
+                  f"{sparse_time * 1e3:>11.2f} {dense_time / sparse_time:>7.1f}x {gap:>+10.3%} "
+                  f"{'yes' if sparse_or_dense.fallback else 'no':>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Task record benchmark: GRAPE `compute_utility` / `find_max_utility_task` over AttrDict vs TaskRecord tasks.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_records --tasks 100 --agents 20
+"""
+import argparse
+import random
+import timeit
+import types
+
+import pygame
+
+from modules.utils import set_config, AttrDict, TaskRecord
+
+set_config('scenarios/simple/configs/grape.yaml')
+from modules.task_table import DistanceCache  # noqa: E402
+import plugins.mrta.grape.grape as grape_module  # noqa: E402  (reads config at import)
+from plugins.mrta.grape.grape import GRAPE  # noqa: E402
+
+grape_module.VECTORIZED = False  # Measure the per-task attribute access path
+
+
+def build_tasks(num_tasks, record_type):
+    tasks = []
+    for i in range(num_tasks):
+        x, y, radius = random.uniform(-50, 50), random.uniform(-50, 50), random.uniform(0.5, 3.0)
+        if record_type is TaskRecord:
+            tasks.append(TaskRecord(task_id=f"Fire_{i}", x=x, y=y, z=0.0, radius=radius))
+        else:
+            tasks.append(AttrDict(task_id=f"Fire_{i}", x=x, y=y, z=0.0, radius=radius,
+                                  position=pygame.math.Vector2(x, y), amount=radius, completed=False))
+    return tasks
+
+
+def build_grape(num_agents, tasks):
+    agent = types.SimpleNamespace(agent_id='Fire_UGV_1', position=pygame.math.Vector2(0, 0), message_to_share={},
+                                  blackboard={})
+    agent.distances = DistanceCache(agent)
+    grape = GRAPE(agent)
+    agent_ids = [f"Fire_UGV_{i}" for i in range(1, num_agents + 1)]
+    for agent_id in agent_ids:
+        grape.partition.assign(agent_id, random.choice(tasks).task_id)
+    return grape
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AttrDict vs TaskRecord attribute access benchmark')
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"tasks={args.tasks} agents={args.agents} repeat={args.repeat}")
+    print(f"{'record':<11} {'compute_utility loop[us]':>25} {'find_max_utility_task[us]':>26}")
+    for record_type in (AttrDict, TaskRecord):
+        random.seed(0)
+        tasks = build_tasks(args.tasks, record_type)
+        grape = build_grape(args.agents, tasks)
+        loop = timeit.timeit(lambda: [grape.compute_utility(t) for t in tasks], number=args.repeat) / args.repeat
+        find = timeit.timeit(lambda: grape.find_max_utility_task(tasks), number=args.repeat) / args.repeat
+        print(f"{record_type.__name__:<11} {loop * 1e6:>25.1f} {find * 1e6:>26.1f}")
+
+
+if __name__ == '__main__':
+    main()
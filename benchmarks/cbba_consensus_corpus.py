@@ -0,0 +1,133 @@
+"""
+Regression corpus for the CBBA consensus rules: the vectorized rule table (`ConsensusTable.resolve`)
+must give exactly the result of the per-pair rule ladder (`CBBA.resolve_conflicts_legacy`),
+including missing bid entries, ties, -inf bids and None winners.
+
+The corpus (cbba_consensus_corpus.json) stores generated inputs with the ladder's output.
+Checking replays every case through both implementations and compares values and dict key order.
+
+Usage (from the repository root):
+    python -m benchmarks.cbba_consensus_corpus            # check
+    python -m benchmarks.cbba_consensus_corpus --regenerate --cases 250
+"""
+import argparse
+import json
+import os
+import random
+import types
+from collections import Counter
+
+import pygame
+
+from modules.utils import set_config
+
+set_config('scenarios/simple/configs/cbba.yaml')
+from plugins.mrta.cbba.cbba import CBBA, CBBA_MESSAGE  # noqa: E402  (reads config at import)
+from plugins.mrta.cbba.consensus import ConsensusTable, RULE_NUMBERS  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'cbba_consensus_corpus.json')
+ME = 'UGV_0'
+
+
+def generate_case(rng):
+    agents = [f"UGV_{i}" for i in range(6)]
+    tasks = [f"Fire_{i}" for i in range(rng.randint(1, 8))]
+    bids = [float('-inf'), 0, 0.0, 0.5, 0.75, 0.75, 1.0]
+
+    def winners():
+        return {j: rng.choice(agents + [None]) for j in tasks if rng.random() < 0.8}
+
+    def bid_list(z):
+        y = {j: rng.choice(bids) for j in z if rng.random() < 0.9}  # a few winners without a bid entry
+        y.update({j: rng.choice(bids) for j in tasks if rng.random() < 0.1})
+        return y
+
+    def stamps():
+        return {a: rng.randint(0, 3) for a in agents if rng.random() < 0.7}
+
+    z = winners()
+    neighbors = []
+    for k_agent_id in rng.sample(agents[1:], rng.randint(1, 4)):
+        z_k = winners()
+        neighbors.append({'agent_id': k_agent_id, 'winning_agents': z_k, 'winning_bids': bid_list(z_k),
+                          'message_received_time_stamp': stamps()})
+    return {'tasks': tasks, 'z': z, 'y': bid_list(z), 's': stamps(), 'neighbors': neighbors}
+
+
+def run_legacy(case):
+    agent = types.SimpleNamespace(agent_id=ME, position=pygame.math.Vector2(0, 0), message_to_share={})
+    cbba = CBBA(agent)
+    cbba.z, cbba.y, cbba.s = dict(case['z']), dict(case['y']), dict(case['s'])
+    candidates = [types.SimpleNamespace(task_id=j) for j in case['tasks']]
+    cbba.resolve_conflicts_legacy(candidates, [CBBA_MESSAGE.decode(m) for m in case['neighbors']])
+    return cbba.z, cbba.y
+
+
+def run_table(case, table=None):
+    z, y, s = dict(case['z']), dict(case['y']), dict(case['s'])
+    (table or ConsensusTable()).resolve(ME, z, y, s, case['tasks'], [CBBA_MESSAGE.decode(m) for m in case['neighbors']])
+    return z, y
+
+
+def as_items(result):
+    # Values with their type and key order (0 and 0.0 are different payloads)
+    z, y = result
+    return [[j, v] for j, v in z.items()], [[j, repr(v)] for j, v in y.items()]
+
+
+def first_pair_rules(case):
+    """Paper rule number of every (task, first neighbor) pair, against the initial z (coverage report)."""
+    k = case['neighbors'][0]
+    k_id, z, z_k = k['agent_id'], case['z'], k['winning_agents']
+    rules = []
+    for j in case['tasks']:
+        zk, zi = z_k.get(j), z.get(j)
+        rel_k = 0 if zk == k_id else 1 if zk == ME else 2 if zk is None else 3
+        rel_i = 0 if zi == ME else 1 if zi == k_id else 2 if zi is None else 3 if zi == zk else 4
+        rules.append(int(RULE_NUMBERS[rel_k, rel_i]))
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CBBA consensus: rule table vs rule ladder regression corpus')
+    parser.add_argument('--regenerate', action='store_true', help='rewrite the corpus from the rule ladder')
+    parser.add_argument('--cases', type=int, default=250)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.regenerate:
+        rng = random.Random(args.seed)
+        corpus = []
+        for _ in range(args.cases):
+            case = generate_case(rng)
+            case['expected'] = as_items(run_legacy(case))
+            corpus.append(case)
+        with open(CORPUS_PATH, 'w') as f:
+            json.dump(corpus, f, separators=(',', ':'))
+        print(f"wrote {len(corpus)} cases to {CORPUS_PATH}")
+        return
+
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+    shared_table = ConsensusTable()  # also exercises the per-neighbor encoding cache across cases
+    failures = Counter()
+    coverage = Counter()
+    for index, case in enumerate(corpus):
+        expected = [list(map(list, part)) for part in case['expected']]
+        for name, result in (('ladder', run_legacy(case)), ('table', run_table(case)),
+                             ('table (shared)', run_table(case, shared_table))):
+            if list(map(list, as_items(result))) != expected:
+                failures[name] += 1
+                if failures[name] == 1:
+                    print(f"case {index}: {name} mismatch")
+        coverage.update(first_pair_rules(case))
+
+    print(f"{len(corpus)} cases, rule coverage (first neighbor): "
+          + ' '.join(f"R{rule}:{count}" for rule, count in sorted(coverage.items()) if rule))
+    if failures:
+        raise SystemExit(f"FAILED: {dict(failures)}")
+    print("OK: rule table matches the rule ladder on every case")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ bt_module = optional_import(env_pkg + ".bt_nodes")
 
 from modules.bt_constructor import build_behavior_tree
 from modules.ros_bridge import ROSBridge
+from modules.task_table import DistanceCache
 
 class Agent:
     def __init__(self, ros_namespace=None):
@@ -13,12 +14,15 @@ class Agent:
         self.ros_namespace = ros_namespace      
         self.type = config['agent'].get('type', None) # agent type 생성
 
-        self.messages_received = []
+        self.messages_received = []      # 현재 통신 범위 내 이웃들의 최신 메시지 (전체 이웃 상태)
+        self.new_messages_received = []  # 그중 직전 틱 이후 내용(버전)이 바뀐 메시지만: 증분 처리용
 
         # For smooth integration with the SPACE simulator
         self.agent_id = ros_namespace.strip('/') if ros_namespace else "no_id_agent" # agent_id 생성      
         self.message_to_share = {} # BT 노드에서 설정하는 임시 속성: 다음 틱에 outbox로 송신할 메시지
         self.position = pygame.math.Vector2(0, 0) # Agent의 현재 위치 (초기값은 (0, 0))
+        self.tick_clock = None # 현재 틱의 시간 스냅샷 (TickClock): 틱 내 시간 기반 로직은 모두 이 값을 사용
+        self.distances = DistanceCache(self) # agent↔task, task↔task 거리 캐시: 위치/task 집합이 바뀔 때만 다시 계산
         
 
     def create_behavior_tree(self, behavior_tree_xml):
@@ -28,12 +32,20 @@ class Agent:
     def _reset_bt_action_node_status(self):
         self.tree.reset()
 
+    def _begin_tick(self):
+        # 틱 시작 시점의 구독 메시지 스냅샷 고정: 틱 동안 모든 노드가 같은 세대를 읽음
+        self.ros_bridge.freeze_caches()
+        # 틱 시작 시점의 시간 스냅샷: 틱 동안 하나의 "now"를 공유
+        self.tick_clock = self.ros_bridge.snapshot_clock()
+
     async def run_tree(self):
+        self._begin_tick()
         self._reset_bt_action_node_status()
         return await self.tree.run(self, self.blackboard)
 
     def reset_messages_received(self):
         self.messages_received = []
+        self.new_messages_received = []
 
     def set_planned_tasks(self, *_):
         pass  # Visualization handled by ROS tools
@@ -47,3 +59,12 @@ class Agent:
             node.halt()
         _halt(self.tree)
 
+    def close_tree(self):
+        """트리 전체 노드의 close() 호출 — 종료 시 노드가 가진 자원(공유 메모리 ring 등) 해제."""
+        def _close(node):
+            if hasattr(node, 'children'):
+                for child in node.children:
+                    _close(child)
+            node.close()
+        _close(self.tree)
+
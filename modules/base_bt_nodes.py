@@ -40,6 +40,10 @@ class Node:
     def halt(self):
         pass
 
+    def close(self):
+        # 종료 시 한 번 호출: 노드가 가진 자원(파일, mmap 등) 해제
+        pass
+
     def reset(self):
         self.status = None
         if hasattr(self, "children"):
@@ -1,19 +1,84 @@
+import json
+import struct
+
 from modules.base_bt_nodes import Node, Status
-from rclpy.action import ActionClient
 from action_msgs.msg import GoalStatus
+from std_msgs.msg import String
+
+
+# goal_pose 토픽의 목표 갱신은 액션 goal과 다른 전송 경로라 순서가 보장되지 않는다.
+# 갱신이 어느 goal에 대한 것인지 header.frame_id 끝에 '#<goal UUID hex>'로 붙이고,
+# 액션 서버는 활성 goal의 UUID와 다른 갱신을 버린다.
+GOAL_ID_SEPARATOR = '#'
+
+
+def goal_id_hex(goal_id):
+    """unique_identifier_msgs/UUID → 32자리 hex 문자열."""
+    return bytes(bytearray(goal_id.uuid)).hex()
+
+
+def cdr_string_payload(buf):
+    """
+    직렬화된 std_msgs/String(CDR) 버퍼에서 문자열 바이트만 잘라낸다.
+      - [0:4] encapsulation header (byte 1의 최하위 비트: 1이면 little-endian)
+      - [4:8] uint32 길이 (null 종단 포함)
+      - [8:]  UTF-8 문자열 바이트
+    """
+    endian = '<' if buf[1] & 0x01 else '>'
+    (length,) = struct.unpack_from(endian + 'I', buf, 4)
+    return bytes(buf[8:8 + max(length - 1, 0)])
+
+
+class RawJSONMessage:
+    """
+    raw 구독으로 받은 JSON-over-String 메시지.
+    String 메시지 객체를 만들지 않고, 노드가 value를 처음 읽을 때 버퍼에서 바로 JSON 디코딩한다 (결과는 재사용).
+    """
+    __slots__ = ('raw', 'object_hook', '_value', '_decoded')
+
+    def __init__(self, raw, object_hook=None):
+        self.raw = raw
+        self.object_hook = object_hook
+        self._value = None
+        self._decoded = False
+
+    @property
+    def data(self):
+        # std_msgs/String.data 호환
+        return cdr_string_payload(self.raw).decode('utf-8')
+
+    @property
+    def value(self):
+        if not self._decoded:
+            self._value = json.loads(cdr_string_payload(self.raw), object_hook=self.object_hook)
+            self._decoded = True
+        return self._value
 
 
 class ConditionWithROSTopics(Node):
-    def __init__(self, name, agent, msg_types_topics):
+    """
+    토픽 구독 기반 Condition 베이스.
+      - msg_types_topics: [(MsgType, topic, key), ...] → 역직렬화된 메시지를 cache[key]에 저장
+      - raw_json_topics:  [(topic, key) 또는 (topic, key, object_hook), ...]
+                          JSON을 담은 std_msgs/String 토픽을 raw(직렬화 바이트)로 구독 → cache[key]는 RawJSONMessage
+    """
+    def __init__(self, name, agent, msg_types_topics, raw_json_topics=()):
         super().__init__(name)
         self.ros = agent.ros_bridge
-        self._cache = {}
+        self._cache = self.ros.create_topic_cache()  # 틱 시작 시 고정되는 스냅샷 캐시
         for msg_type, topic, key in msg_types_topics:
             self.ros.node.create_subscription(
                 msg_type, topic,
-                lambda m, k=key: self._cache.__setitem__(k, m),
+                lambda m, k=key: self._cache.put(k, m),
                 1
             )
+        for topic, key, *hook in raw_json_topics:
+            self.ros.node.create_subscription(
+                String, topic,
+                lambda b, k=key, h=(hook[0] if hook else None): self._cache.put(k, RawJSONMessage(b, h)),
+                1,
+                raw=True
+            )
         # For PA-BT
         self.is_expanded = False
         self.type = "Condition"
@@ -31,6 +96,9 @@ class ConditionWithROSTopics(Node):
 
         return self.status
 
+    def is_new(self, key) -> bool: # 직전 틱 이후 새 메시지가 들어왔는가?
+        return self._cache.is_new(key)
+
     def _predicate(self, agent, blackboard) -> bool: # 내 조건이 만족했는가?"를 판단하는 코드 구현
         raise NotImplementedError
 
@@ -45,12 +113,14 @@ class ActionWithROSAction(Node):
       - _fingerprint(): 목표 바뀜 판정 (None이면 실행 불가)
       - _build_goal(): Goal 생성
       - _interpret_result(): 완료 시 SUCCESS/FAILURE 매핑
+    같은 action_spec을 쓰는 노드들은 bridge의 공유 ActionClient를 쓰고,
+    goal handle / result future만 노드별로 가진다 (공유 클라이언트 위의 노드별 뷰).
     """
     def __init__(self, name, agent, action_spec):
         super().__init__(name)
         self.ros = agent.ros_bridge
         action_type, action_name = action_spec
-        self.client = ActionClient(self.ros.node, action_type, action_name)
+        self.client = self.ros.get_action_client(action_type, action_name)
 
         self._goal_handle = None
         self._result_future = None
@@ -143,6 +213,29 @@ class ActionWithROSAction(Node):
     #     self._phase = 'idle'
 
 
+class RetargetableActionWithROSAction(ActionWithROSAction):
+    """
+    목표를 바꿀 수 있는 ROS Action 클라이언트 베이스.
+      - goal_topic_spec: (MsgType, topic_name) - 액션 서버가 활성 goal의 새 목표로 반영하는 토픽
+      - retarget(msg): RUNNING 중인 goal의 목표를 퍼블리시 한 번으로 갱신
+                       (cancel → send_goal → accept → result 왕복 없이).
+                       msg.header.frame_id에 이 goal의 UUID를 붙여 보낸다 (GOAL_ID_SEPARATOR).
+    하위 클래스는 _on_running()에서 목표가 바뀌었을 때 retarget()을 호출한다.
+    """
+    def __init__(self, name, agent, action_spec, goal_topic_spec):
+        super().__init__(name, agent, action_spec)
+        msg_type, topic_name = goal_topic_spec
+        self._goal_pub = self.ros.node.create_publisher(msg_type, topic_name, 10)
+
+    def retarget(self, msg):
+        # 서버가 goal을 실행 중일 때만 의미가 있음 (그 외에는 다음 _build_goal()이 새 목표를 보냄)
+        if self._phase != 'running':
+            return False
+        msg.header.frame_id = f"{msg.header.frame_id}{GOAL_ID_SEPARATOR}{goal_id_hex(self._goal_handle.goal_id)}"
+        self._goal_pub.publish(msg)
+        return True
+
+
 class ActionWithROSService(Node):
     """
     심플 ROS Service 클라이언트 베이스.
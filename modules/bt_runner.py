@@ -50,6 +50,7 @@ class BTRunner:
     def close(self):
         if self.agent and hasattr(self.agent, 'tree'):
             self.agent.halt_tree()
+            self.agent.close_tree()
 
     def render(self):
         if self.bt_viz_cfg.get('enabled', False):
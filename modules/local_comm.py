@@ -0,0 +1,356 @@
+import base64
+import copy
+import hashlib
+import random
+import zlib
+
+from modules.utils import config, get_message_codec, decode_message, BinaryMessageCodec, JSONMessageCodec
+
+# ---- local_comm delta protocol --------------------------------------------
+# outbox 메시지를 매 틱 전체로 보내는 대신, 주기적인 키프레임(전체 메시지)과
+# "마지막 키프레임 대비" diff를 보낸다. 수신 측은 송신자별 키프레임에 diff를 적용해 전체 메시지를 복원하므로
+# 플러그인은 기존처럼 완전한 dict를 받는다.
+#
+# diff를 직전 틱이 아닌 키프레임 기준(누적)으로 만드는 이유: robot_supervisor는 이웃의 "최신" outbox만 중계하므로
+# 수신 측은 중간 틱 메시지를 놓칠 수 있다. 키프레임만 가지고 있으면 어떤 diff든 단독으로 적용 가능하다.
+#
+# Envelope 형식:
+#   {'__delta__': {'ep': <송신자 세션 id>, 'seq': <송신 순번>, 'base': <기준 키프레임 seq>},
+#    'body': <전체 메시지(키프레임, base == seq) 또는 diff>,
+#    'agent_id': ..., 'assigned_task_id': ..., 'planned_tasks_id': ...}   # 헤더 키는 시각화(robot_supervisor)용 복사본
+# diff 형식 (dict 단위, 빈 항목은 생략):
+#   {'set': {key: 새 값}, 'del': [삭제된 key], 'sub': {key: 하위 dict의 diff}}
+
+# ---- payload compression -----------------------------------------------
+# threshold_bytes보다 큰 payload는 zlib 압축 후 'Z:<digest>:<base85>' 텍스트로 보낸다.
+# digest는 압축 전 payload의 해시: 수신 측은 이미 디코딩해 둔 digest면 압축 해제/디코딩을 건너뛴다.
+# binary 코덱 payload는 base64 텍스트가 아닌 원래 바이트를 압축한다 (base64 텍스트는 zlib이 잘 줄이지 못함).
+
+COMPRESSED_PREFIX = 'Z:'
+BINARY_PREFIX = BinaryMessageCodec.prefix
+BINARY_PREFIX_BYTES = BINARY_PREFIX.encode('ascii')
+DIGEST_LENGTH = 16  # hex 문자 수 (blake2b 8 bytes)
+
+
+def compress_payload(payload, level=6):
+    if payload.startswith(BINARY_PREFIX):
+        raw = BINARY_PREFIX_BYTES + base64.b64decode(payload[len(BINARY_PREFIX):])
+    else:
+        raw = payload.encode('utf-8')
+    digest = hashlib.blake2b(raw, digest_size=DIGEST_LENGTH // 2).hexdigest()
+    return f"{COMPRESSED_PREFIX}{digest}:" + base64.b85encode(zlib.compress(raw, level)).decode('ascii')
+
+
+def payload_digest(item):
+    """압축 payload의 digest (압축 payload가 아니면 None)."""
+    if isinstance(item, str) and item.startswith(COMPRESSED_PREFIX):
+        return item[len(COMPRESSED_PREFIX):len(COMPRESSED_PREFIX) + DIGEST_LENGTH]
+    return None
+
+
+def decompress_payload(item):
+    body = item[len(COMPRESSED_PREFIX) + DIGEST_LENGTH + 1:]
+    raw = zlib.decompress(base64.b85decode(body))
+    if raw.startswith(BINARY_PREFIX_BYTES):
+        return BINARY_PREFIX + base64.b64encode(raw[len(BINARY_PREFIX_BYTES):]).decode('ascii')
+    return raw.decode('utf-8')
+
+
+DELTA_KEY = '__delta__'
+VERSION_KEY = '__version__'  # 송신자 메시지 버전: 내용이 바뀔 때만 증가 (수신 측은 버전으로 새 메시지만 골라냄)
+HEADER_KEYS = ('agent_id', 'assigned_task_id', 'planned_tasks_id')
+
+
+def compute_delta(old, new):
+    """old dict → new dict 로 가는 diff. 양쪽 값이 모두 dict인 키만 재귀적으로 비교한다."""
+    delta = {}
+    set_items = {}
+    sub_items = {}
+    for key, value in new.items():
+        if key not in old:
+            set_items[key] = value
+            continue
+        prev = old[key]
+        if isinstance(value, dict) and isinstance(prev, dict):
+            sub = compute_delta(prev, value)
+            if sub:
+                sub_items[key] = sub
+        elif prev != value:
+            set_items[key] = value
+    deleted = [key for key in old if key not in new]
+    if set_items:
+        delta['set'] = set_items
+    if deleted:
+        delta['del'] = deleted
+    if sub_items:
+        delta['sub'] = sub_items
+    return delta
+
+
+def apply_delta(base, delta):
+    """base에 diff를 적용한 새 dict 반환. base는 수정하지 않으며 바뀌지 않은 하위 객체는 공유한다."""
+    result = type(base)(base)
+    for key, value in delta.get('set', {}).items():
+        result[key] = value
+    for key in delta.get('del', ()):
+        result.pop(key, None)
+    for key, sub in delta.get('sub', {}).items():
+        prev = result.get(key)
+        result[key] = apply_delta(prev if isinstance(prev, dict) else {}, sub)
+    return result
+
+
+class DeltaEncoder:
+    """송신 측: 메시지를 키프레임/diff envelope로 변환.
+    keyframe_interval 틱마다 전체 메시지를 키프레임으로 보내 새로 합류한 이웃도 복원할 수 있게 한다.
+    키프레임 envelope는 keyframe_sent()가 호출되어야 이후 diff의 기준이 된다:
+    예산 초과 등으로 실제로 보내지 못한 키프레임을 기준으로 diff를 만들면 수신 측이 복원할 수 없다."""
+
+    def __init__(self, keyframe_interval=20):
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.epoch = random.getrandbits(31)  # 송신자 재시작 시 이전 세션의 키프레임과 섞이지 않도록 구분
+        self.seq = 0
+        self._keyframe_seq = None
+        self._keyframe = None  # 마지막으로 보낸 키프레임 메시지의 deep copy (플러그인이 dict를 제자리에서 수정하므로)
+        self._pending_keyframe = None  # 직전 encode()가 만든 키프레임 (seq, deep copy): 송신이 확인되면 기준이 됨
+        self._ticks_since_keyframe = 0
+
+    def tick(self):
+        """송신 틱 경과 기록 (내용이 안 바뀌어 encode를 건너뛴 틱도 키프레임 주기에 포함)."""
+        self._ticks_since_keyframe += 1
+
+    def keyframe_due(self):
+        return self._keyframe is None or self._ticks_since_keyframe >= self.keyframe_interval
+
+    def encode(self, message, keyframe=None):
+        """keyframe: None이면 주기(keyframe_due)에 따라, False면 마지막으로 보낸 키프레임 기준 diff.
+        보낸 키프레임이 없는데 diff를 요청하면 None."""
+        if keyframe is None:
+            keyframe = self.keyframe_due()
+        if not keyframe and self._keyframe is None:
+            return None
+        self.seq += 1
+        if keyframe:
+            self._pending_keyframe = (self.seq, copy.deepcopy(message))
+            base = self.seq
+            body = message
+        else:
+            self._pending_keyframe = None
+            base = self._keyframe_seq
+            body = compute_delta(self._keyframe, message)
+
+        envelope = {DELTA_KEY: {'ep': self.epoch, 'seq': self.seq, 'base': base},
+                    'body': body}
+        for key in HEADER_KEYS:
+            if key in message:
+                envelope[key] = message[key]
+        return envelope
+
+    def keyframe_pending(self):
+        return self._pending_keyframe is not None
+
+    def keyframe_sent(self):
+        """직전 encode()의 키프레임 envelope가 송신됨: 이후 diff의 기준으로 삼는다."""
+        if self._pending_keyframe is not None:
+            self._keyframe_seq, self._keyframe = self._pending_keyframe
+            self._pending_keyframe = None
+            self._ticks_since_keyframe = 0
+
+
+class DeltaDecoder:
+    """수신 측: 송신자별 키프레임을 보관하고 envelope를 전체 메시지로 복원.
+    envelope가 아닌 메시지(delta 비활성 이웃)는 그대로 통과시킨다."""
+
+    def __init__(self):
+        self._senders = {}  # agent_id → {'ep', 'base', 'keyframe', 'seq', 'message'}
+
+    def decode(self, message):
+        header = message.get(DELTA_KEY) if isinstance(message, dict) else None
+        if header is None:
+            return message
+
+        sender_id = message.get('agent_id')
+        epoch, seq, base = header['ep'], header['seq'], header['base']
+        state = self._senders.get(sender_id)
+        if state is not None and state['ep'] != epoch:
+            state = None  # 송신자가 재시작함: 이전 키프레임 폐기
+
+        if state is not None and seq <= state['seq']:
+            return state['message']  # 이미 복원한 메시지의 재중계 (또는 늦게 도착한 이전 메시지)
+
+        if not isinstance(message.get('body'), dict):
+            return None  # 잘못된 envelope
+        if seq == base:
+            # 키프레임
+            state = {'ep': epoch, 'base': base, 'keyframe': message['body']}
+            self._senders[sender_id] = state
+            restored = state['keyframe']
+        elif state is not None and state['base'] == base:
+            restored = apply_delta(state['keyframe'], message['body'])
+        else:
+            return None  # 기준 키프레임을 아직 못 받음: 다음 키프레임까지 이 이웃은 보이지 않음
+
+        state['seq'] = seq
+        state['message'] = restored
+        return restored
+
+
+class LocalCommChannel:
+    """GatherLocalInfo가 쓰는 outbox/inbox 파이프라인: 메시지 → (delta envelope) → 코덱 텍스트, 그리고 그 역방향.
+    config:
+      local_comm.codec: json | binary
+      local_comm.delta.enabled / keyframe_interval
+      local_comm.compression.enabled / threshold_bytes
+      local_comm.max_message_bytes: 메시지 하나의 바이트 예산 (0이면 제한 없음).
+        초과하면 threshold_bytes와 무관하게 압축하고, 그래도 초과하면 메시지를 버리지 않고 줄여서 보낸다:
+          1. (delta) 키프레임이면 마지막으로 보낸 키프레임 기준 diff
+          2. 큰 필드부터 뺀 메시지 (식별/헤더 필드 HEADER_KEYS와 VERSION_KEY는 유지):
+             이웃은 송신자를 계속 보고, 빠진 필드는 각 플러그인 MessageSchema의 기본값으로 읽는다
+    수신 측 delta 복원은 설정과 무관하게 항상 동작하므로 delta를 켠 로봇과 끈 로봇이 섞여도 통신된다.
+    코덱은 JSON payload는 항상, binary payload는 local_comm.codec이 binary일 때만 받는다.
+    디코딩할 수 없거나 dict가 아닌 inbox 항목은 그 항목만 버린다.
+
+    송신 메시지에는 VERSION_KEY가 붙는다. 내용이 이전 틱과 같으면 버전을 올리지 않고 직전 payload를 그대로 재사용하며,
+    수신 측은 select_new()로 버전이 바뀐 메시지만 골라 플러그인에 agent.new_messages_received로 넘긴다."""
+
+    def __init__(self):
+        comm_config = (config or {}).get('local_comm') or {}
+        delta_config = comm_config.get('delta') or {}
+        compression_config = comm_config.get('compression') or {}
+        self.codec = get_message_codec(comm_config.get('codec'))
+        self.accepted_codecs = {JSONMessageCodec.name, self.codec.name}  # binary payload은 binary 코덱을 켠 로봇만 디코딩
+        self._rejecting = False  # 직전 inbox에 버린 항목이 있었음 (로그는 이 상태에 들어갈 때 한 번만)
+        self.encoder = DeltaEncoder(delta_config.get('keyframe_interval', 20)) if delta_config.get('enabled', False) else None
+        self.decoder = DeltaDecoder()
+        self.compression_threshold = compression_config.get('threshold_bytes', 4096) if compression_config.get('enabled', False) else None
+        self.max_message_bytes = comm_config.get('max_message_bytes', 0) or 0
+        self._budget_fallback = None  # 예산 초과로 보내는 대체 메시지 종류 ('delta' | 'trimmed'; 로그는 바뀔 때 한 번만)
+        self._decoded_digests = {}  # 수신 측: digest → 직전 inbox에서 디코딩한 메시지
+        self.version = 0
+        self._last_body = None     # 직전 틱 메시지의 코덱 텍스트 (버전 없이): 변경 감지용
+        self._last_payload = None  # 직전에 송신한 payload
+        self._seen_versions = {}   # 수신 측: agent_id → 직전 틱에 넘긴 메시지 버전
+
+    def pack(self, message):
+        body = self.codec.encode(message)
+        changed = body != self._last_body
+        if self.encoder is not None:
+            self.encoder.tick()
+        if not changed and not (self.encoder is not None and self.encoder.keyframe_due()):
+            return self._last_payload  # 내용 동일: 재인코딩 없이 같은 버전의 payload 재송신
+
+        if changed:
+            self.version += 1
+            self._last_body = body
+        # 빈 메시지({})는 버전 없이 그대로 보냄: 플러그인은 빈 메시지를 "공유할 정보 없음"으로 보고 건너뛴다 (예: CBAA)
+        if message:
+            versioned = dict(message)
+            versioned[VERSION_KEY] = self.version
+        else:
+            versioned = message
+        fallback = None
+        if self.encoder is not None:
+            full = self._compress(self.codec.encode(self.encoder.encode(versioned)))  # envelope(대개 작은 diff)는 따로 인코딩
+            payload = self._fit(full)
+            if payload is None and self.encoder.keyframe_pending():
+                # 키프레임이 예산 초과: 보내지 못한 키프레임은 기준으로 삼지 않고, 마지막으로 보낸 키프레임 기준 diff로 대체
+                envelope = self.encoder.encode(versioned, keyframe=False)
+                if envelope is not None:
+                    payload = self._fit(self._compress(self.codec.encode(envelope)))
+                    fallback = 'delta'
+            elif payload is not None:
+                self.encoder.keyframe_sent()
+        elif message:
+            full = self._compress(self.codec.append_item(body, VERSION_KEY, self.version))  # 변경 감지용 인코딩에 버전만 덧붙임
+            payload = self._fit(full)
+        else:
+            full = payload = body
+        if payload is None:
+            payload, dropped = self._trim(versioned)
+            fallback = 'trimmed'
+        if fallback != self._budget_fallback and fallback is not None:
+            detail = ("a delta against the last keyframe that was sent" if fallback == 'delta'
+                      else f"the message without {', '.join(dropped)}")
+            print(f"[local_comm] outbox message is {len(full)} bytes, over the {self.max_message_bytes} byte budget "
+                  f"(local_comm.max_message_bytes) even compressed; sending {detail} instead until it fits.")
+        self._budget_fallback = fallback
+        self._last_payload = payload
+        return payload
+
+    def _compress(self, payload):
+        if self.compression_threshold is not None and len(payload) > self.compression_threshold:
+            return compress_payload(payload)
+        return payload
+
+    def _fit(self, payload):
+        """예산 안의 payload (초과하면 threshold_bytes와 무관하게 압축해 본다) 또는 None.
+        codec/압축 결과는 ASCII(base64/base85) 또는 JSON 텍스트: 문자 수 ≈ 바이트 수."""
+        if not self.max_message_bytes or len(payload) <= self.max_message_bytes:
+            return payload
+        if payload_digest(payload) is None:
+            payload = compress_payload(payload)
+            if len(payload) <= self.max_message_bytes:
+                return payload
+        return None
+
+    def _trim(self, message):
+        """예산에 맞을 때까지 인코딩이 큰 필드부터 뺀 메시지의 (payload, 뺀 필드 목록).
+        식별/헤더 필드는 남긴다 (그것만으로도 예산을 넘으면 그대로 보냄)."""
+        trimmed = dict(message)
+        sizes = sorted(((len(self.codec.encode({key: value})), key) for key, value in message.items()
+                        if key not in HEADER_KEYS and key != VERSION_KEY), reverse=True)
+        dropped = []
+        payload = None
+        for _, key in sizes:
+            del trimmed[key]
+            dropped.append(key)
+            payload = self._fit(self._compress(self.codec.encode(trimmed)))
+            if payload is not None:
+                return payload, dropped
+        return self._compress(self.codec.encode(trimmed)), dropped
+
+    def unpack(self, items):
+        messages = []
+        decoded_digests = {}
+        rejected = []
+        for item in items:
+            # 잘못된 payload(디코딩 실패, 받지 않는 코덱, dict가 아닌 메시지)는 그 항목만 버린다
+            try:
+                digest = payload_digest(item)
+                if digest is not None:
+                    # 압축 payload: 같은 digest를 이미 디코딩했다면 재사용
+                    message = self._decoded_digests.get(digest)
+                    if message is None:
+                        message = decode_message(decompress_payload(item), self.accepted_codecs)
+                    decoded_digests[digest] = message
+                elif isinstance(item, str):
+                    message = decode_message(item, self.accepted_codecs)  # JSON이 아닌 코덱 payload
+                else:
+                    message = item  # JSON 코덱 메시지는 inbox 배열 안에서 이미 디코딩됨
+                if not isinstance(message, dict):
+                    raise ValueError(f"message is a {type(message).__name__}, not a dict")
+            except (ValueError, zlib.error) as e:
+                rejected.append(str(e))
+                continue
+            message = self.decoder.decode(message)
+            if message is not None:
+                messages.append(message)
+        self._decoded_digests = decoded_digests
+        if rejected and not self._rejecting:
+            print(f"[local_comm] dropped {len(rejected)} inbox item(s): {rejected[0]}")
+        self._rejecting = bool(rejected)
+        return messages
+
+    def select_new(self, messages):
+        """직전 호출 이후 버전이 바뀐(또는 새로 보인) 이웃 메시지만 반환. 버전이 없는 메시지는 항상 새 메시지로 취급."""
+        seen = self._seen_versions
+        current = {}
+        new_messages = []
+        for message in messages:
+            sender_id = message.get('agent_id')
+            version = message.get(VERSION_KEY)
+            if version is None or seen.get(sender_id) != version:
+                new_messages.append(message)
+            current[sender_id] = version
+        self._seen_versions = current
+        return new_messages
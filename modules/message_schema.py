@@ -0,0 +1,129 @@
+"""
+MRTA 플러그인 메시지 스키마.
+
+플러그인은 `agent.message_to_share` 형식을 Field 목록으로 한 번 선언하고,
+스키마가 생성한 함수로 메시지를 만들고(encode) 읽는다(decode → 타입이 정해진 slot 객체).
+
+    GRAPE_MESSAGE = MessageSchema('GRAPEMessage', [
+        Field('agent_id'),
+        Field('partition', factory=dict),
+        Field('evolution_number', default=0),
+    ])
+    agent.message_to_share = GRAPE_MESSAGE.encode(agent_id=..., partition=..., evolution_number=...)
+    for msg in GRAPE_MESSAGE.decode_all(agent.messages_received):
+        msg.evolution_number  # 누락/None이면 default
+
+encode/decode 함수는 필드 목록에서 코드로 생성되므로 (exec) 필드마다 .get() / try-except를 거치지 않는다.
+"""
+
+_MISSING = object()
+
+
+class Field:
+    """
+    메시지 필드 선언.
+      - default / factory: 값이 없거나 None일 때 쓰는 값 (가변 객체는 factory로)
+      - encode: 송신 dict에 넣을 때 적용할 변환 (예: dict → 복사본)
+      - decode: 수신 값에 적용할 변환 (값이 있을 때만)
+    """
+    __slots__ = ('name', 'default', 'factory', 'encode', 'decode')
+
+    def __init__(self, name, default=None, factory=None, encode=None, decode=None):
+        self.name = name
+        self.default = default
+        self.factory = factory
+        self.encode = encode
+        self.decode = decode
+
+
+class SchemaMessage:
+    """스키마로 디코딩한 수신 메시지의 베이스 (필드는 __slots__ 속성). source는 원본 dict."""
+    __slots__ = ('source',)
+    _fields = ()
+
+    def get(self, key, default=None):
+        # 레거시 dict 스타일 접근
+        if key in self._fields:
+            return getattr(self, key)
+        return self.source.get(key, default)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={getattr(self, k)!r}' for k in self._fields)})"
+
+
+class MessageSchema:
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = tuple(fields)
+        self.field_names = tuple(f.name for f in self.fields)
+        self.message_type = self._build_message_type()
+        self.encode = self._build_encoder()
+        self.decode = self._build_decoder()
+        self._decoded = {}  # id(원본 메시지) → (원본, 디코딩 결과): decode_all에서 같은 메시지 객체는 재사용
+
+    def decode_all(self, messages):
+        """메시지 리스트 디코딩. 직전 호출과 같은 메시지 객체(변경 없는 이웃)는 다시 디코딩하지 않는다."""
+        cache = self._decoded
+        decoded = {}
+        result = []
+        for message in messages:
+            key = id(message)
+            hit = cache.get(key)
+            if hit is None or hit[0] is not message:
+                hit = (message, self.decode(message))
+            decoded[key] = hit
+            result.append(hit[1])
+        self._decoded = decoded
+        return result
+
+    # ---- code generation ----------------------------------------------
+
+    def _namespace(self):
+        ns = {'_MISSING': _MISSING}
+        for i, f in enumerate(self.fields):
+            ns[f'_default{i}'] = f.default
+            ns[f'_factory{i}'] = f.factory
+            ns[f'_encode{i}'] = f.encode
+            ns[f'_decode{i}'] = f.decode
+        return ns
+
+    def _default_expr(self, i):
+        return f'_factory{i}()' if self.fields[i].factory is not None else f'_default{i}'
+
+    def _build_message_type(self):
+        names = self.field_names
+        args = ', '.join(('source',) + names)
+        body = '\n'.join(f'    self.{n} = {n}' for n in ('source',) + names)
+        ns = {}
+        exec(f'def __init__(self, {args}):\n{body}\n', ns)
+        return type(self.name, (SchemaMessage,), {
+            '__slots__': names, '_fields': names, '__init__': ns['__init__'],
+        })
+
+    def _build_encoder(self):
+        params = ', '.join(f'{n}=_MISSING' for n in self.field_names)
+        items = []
+        for i, f in enumerate(self.fields):
+            value = f.name if f.encode is None else f'_encode{i}({f.name})'
+            items.append(f"        {f.name!r}: {self._default_expr(i)} if {f.name} is _MISSING or {f.name} is None else {value},")
+        src = f'def encode(*, {params}):\n    return {{\n' + '\n'.join(items) + '\n    }\n'
+        ns = self._namespace()
+        exec(src, ns)
+        encode = ns['encode']
+        encode.__doc__ = f"{self.name} 송신 dict 생성 (필드: {', '.join(self.field_names)})"
+        return encode
+
+    def _build_decoder(self):
+        lines = ['def decode(message):', '    get = message.get']
+        args = []
+        for i, f in enumerate(self.fields):
+            lines.append(f'    v{i} = get({f.name!r})')
+            value = f'v{i}' if f.decode is None else f'_decode{i}(v{i})'
+            args.append(f'{self._default_expr(i)} if v{i} is None else {value}')
+        lines.append(f"    return _message_type(message, {', '.join(args)})")
+        ns = self._namespace()
+        ns['_message_type'] = self.message_type
+        exec('\n'.join(lines) + '\n', ns)
+        decode = ns['decode']
+        decode.__doc__ = f"수신 dict → {self.name} (누락/None 필드는 default)"
+        return decode
@@ -1,10 +1,88 @@
 # ros_bridge.py
 import threading
+import time
 import rclpy
+from rclpy.action import ActionClient
 from rclpy.executors import SingleThreadedExecutor
 from rclpy.node import Node as RclNode
 
 
+class TickClock:
+    """
+    틱 시작 시점에 한 번 찍는 시간 스냅샷.
+    틱 안의 모든 노드/플러그인이 같은 "now"를 보며, 노드마다 rcl clock을 호출하지 않아도 된다.
+    """
+    __slots__ = ('monotonic', 'wall', 'ros_time')
+
+    def __init__(self, monotonic, wall, ros_time):
+        self.monotonic = monotonic  # time.monotonic() [s]
+        self.wall = wall            # time.time() [s]
+        self.ros_time = ros_time    # rclpy.time.Time (node clock)
+
+    @property
+    def ros_sec(self):
+        return self.ros_time.nanoseconds / 1e9
+
+    def to_msg(self):
+        # header.stamp용 builtin_interfaces/Time
+        return self.ros_time.to_msg()
+
+
+class TopicCache:
+    """
+    구독 메시지용 시퀀스 번호 캐시 (lock-free).
+      - executor 스레드: put()으로 (seq, msg)를 최신 슬롯에 기록 (dict 단일 대입 → GIL 하에서 원자적)
+      - BT 스레드: 틱 시작 시 freeze()로 스냅샷을 고정하고, 틱 동안에는 스냅샷만 읽음
+    같은 틱의 모든 노드가 같은 메시지 세대를 보며, is_new(key)로 직전 틱 이후 갱신 여부를 알 수 있다.
+    """
+
+    def __init__(self):
+        self._latest = {}       # key -> (seq, msg), executor 스레드가 기록
+        self._frozen = {}       # key -> msg, 현재 틱의 스냅샷
+        self._frozen_seq = {}   # key -> seq, 현재 틱의 스냅샷 세대
+        self._new = set()       # 직전 스냅샷 이후 갱신된 key
+
+    def put(self, key, msg):
+        # key별 writer는 executor 스레드 하나뿐이므로 seq 증가에 lock이 필요 없음
+        seq = self._latest.get(key, (0, None))[0] + 1
+        self._latest[key] = (seq, msg)
+
+    def freeze(self):
+        latest = self._latest.copy()  # C 레벨 복사 → 기록 도중의 dict를 보지 않음
+        prev_seq = self._frozen_seq
+        self._frozen = {k: m for k, (_, m) in latest.items()}
+        self._frozen_seq = {k: s for k, (s, _) in latest.items()}
+        self._new = {k for k, s in self._frozen_seq.items() if prev_seq.get(k) != s}
+
+    def is_new(self, key):
+        return key in self._new
+
+    def seq(self, key):
+        """현재 스냅샷의 메시지 세대 (미수신이면 0)."""
+        return self._frozen_seq.get(key, 0)
+
+    def get(self, key, default=None):
+        return self._frozen.get(key, default)
+
+    def __getitem__(self, key):
+        return self._frozen[key]
+
+    def __setitem__(self, key, value):
+        # BT 스레드에서 직접 넣는 값(예: 더미 플래그)은 현재 스냅샷에도 즉시 반영
+        self.put(key, value)
+        self._frozen[key] = value
+        self._frozen_seq[key] = self._latest[key][0]
+
+    def __contains__(self, key):
+        return key in self._frozen
+
+    def __len__(self):
+        return len(self._frozen)
+
+    def __iter__(self):
+        return iter(self._frozen)
+
+
 class ROSBridge:
     """
     단일 ROS 노드와 executor를 관리하는 싱글톤.
@@ -27,6 +105,12 @@ class ROSBridge:
         self.executor = SingleThreadedExecutor()
         self.executor.add_node(self.node)
 
+        # 구독 캐시 목록: 매 틱 시작 시 freeze_caches()로 일괄 스냅샷
+        self._topic_caches = []
+
+        # (action_type, action_name) -> 공유 ActionClient
+        self._action_clients = {}
+
         # spin을 백그라운드에서 돌리는 스레드
         self._spin_thread = threading.Thread(target=self._spin, daemon=True)
         self._spin_thread.start()
@@ -48,8 +132,42 @@ class ROSBridge:
             cls._instance = ROSBridge(node_name=node_name, namespace=namespace)
         return cls._instance
 
+    def create_topic_cache(self):
+        """틱 단위로 고정되는 TopicCache를 생성하고 등록."""
+        cache = TopicCache()
+        self._topic_caches.append(cache)
+        return cache
+
+    def freeze_caches(self):
+        """모든 구독 캐시를 현재 틱 기준으로 고정. BT 틱 시작 시 한 번 호출."""
+        for cache in self._topic_caches:
+            cache.freeze()
+
+    def snapshot_clock(self):
+        """현재 시각의 TickClock 스냅샷. BT 틱 시작 시 한 번 호출."""
+        return TickClock(time.monotonic(), time.time(), self.node.get_clock().now())
+
+    def get_action_client(self, action_type, action_name):
+        """
+        (action_type, action_name)별로 하나의 ActionClient를 공유.
+        같은 액션 서버를 쓰는 BT 노드들이 discovery와 goal/status 구독을 중복 생성하지 않도록 한다.
+        노드별 goal handle / result future는 각 노드가 따로 관리한다.
+        """
+        key = (action_type, action_name)
+        client = self._action_clients.get(key)
+        if client is None:
+            client = ActionClient(self.node, action_type, action_name)
+            self._action_clients[key] = client
+        return client
+
     def shutdown(self):
         """Stop executor thread and shutdown rclpy cleanly."""
+        for client in self._action_clients.values():
+            try:
+                client.destroy()
+            except Exception:
+                pass
+        self._action_clients = {}
         try:
             self.executor.shutdown()
         except Exception:
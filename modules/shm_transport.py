@@ -0,0 +1,272 @@
+import mmap
+import os
+import struct
+
+from modules.utils import config
+
+# ---- local_comm shared-memory transport -----------------------------------
+# 같은 호스트에서 실행되는 agent끼리 robot_supervisor(ROS/DDS) 중계 없이 outbox를 주고받는 경로.
+# config `local_comm.transport: shm` 일 때 GatherLocalInfo가 사용한다 (기본값 ros).
+#
+# agent마다 <directory>/<agent_id>.ring 파일 하나를 mmap한다 (본인만 쓰고, 나머지는 읽기만 함).
+#   header : magic, layout 버전, slot 수, slot 크기, 최신 seq, pose(x, y) + pose seqlock, heartbeat(wall time)
+#   slots  : [seqlock, seq, length, payload...] x slots (ring buffer)
+# seqlock: writer는 쓰기 전에 lock을 홀수로, 쓰기 후 짝수로 올린다. reader는 앞뒤 lock 값이 같고 짝수일 때만 읽은 값을 쓴다.
+# comm radius 필터는 각 ring header의 pose(공유 pose table)로 계산한다 (robot_supervisor의 COMM_RADIUS와 동일한 역할).
+
+_MAGIC = b'PBTR'
+_LAYOUT_VERSION = 1
+_HEADER = struct.Struct('<4sIII')      # magic, layout version, slots, slot_bytes
+_HEADER_SIZE = 64
+_OFF_LATEST = 16                       # u64: 마지막으로 완성된 메시지 seq (0 = 아직 없음)
+_OFF_POSE_LOCK = 24                    # u64: pose seqlock
+_OFF_POSE = 32                         # f64 x, f64 y
+_OFF_HEARTBEAT = 48                    # f64: 마지막 publish/pose 갱신 wall time
+_SLOT_HEADER = struct.Struct('<QQI4x')  # seqlock, message seq, payload length
+_U64 = struct.Struct('<Q')
+_F64 = struct.Struct('<d')
+_POSE = struct.Struct('<dd')
+_READ_RETRIES = 4
+
+
+class ShmRingWriter:
+    """본인 agent의 ring 파일 (쓰기 전용).
+    임시 파일을 만든 뒤 os.replace로 교체한다: 이전 실행의 파일을 mmap 중인 reader가 잘린 파일을 읽지 않도록
+    (새 inode는 reader의 다음 rescan에서 다시 열린다)."""
+
+    def __init__(self, path, slots, slot_bytes):
+        self.path = path
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._stride = _SLOT_HEADER.size + slot_bytes
+        size = _HEADER_SIZE + slots * self._stride
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+            self.inode = os.fstat(fd).st_ino
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _LAYOUT_VERSION, slots, slot_bytes)
+        os.replace(tmp_path, path)
+        self.seq = 0
+
+    def publish(self, data, now):
+        """payload(bytes)를 다음 slot에 기록. slot 크기를 넘으면 False."""
+        if len(data) > self.slot_bytes:
+            return False
+        self.seq += 1
+        off = _HEADER_SIZE + (self.seq % self.slots) * self._stride
+        lock = _U64.unpack_from(self._mm, off)[0]
+        _U64.pack_into(self._mm, off, lock + 1)                          # 쓰기 시작 (홀수)
+        _SLOT_HEADER.pack_into(self._mm, off, lock + 1, self.seq, len(data))
+        start = off + _SLOT_HEADER.size
+        self._mm[start:start + len(data)] = data
+        _U64.pack_into(self._mm, off, lock + 2)                          # 쓰기 완료 (짝수)
+        _U64.pack_into(self._mm, _OFF_LATEST, self.seq)
+        _F64.pack_into(self._mm, _OFF_HEARTBEAT, now)
+        return True
+
+    def touch(self, now):
+        """새 메시지 없이 heartbeat만 갱신 (내용이 같은 outbox 재송신 대신)."""
+        _F64.pack_into(self._mm, _OFF_HEARTBEAT, now)
+
+    def set_pose(self, x, y, now):
+        lock = _U64.unpack_from(self._mm, _OFF_POSE_LOCK)[0]
+        _U64.pack_into(self._mm, _OFF_POSE_LOCK, lock + 1)
+        _POSE.pack_into(self._mm, _OFF_POSE, x, y)
+        _U64.pack_into(self._mm, _OFF_POSE_LOCK, lock + 2)
+        _F64.pack_into(self._mm, _OFF_HEARTBEAT, now)
+
+    def close(self):
+        """mmap 해제 후 ring 파일 삭제 (재시작한 같은 agent가 이미 새 파일로 교체했으면 그 파일은 남김).
+        이웃은 다음 rescan에서 이 agent의 reader를 닫는다."""
+        if self._mm.closed:
+            return
+        self._mm.close()
+        try:
+            if os.stat(self.path).st_ino == self.inode:
+                os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class ShmRingReader:
+    """다른 agent의 ring 파일 (읽기 전용)."""
+
+    def __init__(self, path):
+        self.path = path
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            self.inode = os.fstat(fd).st_ino
+            self._mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        magic, version, self.slots, self.slot_bytes = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _LAYOUT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}: not a local_comm ring (magic={magic!r}, version={version})")
+        self._stride = _SLOT_HEADER.size + self.slot_bytes
+
+    def heartbeat(self):
+        return _F64.unpack_from(self._mm, _OFF_HEARTBEAT)[0]
+
+    def read_pose(self):
+        for _ in range(_READ_RETRIES):
+            lock = _U64.unpack_from(self._mm, _OFF_POSE_LOCK)[0]
+            if lock & 1:
+                continue
+            x, y = _POSE.unpack_from(self._mm, _OFF_POSE)
+            if _U64.unpack_from(self._mm, _OFF_POSE_LOCK)[0] == lock:
+                return x, y
+        return None
+
+    def latest_seq(self):
+        return _U64.unpack_from(self._mm, _OFF_LATEST)[0]
+
+    def read_latest(self):
+        """(seq, payload bytes) 또는 None (메시지 없음 / writer가 계속 덮어써서 일관된 값을 못 읽음)."""
+        for _ in range(_READ_RETRIES):
+            seq = self.latest_seq()
+            if seq == 0:
+                return None
+            off = _HEADER_SIZE + (seq % self.slots) * self._stride
+            lock, slot_seq, length = _SLOT_HEADER.unpack_from(self._mm, off)
+            if lock & 1 or slot_seq != seq:
+                continue
+            start = off + _SLOT_HEADER.size
+            data = self._mm[start:start + length]
+            if _U64.unpack_from(self._mm, off)[0] == lock:
+                return seq, data
+        return None
+
+    def close(self):
+        self._mm.close()
+
+
+class ShmLocalComm:
+    """
+    공유 메모리 local_comm: GatherLocalInfo에서 ROS outbox publish / inbox 구독 대신 사용.
+      - publish(payload, now): 코덱(LocalCommChannel.pack) 결과 텍스트를 본인 ring에 기록.
+        slot에 안 들어가는 payload는 빈 payload(tombstone)로 대신 기록한다: 이웃이 직전 메시지를 최신으로 계속 읽지 않도록
+      - collect(position, now): 본인 pose를 공유하고, comm_radius 안의 살아있는 이웃 payload 목록과 변경 여부 반환
+        (최신 slot이 tombstone인 이웃은 메시지가 없는 것으로 보고 제외)
+      - close(): 종료 시 mmap과 본인 ring 파일 해제 (GatherLocalInfo.close)
+    """
+
+    def __init__(self, agent_id, directory, slots=4, slot_bytes=65536, comm_radius=30.0,
+                 stale_timeout=0.5, rescan_period=1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.agent_id = agent_id
+        self.directory = directory
+        self.comm_radius = comm_radius
+        self.stale_timeout = stale_timeout
+        self.rescan_period = rescan_period
+        self.writer = ShmRingWriter(os.path.join(directory, f"{agent_id}.ring"), slots, slot_bytes)
+
+        self._readers = {}         # agent_id → ShmRingReader
+        self._last_scan = None
+        self._payloads = {}        # agent_id → (seq, payload 텍스트): seq가 같으면 같은 문자열 객체 재사용
+        self._last_inbox = ()      # 직전 collect의 (agent_id, seq) 튜플
+        self._dropping = False       # slot보다 큰 payload 대신 tombstone을 기록한 상태 (로그는 이 상태에 들어갈 때 한 번만)
+        self._last_published = None  # 직전에 기록에 성공한 payload 객체 (LocalCommChannel은 내용이 같으면 같은 객체를 돌려줌)
+
+    @classmethod
+    def from_config(cls, agent_id):
+        shm_config = ((config or {}).get('local_comm') or {}).get('shm') or {}
+        return cls(agent_id,
+                   directory=shm_config.get('directory', '/dev/shm/py_bt_ros'),
+                   slots=shm_config.get('slots', 4),
+                   slot_bytes=shm_config.get('slot_bytes', 65536),
+                   comm_radius=shm_config.get('comm_radius', 30.0),
+                   stale_timeout=shm_config.get('stale_timeout', 0.5))
+
+    def publish(self, payload, now):
+        if payload is self._last_published:
+            self.writer.touch(now)  # 변경 없음: 새 slot을 쓰지 않아 수신 측도 다시 디코딩하지 않음
+            return
+        if self.writer.publish(payload.encode('utf-8'), now):
+            self._last_published = payload
+            self._dropping = False
+            return
+        self._last_published = None
+        if self._dropping:
+            self.writer.touch(now)  # tombstone이 이미 최신 slot
+            return
+        self.writer.publish(b'', now)  # tombstone: 이전 메시지를 최신으로 남겨 두지 않음
+        self._dropping = True
+        print(f"[local_comm] outbox message ({len(payload)} bytes) does not fit in a shm slot "
+              f"({self.writer.slot_bytes} bytes, local_comm.shm.slot_bytes); neighbors see no message until it fits.")
+
+    def collect(self, position, now):
+        self.writer.set_pose(position.x, position.y, now)
+        self._rescan(now)
+
+        inbox = []
+        payloads = []
+        radius_sq = self.comm_radius * self.comm_radius
+        for agent_id in sorted(self._readers):
+            reader = self._readers[agent_id]
+            if now - reader.heartbeat() > self.stale_timeout:
+                continue  # stale sender는 이웃에서 제외
+            pose = reader.read_pose()
+            if pose is None:
+                continue
+            dx, dy = pose[0] - position.x, pose[1] - position.y
+            if dx * dx + dy * dy > radius_sq:
+                continue
+
+            seq = reader.latest_seq()
+            cached = self._payloads.get(agent_id)
+            if cached is None or cached[0] != seq:
+                latest = reader.read_latest()
+                if latest is None:
+                    continue
+                cached = (latest[0], latest[1].decode('utf-8'))
+                self._payloads[agent_id] = cached
+            if not cached[1]:
+                continue  # tombstone: 송신자의 메시지가 slot에 안 들어감
+            inbox.append((agent_id, cached[0]))
+            payloads.append(cached[1])
+
+        inbox = tuple(inbox)
+        changed = inbox != self._last_inbox
+        self._last_inbox = inbox
+        return payloads, changed
+
+    def _rescan(self, now):
+        """디렉터리의 ring 파일 목록 갱신 (rescan_period 마다). 재시작한 agent(새 inode)는 다시 연다."""
+        if self._last_scan is not None and now - self._last_scan < self.rescan_period:
+            return
+        self._last_scan = now
+        found = set()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.ring'):
+                continue
+            agent_id = name[:-len('.ring')]
+            if agent_id == self.agent_id:
+                continue
+            path = os.path.join(self.directory, name)
+            found.add(agent_id)
+            reader = self._readers.get(agent_id)
+            try:
+                if reader is not None and os.stat(path).st_ino == reader.inode:
+                    continue
+                new_reader = ShmRingReader(path)
+            except (OSError, ValueError):
+                continue  # 생성 중이거나 다른 파일
+            if reader is not None:
+                reader.close()
+            self._readers[agent_id] = new_reader
+            self._payloads.pop(agent_id, None)
+        for agent_id in [a for a in self._readers if a not in found]:
+            self._readers.pop(agent_id).close()
+            self._payloads.pop(agent_id, None)
+
+    def close(self):
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+        self.writer.close()
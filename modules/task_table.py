@@ -0,0 +1,244 @@
+import numpy as np
+
+
+class TaskTable:
+    """
+    local_tasks_info의 열(column) 기반 numpy 뷰 (struct-of-arrays).
+      - ids, x, y, radius, amount: 행 순서가 같은 numpy 배열 (행 순서 = local_tasks_info의 삽입 순서)
+      - index: task_id → 행 번호
+      - tasks: 행 순서의 task 레코드 리스트
+      - source: 이 테이블을 만든 local_tasks_info dict (플러그인이 같은 task 집합인지 O(1)로 확인)
+    GatherLocalInfo가 local_tasks_info가 바뀔 때만 새로 만들어 blackboard['task_table']에 올린다.
+    플러그인은 전체 task에 대한 거리/utility를 한 번의 벡터 연산으로 계산할 수 있다.
+    """
+    __slots__ = ('tasks', 'ids', 'x', 'y', 'radius', 'amount', 'index', 'source', '_grids')
+
+    def __init__(self, tasks_info):
+        self.source = tasks_info
+        self._grids = {}
+        self.tasks = list(tasks_info.values())
+        n = len(self.tasks)
+        self.ids = np.array([t.task_id for t in self.tasks], dtype=object)
+        self.x = np.fromiter((t.x for t in self.tasks), dtype=float, count=n)
+        self.y = np.fromiter((t.y for t in self.tasks), dtype=float, count=n)
+        self.radius = np.fromiter((t.radius for t in self.tasks), dtype=float, count=n)
+        self.amount = np.fromiter((t.amount for t in self.tasks), dtype=float, count=n)
+        self.index = {t.task_id: i for i, t in enumerate(self.tasks)}
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def row(self, task_id):
+        """task_id의 행 번호 (없으면 None)."""
+        return self.index.get(task_id)
+
+    def distances_from(self, position):
+        """position(pygame.Vector2 또는 (x, y))에서 모든 task까지의 거리 배열.
+        pygame의 (a - b).length()와 같은 식 sqrt(dx*dx + dy*dy)로 계산해 스칼라 경로와 값이 같다."""
+        dx = position[0] - self.x
+        dy = position[1] - self.y
+        return np.sqrt(dx * dx + dy * dy)
+
+    def pairwise_distances(self):
+        """task 간 거리 행렬 (n x n)."""
+        dx = self.x[:, np.newaxis] - self.x[np.newaxis, :]
+        dy = self.y[:, np.newaxis] - self.y[np.newaxis, :]
+        return np.sqrt(dx * dx + dy * dy)
+
+    def grid_index(self, cell_size=0.0):
+        """이 테이블의 GridIndex (cell_size별로 처음 요청될 때 한 번만 만든다. 테이블은 task 집합이 바뀔 때만 새로 만들어지므로
+        인덱스도 그때만 다시 만들어진다)."""
+        grid = self._grids.get(cell_size)
+        if grid is None:
+            grid = self._grids[cell_size] = GridIndex(self, cell_size)
+        return grid
+
+
+class DistanceCache:
+    """
+    틱 단위 거리 캐시 (agent.distances). BT 노드와 MRTA 플러그인이 같은 거리 계산을 공유한다.
+      - agent_to_tasks(): 현재 위치 → task_table 모든 행까지의 거리 배열
+      - task_to_tasks():  task 간 거리 행렬
+      - to_task(task), between(task_a, task_b): 스칼라 조회 (Python float)
+    모두 처음 요청될 때 계산하고, ego pose(agent.position) 또는 blackboard['task_table']이 바뀌면 자동으로 무효화된다.
+    task_table에 없는 task(예: 이웃이 보낸 task, 사라진 task)는 pygame으로 직접 계산한다.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self._table = None
+        self._position = None
+        self._agent_to_tasks = None      # numpy 배열
+        self._agent_to_task_list = None  # 같은 값의 Python float 리스트 (스칼라 조회용)
+        self._task_to_tasks = None       # numpy 행렬
+        self._task_rows = {}             # 행 번호 → 그 task에서 모든 task까지의 거리 리스트 (between용, 필요한 행만)
+
+    def _sync(self):
+        table = self.agent.blackboard.get('task_table')
+        if table is not self._table:
+            self._table = table
+            self._position = None
+            self._task_to_tasks = None
+            self._task_rows = {}
+        position = self.agent.position
+        key = (position.x, position.y)
+        if key != self._position:
+            self._position = key
+            self._agent_to_tasks = None
+            self._agent_to_task_list = None
+        return table
+
+    def _row(self, table, task):
+        """task가 task_table의 레코드 그 자체일 때만 행 번호 반환 (같은 id의 다른/오래된 객체는 직접 계산)."""
+        if table is None:
+            return None
+        row = table.index.get(task.task_id)
+        if row is None or table.tasks[row] is not task:
+            return None
+        return row
+
+    def agent_to_tasks(self):
+        table = self._sync()
+        if table is None:
+            return None
+        if self._agent_to_tasks is None:
+            self._agent_to_tasks = table.distances_from(self.agent.position)
+        return self._agent_to_tasks
+
+    def task_to_tasks(self):
+        table = self._sync()
+        if table is None:
+            return None
+        if self._task_to_tasks is None:
+            self._task_to_tasks = table.pairwise_distances()
+        return self._task_to_tasks
+
+    def to_task(self, task):
+        """현재 위치에서 task까지의 거리."""
+        table = self._sync()
+        row = self._row(table, task)
+        if row is None:
+            return (self.agent.position - task.position).length()
+        if self._agent_to_task_list is None:
+            if self._agent_to_tasks is None:
+                self._agent_to_tasks = table.distances_from(self.agent.position)
+            self._agent_to_task_list = self._agent_to_tasks.tolist()
+        return self._agent_to_task_list[row]
+
+    def between(self, task_a, task_b):
+        """두 task 사이의 거리 (대칭이므로 이미 계산된 행이 있으면 그 행을 재사용)."""
+        table = self._sync()
+        row_a = self._row(table, task_a)
+        row_b = self._row(table, task_b)
+        if row_a is None or row_b is None:
+            return task_a.position.distance_to(task_b.position)
+        rows = self._task_rows
+        if row_a in rows:
+            return rows[row_a][row_b]
+        if row_b not in rows:
+            if self._task_to_tasks is not None:
+                rows[row_b] = self._task_to_tasks[row_b].tolist()
+            else:
+                rows[row_b] = table.distances_from((table.x[row_b], table.y[row_b])).tolist()
+        return rows[row_b][row_a]
+
+
+class GridIndex:
+    """
+    TaskTable 행들의 균일 격자 해시 (cell → 행 번호 배열). 최근접 task 질의가 전체 task가 아니라 주변 셀만 본다.
+      - cell_size: 셀 한 변의 길이. 0이면 task 분포 범위에서 셀당 평균 2개 정도가 되도록 정한다.
+      - nearest(position, excluded): excluded(행 번호 집합)를 뺀 가장 가까운 task의 (행 번호, 거리). 없으면 (None, inf).
+    거리는 TaskTable.distances_from과 같은 식으로 계산하므로 값이 같고, 거리가 같으면 행 번호가 작은 task를 고른다
+    (전체 배열에서 첫 번째 최솟값을 고르는 것과 같은 결과).
+    """
+
+    def __init__(self, table, cell_size=0.0):
+        self.table = table
+        n = len(table)
+        if n and not cell_size:
+            extent = max(float(table.x.max() - table.x.min()), float(table.y.max() - table.y.min()), 1e-9)
+            cell_size = extent / max(1.0, np.sqrt(n / 2.0))
+        self.cell_size = float(cell_size) if cell_size else 1.0
+        self.cells = {}
+        if n == 0:
+            self._min_cell = self._max_cell = (0, 0)
+            return
+        cx = np.floor(table.x / self.cell_size).astype(np.int64)
+        cy = np.floor(table.y / self.cell_size).astype(np.int64)
+        order = np.lexsort((np.arange(n), cy, cx))  # 셀 순서, 셀 안에서는 행 번호 순
+        keys = np.stack([cx[order], cy[order]], axis=1)
+        starts = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        for rows in np.split(order, starts):
+            self.cells[(int(cx[rows[0]]), int(cy[rows[0]]))] = rows
+        self._min_cell = (int(cx.min()), int(cy.min()))
+        self._max_cell = (int(cx.max()), int(cy.max()))
+
+    def _ring(self, center, r):
+        """center에서 Chebyshev 거리가 정확히 r인 셀 중 task가 있는 범위 안의 셀들의 행 번호 배열 목록."""
+        ci, cj = center
+        (min_i, min_j), (max_i, max_j) = self._min_cell, self._max_cell
+        cells = self.cells
+        found = []
+        i_range = range(max(ci - r, min_i), min(ci + r, max_i) + 1)
+        for j in {cj - r, cj + r}:
+            if min_j <= j <= max_j:
+                for i in i_range:
+                    rows = cells.get((i, j))
+                    if rows is not None:
+                        found.append(rows)
+        for i in {ci - r, ci + r}:
+            if min_i <= i <= max_i and r > 0:
+                for j in range(max(cj - r + 1, min_j), min(cj + r - 1, max_j) + 1):
+                    rows = cells.get((i, j))
+                    if rows is not None:
+                        found.append(rows)
+        return found
+
+    def _scan(self, px, py, excluded):
+        """전체 행 탐색 (링이 셀 수보다 커졌을 때)."""
+        table = self.table
+        dx = px - table.x
+        dy = py - table.y
+        distances = np.sqrt(dx * dx + dy * dy)
+        if excluded:
+            distances[list(excluded)] = np.inf
+        row = int(np.argmin(distances))
+        if distances[row] == np.inf:
+            return None, float('inf')
+        return row, float(distances[row])
+
+    def nearest(self, position, excluded=()):
+        table = self.table
+        if len(table) == 0:
+            return None, float('inf')
+        px, py = position[0], position[1]
+        ci, cj = int(np.floor(px / self.cell_size)), int(np.floor(py / self.cell_size))
+        (min_i, min_j), (max_i, max_j) = self._min_cell, self._max_cell
+        first_ring = max(min_i - ci, ci - max_i, min_j - cj, cj - max_j, 0)  # task가 있는 범위에 처음 닿는 링
+        last_ring = max(ci - min_i, max_i - ci, cj - min_j, max_j - cj)      # 이 링 밖에는 셀이 없음
+        best_row, best_distance = None, float('inf')
+        for r in range(first_ring, last_ring + 1):
+            # 링 r 이후의 셀은 position에서 최소 (r - 1) * cell_size 떨어져 있다
+            if best_row is not None and best_distance < (r - 1) * self.cell_size:
+                break
+            if r > first_ring and 8 * r > len(self.cells):
+                return self._scan(px, py, excluded)
+            found = self._ring((ci, cj), r)
+            if not found:
+                continue
+            rows = np.concatenate(found) if len(found) > 1 else found[0]
+            if excluded:
+                rows = rows[[row not in excluded for row in rows.tolist()]]
+                if len(rows) == 0:
+                    continue
+            dx = px - table.x[rows]
+            dy = py - table.y[rows]
+            distances = np.sqrt(dx * dx + dy * dy)
+            k = int(np.argmin(distances))
+            distance = float(distances[k])
+            # 같은 거리면 행 번호가 작은 쪽
+            ties = rows[distances == distance]
+            row = int(ties.min()) if len(ties) > 1 else int(rows[k])
+            if distance < best_distance or (distance == best_distance and row < best_row):
+                best_row, best_distance = row, distance
+        return best_row, best_distance
@@ -1,8 +1,16 @@
 import yaml
 import os
+import json
+import base64
+import numbers
+import struct
 import xml.etree.ElementTree as ET
 import importlib
 import pygame
+try:
+    import msgpack  # 선택 의존성: local_comm binary 코덱
+except ImportError:
+    msgpack = None
 
 def load_config(config_file):
     with open(config_file, 'r', encoding="utf-8") as f:
@@ -65,13 +73,136 @@ class AttrDict(dict):
             raise AttributeError(key)
 
 
+class Record:
+    """__slots__ 기반 레코드 베이스 (task/이웃 상태 등 hot path 객체용).
+    속성 접근은 일반 slot 접근이라 AttrDict의 __getattr__ → __getitem__ 우회 비용이 없다.
+    레거시 코드를 위해 dict 스타일 접근(rec['x'], rec.get('x'), 'x' in rec, keys/items, dict(rec))도 지원한다.
+    _fields에 없는 키는 _extra dict에 보관한다.
+
+    하위 클래스는 _fields(= __slots__), 직렬화 태그 _tag를 정의하고 RECORD_TYPES에 등록한다."""
+    __slots__ = ('_extra',)
+    _fields = ()
+    _tag = None
+
+    def __init__(self, **extra):
+        self._extra = extra
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def to_dict(self):
+        d = {key: getattr(self, key) for key in self._fields}
+        d.update(self._extra)
+        return d
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            self._extra[key] = value
+
+    def get(self, key, default=None):
+        if key in self._fields:
+            return getattr(self, key)
+        return self._extra.get(key, default)
+
+    def __getattr__(self, key):
+        # slot에 없는 속성만 여기로 온다: _extra 키를 속성으로도 접근 가능하게
+        if key == '_extra':
+            raise AttributeError(key)  # 초기화 전(unpickle 등) 재귀 방지
+        try:
+            return self._extra[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __contains__(self, key):
+        return key in self._fields or key in self._extra
+
+    def keys(self):
+        return list(self._fields) + list(self._extra)
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._fields) + len(self._extra)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # dict와 동일하게 unhashable (값 비교 객체)
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+
+class TaskRecord(Record):
+    """Task(fire) 레코드. GatherLocalInfo가 world/fire/list 항목으로 만든다.
+    position은 (x, y)의 pygame.Vector2, amount는 기본적으로 radius."""
+    _fields = ('task_id', 'x', 'y', 'z', 'radius', 'position', 'amount', 'completed')
+    __slots__ = _fields
+    _tag = 'task'
+
+    def __init__(self, task_id, x, y, z=0.0, radius=0.0, position=None, amount=None, completed=False, **extra):
+        self.task_id = task_id
+        self.x = x
+        self.y = y
+        self.z = z
+        self.radius = radius
+        self.position = position if position is not None else pygame.math.Vector2(x, y)
+        self.amount = amount if amount is not None else radius
+        self.completed = completed
+        self._extra = extra
+
+
+class NeighborState(Record):
+    """이웃 agent 상태 레코드 (agent_id, position). 예: Hungarian의 agents_info."""
+    _fields = ('agent_id', 'position')
+    __slots__ = _fields
+    _tag = 'agent'
+
+    def __init__(self, agent_id, position=None, **extra):
+        self.agent_id = agent_id
+        self.position = position
+        self._extra = extra
+
+
+RECORD_TYPES = {cls._tag: cls for cls in (TaskRecord, NeighborState)}
+
+
 def msg_serialize_default(obj):
     """json.dumps의 default 함수.
-    pygame.Vector2, set, 일반 Python 객체(task/agent 등)를 JSON으로 직렬화."""
+    pygame.Vector2, set, Record(TaskRecord 등), 일반 Python 객체(task/agent 등)를 JSON으로 직렬화."""
     if isinstance(obj, set):
         return list(obj)
     if isinstance(obj, pygame.math.Vector2):
         return {'__v2__': True, 'x': obj.x, 'y': obj.y}
+    if isinstance(obj, Record):
+        d = obj.to_dict()
+        d['__rec__'] = obj._tag
+        return d
     if hasattr(obj, '__dict__'):
         return obj.__dict__
     raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -79,12 +210,178 @@ def msg_serialize_default(obj):
 
 def msg_deserialize_hook(d):
     """json.loads의 object_hook.
-    __v2__ 마커가 있으면 pygame.math.Vector2로 복원, 나머지는 AttrDict로 변환."""
+    __v2__ 마커가 있으면 pygame.math.Vector2로, __rec__ 마커가 있으면 해당 Record로 복원, 나머지는 AttrDict로 변환.
+    모르는 Record 태그(새 버전 이웃이 보낸 레코드)는 AttrDict로 받는다."""
     if '__v2__' in d:
         return pygame.math.Vector2(d['x'], d['y'])
+    if '__rec__' in d:
+        record_type = RECORD_TYPES.get(d.pop('__rec__'))
+        return record_type.from_dict(d) if record_type is not None else AttrDict(d)
     return AttrDict(d)
 
 
+# ---- local_comm message codecs -------------------------------------------
+# outbox/inbox 메시지 인코딩 방식. config의 `local_comm.codec`으로 선택한다.
+# 모든 코덱은 std_msgs/String에 실리는 텍스트를 만들고, 수신 측은 접두사로 코덱을 판별한다 (decode_message).
+
+class JSONMessageCodec:
+    """기존 방식: json.dumps(default=msg_serialize_default) / json.loads(object_hook=msg_deserialize_hook).
+    set은 list로 바뀌어 도착한다."""
+    name = 'json'
+    prefix = ''
+    available = True
+
+    def encode(self, message):
+        return json.dumps(message, default=msg_serialize_default)
+
+    def decode(self, data):
+        return json.loads(data, object_hook=msg_deserialize_hook)
+
+    def append_item(self, payload, key, value):
+        """encode(message)의 결과에 항목 하나를 덧붙인 payload (message를 다시 인코딩하지 않음).
+        message가 비어 있지 않은 dict일 때 encode({**message, key: value})와 같은 텍스트."""
+        return f"{payload[:-1]}, {json.dumps(key)}: {json.dumps(value, default=msg_serialize_default)}}}"
+
+
+# BinaryMessageCodec ext 타입 코드 (msgpack ExtType)
+_EXT_VECTOR2 = 1   # pygame.Vector2: '<dd' (x, y)
+_EXT_RECORD = 2    # Record: msgpack [tag, fields]
+_VECTOR2 = struct.Struct('<dd')
+_MAP16 = struct.Struct('>H')  # msgpack map 16/32 헤더의 항목 수 (big-endian)
+_MAP32 = struct.Struct('>I')
+
+
+def _pack_default(obj):
+    """BinaryMessageCodec 송신: msgpack이 직접 처리하지 못하는 객체 변환 (dict/list/tuple/str/int/float/bool/None은 C에서 처리)."""
+    if isinstance(obj, pygame.math.Vector2):
+        return msgpack.ExtType(_EXT_VECTOR2, _VECTOR2.pack(obj.x, obj.y))
+    if isinstance(obj, Record):
+        return msgpack.ExtType(_EXT_RECORD, msgpack.packb([obj._tag, obj.to_dict()], default=_pack_default))
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)  # JSON 코덱과 같이 list로 도착
+    if isinstance(obj, numbers.Integral):
+        return int(obj)    # numpy int64 등
+    if isinstance(obj, numbers.Real):
+        return float(obj)  # numpy float32 등
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable by BinaryMessageCodec")
+
+
+def _unpack_ext(code, data):
+    """BinaryMessageCodec 수신: ext 타입 복원. 모르는 코드/형식은 ValueError, 모르는 Record 태그는 AttrDict."""
+    if code == _EXT_VECTOR2:
+        if len(data) != _VECTOR2.size:
+            raise ValueError(f"Vector2 ext must be {_VECTOR2.size} bytes, got {len(data)}")
+        return pygame.math.Vector2(*_VECTOR2.unpack(data))
+    if code == _EXT_RECORD:
+        record = msgpack.unpackb(data, ext_hook=_unpack_ext, strict_map_key=False)
+        if not (isinstance(record, list) and len(record) == 2 and isinstance(record[1], dict)):
+            raise ValueError("Record ext must be [tag, fields]")
+        tag, fields = record
+        record_type = RECORD_TYPES.get(tag)
+        return record_type.from_dict(fields) if record_type is not None else AttrDict(fields)
+    raise ValueError(f"Unknown BinaryMessageCodec ext type {code}")
+
+
+class BinaryMessageCodec:
+    """msgpack 바이너리 포맷 (C 구현, 선택 의존성: pip install msgpack).
+    값마다 타입 태그가 붙는 포맷이라 수신 측은 데이터만 복원하고 객체/코드를 만들지 않는다.
+    pygame.Vector2와 Record는 ext 타입으로 같은 타입으로 도착하고, 모든 dict는 JSON 코덱처럼 AttrDict,
+    set/tuple은 list, __dict__ 객체는 AttrDict로 도착한다. dict의 int 키는 int로 유지된다.
+    String 토픽으로 보내기 위해 base64 텍스트(C 구현)로 감싸고 'B:' 접두사를 붙인다
+    (base64 문자 집합에는 '"'와 '\\'가 없어 inbox JSON 배열 안에 이스케이프 없이 들어간다)."""
+    name = 'binary'
+    prefix = 'B:'
+    available = msgpack is not None
+
+    def encode(self, message):
+        return self.prefix + base64.b64encode(self.dumps(message)).decode('ascii')
+
+    def decode(self, data):
+        return self.loads(base64.b64decode(data[len(self.prefix):]))  # 잘못된 base64는 binascii.Error (ValueError)
+
+    def append_item(self, payload, key, value):
+        """encode(message)의 결과에 항목 하나를 덧붙인 payload (message를 다시 인코딩하지 않음).
+        map 헤더의 항목 수를 고쳐 쓰고 끝에 key/value를 붙이므로 encode({**message, key: value})와 같은 텍스트.
+        base64는 3바이트 단위라 헤더 크기가 그대로면 첫 4문자와 마지막 4문자만 다시 인코딩한다."""
+        text = payload[len(self.prefix):]
+        extra = self.dumps(key) + self.dumps(value)
+        head = base64.b64decode(text[:4])
+        if 0x80 <= head[0] < 0x8F:  # fixmap, 항목 하나를 더해도 fixmap
+            tail_size = (3 - text.count('=', -2)) % 3  # 마지막 4문자 그룹이 담은 바이트 수 (3이면 0: 완전한 그룹)
+            if len(text) >= (8 if tail_size else 4):
+                head = base64.b64encode(bytes((head[0] + 1,)) + head[1:]).decode('ascii')
+                if tail_size:
+                    middle, extra = text[4:-4], base64.b64decode(text[-4:]) + extra
+                else:
+                    middle = text[4:]
+                return self.prefix + head + middle + base64.b64encode(extra).decode('ascii')
+
+        # map 헤더 크기가 바뀌는 경우 (fixmap 15 → map 16 등) 또는 짧은 payload: 전체를 다시 조립
+        raw = base64.b64decode(text)
+        if 0x80 <= raw[0] <= 0x8F:    # fixmap
+            count, body = raw[0] & 0x0F, raw[1:]
+        elif raw[0] == 0xDE:          # map 16
+            count, body = _MAP16.unpack_from(raw, 1)[0], raw[3:]
+        elif raw[0] == 0xDF:          # map 32
+            count, body = _MAP32.unpack_from(raw, 1)[0], raw[5:]
+        else:
+            raise ValueError("append_item needs an encoded dict")
+        count += 1
+        if count < 16:
+            header = bytes((0x80 | count,))
+        elif count < 0x10000:
+            header = b'\xde' + _MAP16.pack(count)
+        else:
+            header = b'\xdf' + _MAP32.pack(count)
+        return self.prefix + base64.b64encode(header + body + extra).decode('ascii')
+
+    @staticmethod
+    def dumps(message):
+        return msgpack.packb(message, default=_pack_default)
+
+    @staticmethod
+    def loads(raw):
+        """dumps의 역. 잘못된 payload는 ValueError."""
+        try:
+            return msgpack.unpackb(raw, object_hook=AttrDict, ext_hook=_unpack_ext, strict_map_key=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as e:  # TypeError: unhashable map key 등
+            raise ValueError(f"Malformed BinaryMessageCodec payload: {e}") from e
+
+
+MESSAGE_CODECS = {
+    JSONMessageCodec.name: JSONMessageCodec(),
+    BinaryMessageCodec.name: BinaryMessageCodec(),
+}
+
+
+def get_message_codec(name=None):
+    """이름(None이면 config의 local_comm.codec, 기본 'json')으로 송신용 코덱 반환."""
+    if name is None:
+        name = ((config or {}).get('local_comm') or {}).get('codec', 'json')
+    try:
+        codec = MESSAGE_CODECS[name]
+    except KeyError:
+        raise ValueError(f"[ERROR] Unknown local_comm codec '{name}'. Options: {', '.join(MESSAGE_CODECS)}")
+    if not codec.available:
+        raise ValueError(f"[ERROR] local_comm codec '{name}' needs the msgpack package (pip install msgpack)")
+    return codec
+
+
+def decode_message(data, accepted=None):
+    """수신한 payload 텍스트를 접두사로 코덱을 판별해 디코딩.
+    accepted: 받아들일 코덱 이름 집합 (None이면 전부). 그 밖의 코덱 payload는 ValueError."""
+    codec = MESSAGE_CODECS[JSONMessageCodec.name]
+    for candidate in MESSAGE_CODECS.values():
+        if candidate.prefix and data.startswith(candidate.prefix):
+            codec = candidate
+            break
+    if accepted is not None and codec.name not in accepted:
+        raise ValueError(f"'{codec.name}' codec payload is not accepted (local_comm.codec)")
+    return codec.decode(data)
+
+
 def optional_import(name):
     if not name:
         return None
@@ -1,5 +1,20 @@
+from itertools import repeat
+import numpy as np
 from modules.utils import config, merge_dicts
-# MY_PARAMETER = config['decision_making']['my_decision_making_plugin']['my_parameter']
+from modules.message_schema import MessageSchema, Field
+
+# Configuration (the CBAA section is optional)
+CBAA_CONFIG = config['decision_making'].get('CBAA') or {}
+LAMBDA = CBAA_CONFIG.get('task_reward_discount_factor', 0.999) # Reward discount per second of travel
+AGENT_SPEED = CBAA_CONFIG.get('agent_speed', 0.5) # Speed used for the time-discounted reward
+VECTORIZED = CBAA_CONFIG.get('vectorized', True) # Bid over numpy arrays aligned to blackboard['task_table'] and merge winning bids with one fmax
+
+# Message shared with neighbors
+CBAA_MESSAGE = MessageSchema('CBAAMessage', [
+    Field('agent_id'),
+    Field('assigned_task_id'),
+    Field('winning_bids', factory=dict),
+])
 
 # Define decision-making class
 class CBAA:
@@ -11,6 +26,8 @@ class CBAA:
         # Define any variables if necessary
         self.x = {} # task assignment (key: task id; value: 0 or 1)
         self.y = {} # winning bid list (key: task id; value: bid value)
+        self._rewards = None # calculate_score per task_table row (vectorized bidding)
+        self._rewards_key = None # distances array the rewards were computed from
 
 
     def decide(self, blackboard):
@@ -43,33 +60,28 @@ class CBAA:
         if not self.satisfied:
             # Implement your idea (local decision-making)
 
-            # Line 5
-            selectable_tasks = {}
-            task_rewards = {}
-            candidates = list(local_tasks_info.values())
-            for task in candidates:
-                task_reward = self.calculate_score(task)
-                if task.task_id not in self.y or task_reward > self.y[task.task_id]:
-                    selectable_tasks[task.task_id] = task
-                    task_rewards[task.task_id] = task_reward
-
-                
+            # Line 5-7
+            selection = self.select_task_vectorized(blackboard) if VECTORIZED else None
+            if selection is None:
+                selection = self.select_task(local_tasks_info)
+            best_task, best_reward = selection
+
             # Line 6-10
-            if selectable_tasks:
-                best_task_id = max(task_rewards, key=task_rewards.get) # Line 7
+            if best_task is not None:
+                best_task_id = best_task.task_id
                 self.x[best_task_id] = 1 # Line 8
-                self.y[best_task_id] = task_rewards[best_task_id] # Line 9
+                self.y[best_task_id] = best_reward # Line 9
 
-                self.assigned_task = selectable_tasks[best_task_id]
+                self.assigned_task = best_task
 
 
                 # Broadcasting
-                self.agent.message_to_share = {
+                self.agent.message_to_share = CBAA_MESSAGE.encode(
                     # Implement your idea (data to share)
-                    'agent_id': self.agent.agent_id,
-                    'assigned_task_id': self.assigned_task.task_id if self.assigned_task is not None else None,                
-                    'winning_bids': self.y
-                }
+                    agent_id=self.agent.agent_id,
+                    assigned_task_id=self.assigned_task.task_id if self.assigned_task is not None else None,
+                    winning_bids=self.y,
+                )
                 self.satisfied = True
 
             else:
@@ -83,13 +95,17 @@ class CBAA:
 
             # Line 4~5
             winner_agent_candidates = {self.agent.agent_id: self.y[best_task_id]} # Initialization with myself            
-            for other_agent_message in self.agent.messages_received:
-                if other_agent_message:
-                    y_k = other_agent_message.get('winning_bids')
-                    self.y = merge_dicts(self.y, y_k) # Line 4: Winning Bid Update
-                    if y_k.get(best_task_id): 
-                         k_agent_id = other_agent_message.get('agent_id')
-                         winner_agent_candidates[k_agent_id] = y_k[best_task_id]
+            other_agent_messages = CBAA_MESSAGE.decode_all([m for m in self.agent.messages_received if m])
+            for other_agent_message in other_agent_messages:
+                y_k = other_agent_message.winning_bids
+                if y_k.get(best_task_id): 
+                     winner_agent_candidates[other_agent_message.agent_id] = y_k[best_task_id]
+            # Line 4: Winning Bid Update
+            if VECTORIZED:
+                self.y = merge_winning_bids(self.y, [m.winning_bids for m in other_agent_messages])
+            else:
+                for other_agent_message in other_agent_messages:
+                    self.y = merge_dicts(self.y, other_agent_message.winning_bids)
             
             winner_agent_id = max(winner_agent_candidates, key=winner_agent_candidates.get)
 
@@ -106,12 +122,50 @@ class CBAA:
             return self.assigned_task.task_id if self.assigned_task is not None else None
 
 
+    def select_task(self, local_tasks_info):
+        '''Line 5-7: the best task whose reward beats the known winning bid, as (task, reward), or (None, None).'''
+        selectable_tasks = {}
+        task_rewards = {}
+        for task in local_tasks_info.values():
+            task_reward = self.calculate_score(task)
+            if task.task_id not in self.y or task_reward > self.y[task.task_id]:
+                selectable_tasks[task.task_id] = task
+                task_rewards[task.task_id] = task_reward
+        if not selectable_tasks:
+            return None, None
+        best_task_id = max(task_rewards, key=task_rewards.get) # Line 7
+        return selectable_tasks[best_task_id], task_rewards[best_task_id]
+
+    def select_task_vectorized(self, blackboard):
+        '''
+        select_task over the rows of blackboard['task_table']: rewards and known winning bids as arrays aligned
+        to the table, first maximum in row order (= local_tasks_info order), so the choice and reward are the same.
+        Returns None when the table does not hold local_tasks_info, so the caller falls back.
+        '''
+        table = blackboard.get('task_table')
+        if table is None or table.source is not blackboard.get('local_tasks_info') or len(table) == 0:
+            return None
+        rewards = self.task_rewards(table)
+        known_bids = np.fromiter(map(self.y.get, table.ids.tolist(), repeat(-np.inf)), dtype=float, count=len(table))
+        selectable = np.flatnonzero(rewards > known_bids)
+        if len(selectable) == 0:
+            return None, None
+        best_row = selectable[np.argmax(rewards[selectable])]
+        return table.tasks[best_row], float(rewards[best_row])
+
+    def task_rewards(self, table):
+        '''calculate_score for every task_table row (cached while the distances array is the same).'''
+        distances = self.agent.distances.agent_to_tasks()
+        if self._rewards_key is not distances:
+            exponents = (distances - table.radius) / AGENT_SPEED
+            # Per-element float pow: numpy's SIMD power can differ from Python's ** in the last bit
+            self._rewards = np.fromiter(map(float(LAMBDA).__pow__, exponents.tolist()), dtype=float, count=len(table))
+            self._rewards_key = distances
+        return self._rewards
+
     def calculate_score(self, task):
-        distance_to_task = (self.agent.position - task.position).length() - task.radius
+        distance_to_task = self.agent.distances.to_task(task) - task.radius
         # Time-discounted reward
-        LAMBDA = 0.999
-        AGENT_SPEED = 0.5
-        AGENT_WORK_RATE = 0.2
         expected_reward = LAMBDA**(distance_to_task/AGENT_SPEED)          
         return expected_reward
     
@@ -122,4 +176,26 @@ class CBAA:
             if key not in other_dict or value > other_dict[key]:
                 my_dict_updated[key] = value
         
-        return my_dict_updated    
\ No newline at end of file
+        return my_dict_updated    
+
+
+def merge_winning_bids(y, neighbor_bids):
+    '''
+    merge_dicts(y, y_k) applied for every y_k in neighbor_bids, in one pass: the bids go into a
+    (1 + neighbors) x tasks matrix (NaN where a dict has no entry for the task) reduced with fmax over axis 0.
+    Keys keep merge_dicts' order (y's keys, then new ones in order of first appearance).
+    '''
+    neighbor_bids = [y_k for y_k in neighbor_bids if y_k]
+    if not neighbor_bids:
+        return y
+    columns = dict(zip(y, range(len(y))))
+    for y_k in neighbor_bids:
+        if not y_k.keys() <= columns.keys():
+            for task_id in y_k:
+                columns.setdefault(task_id, len(columns))
+    bids = np.full((len(neighbor_bids) + 1, len(columns)), np.nan)
+    bids[0, :len(y)] = np.fromiter(y.values(), dtype=float, count=len(y))
+    for row, y_k in enumerate(neighbor_bids, start=1):
+        cols = np.fromiter(map(columns.__getitem__, y_k), dtype=np.intp, count=len(y_k))
+        bids[row, cols] = np.fromiter(y_k.values(), dtype=float, count=len(y_k))
+    return dict(zip(columns, np.fmax.reduce(bids, axis=0).tolist()))
@@ -3,15 +3,29 @@ import pygame
 from modules.utils import config
 from enum import Enum
 import numpy as np
-import copy
-import time
-from modules.utils import merge_dicts
+from modules.message_schema import MessageSchema, Field
+from plugins.mrta.cbba.insertion import InsertionScorer
+from plugins.mrta.cbba.consensus import ConsensusTable
+from plugins.mrta.cbba.cow_dict import CowDict
 
 KEEP_MOVING_DURING_CONVERGENCE = config['decision_making']['CBBA'].get('execute_movements_during_convergence', False)
 MAX_TASKS_PER_AGENT = config['decision_making']['CBBA']['max_tasks_per_agent']
 LAMBDA = config['decision_making']['CBBA']['task_reward_discount_factor']
 WINNING_BID_CANCEL = config['decision_making']['CBBA']['winning_bid_cancel']
 NO_BUNDLE_DURATION = config['decision_making']['CBBA']['acceptable_empty_bundle_duration']
+INCREMENTAL_BUNDLE = config['decision_making']['CBBA'].get('incremental_bundle', True) # O(1) insertion scores over blackboard['task_table']
+CONSENSUS_RULE_TABLE = config['decision_making']['CBBA'].get('consensus_rule_table', True) # Vectorized Table I lookup instead of the rule ladder
+CONSENSUS_TABLE_MIN_PAIRS = config['decision_making']['CBBA'].get('consensus_table_min_pairs', 2500) # Smaller (task, neighbor) batches use the rule ladder
+AGENT_SPEED = 0.5 # Speed used for the time-discounted reward
+
+# Message shared with neighbors (z/y/s are sent as copy-on-write snapshots: later updates copy the table first)
+CBBA_MESSAGE = MessageSchema('CBBAMessage', [
+    Field('agent_id'),
+    Field('assigned_task_id'),
+    Field('winning_agents', factory=dict, encode=CowDict.snapshot),
+    Field('winning_bids', factory=dict, encode=CowDict.snapshot),
+    Field('message_received_time_stamp', factory=dict, encode=CowDict.snapshot),
+])
 
 class Phase(Enum):
     BUILD_BUNDLE = 1
@@ -21,23 +35,29 @@ class CBBA:
     def __init__(self, agent):
         self.agent = agent        
 
-        self.z = {} # Winning agent list (key: task_id; value: agent_id)
-        self.y = {} # Winning bid list (key: task_id; value: bid value)
-        self.s = {} # Time stamp list (key: agent_id; value: time stamp)
+        self.z = CowDict() # Winning agent list (key: task_id; value: agent_id)
+        self.y = CowDict() # Winning bid list (key: task_id; value: bid value)
+        self.s = CowDict() # Time stamp list (key: agent_id; value: time stamp)
         self.bundle = [] # Bundle (a list of task id)      
         self.path = [] # Path (a list of task object) 
 
-        self.agent.message_to_share = { # Message Initialization
-            'agent_id': self.agent.agent_id,
-            'assigned_task_id': None,
-            'winning_agents': self.z, 
-            'winning_bids': self.y,
-            'message_received_time_stamp': self.s
-            } 
+        self.agent.message_to_share = CBBA_MESSAGE.encode( # Message Initialization
+            agent_id=self.agent.agent_id,
+            winning_agents=self.z,
+            winning_bids=self.y,
+            message_received_time_stamp=self.s,
+            )
         
         
         self.assigned_task = None
         self.no_bundle_duration = 0
+        self.insertion_scorer = InsertionScorer(LAMBDA, AGENT_SPEED)
+        self.consensus_table = ConsensusTable()
+
+        # Neighbor message cache: only messages whose sender version changed are re-parsed
+        self._parsed_messages = {}  # neighbor agent_id -> decoded CBBA_MESSAGE
+        self._pending_time_stamps = {}  # neighbor agent_id -> s_k not yet merged into self.s (Eqn 5, two-hop part)
+        self._time_stamp_reset = False  # self.s was neutralized: re-merge every current neighbor
         
         # self.planned_tasks = [] # For visualisation
 
@@ -53,6 +73,9 @@ class CBBA:
 
         local_tasks_info = blackboard['local_tasks_info']
 
+        # Refresh the neighbor message cache every tick (before any early return) so no update is missed
+        self._refresh_parsed_messages()
+
         # Check if the existing task is done or not available anymore (e.g., completed by others, disappeared due to dynamic environment, etc.)            
         self.assigned_task = local_tasks_info.get(previous_assigned_task_id)        
         if self.assigned_task is None and previous_assigned_task_id is not None: 
@@ -71,140 +94,29 @@ class CBBA:
 
             if self.no_bundle_duration > NO_BUNDLE_DURATION:
                 # Neutralize
-                self.z = {} 
-                self.y = {} 
-                self.s = {}                  
+                self.z = CowDict()
+                self.y = CowDict()
+                self.s = CowDict()
                 self.no_bundle_duration = 0         
+                self._time_stamp_reset = True
 
         if True:  # Phase.ASSIGNMENT_CONSENSUS
             # self.update_time_stamp() # NOTE: Moved after conflict resolution. s_i must reflect prior knowledge during Table I comparisons (s_km > s_im), otherwise merging s_k beforehand makes the comparison always false.
             candidates = list(local_tasks_info.values()) if isinstance(local_tasks_info, dict) else local_tasks_info            
             
-            # Parse all neighbor messages once before the consensus loop (message caching)
-            parsed_messages = []
-            for other_agent_message in self.agent.messages_received:
-                k_agent_id = other_agent_message.get('agent_id')
-                if k_agent_id == self.agent.agent_id:
-                    continue
-                parsed_messages.append({
-                    'agent_id': k_agent_id,
-                    'z_k': other_agent_message.get('winning_agents') or {},
-                    'y_k': other_agent_message.get('winning_bids') or {},
-                    's_k': other_agent_message.get('message_received_time_stamp') or {}
-                })
+            # Neighbor messages parsed once per sender version (message caching), in messages_received order.
+            # The rules below still run against every neighbor: they compare with our own z/y/s, which change every tick.
+            parsed_messages = [self._parsed_messages[other_agent_message.get('agent_id')]
+                               for other_agent_message in self.agent.messages_received
+                               if other_agent_message.get('agent_id') in self._parsed_messages]
             
-            # Now process each task with pre-parsed messages
-            for task in candidates:
-                z_i = self.z
-                y_i = self.y
-                s_i = self.s
-                j = task.task_id
-                
-                for parsed_msg in parsed_messages:
-                    z_k = parsed_msg['z_k']
-                    y_k = parsed_msg['y_k']
-                    s_k = parsed_msg['s_k']
-                    k_agent_id = parsed_msg['agent_id']
-                    
-                    # # Skip if task is not in both bid lists
-                    # if j not in y_k or j not in y_i: # NOTE: Commented out - this prevents Table I rules (e.g., Rule 4, 13) from firing when z_ij=None. The z_i.get(j) checks handle missing y_i[j] implicitly.
-                    #     continue
-
-                    try:    
-                        if z_k.get(j) == k_agent_id:
-                            # Rule 1
-                            if z_i.get(j) == self.agent.agent_id:
-                                if y_k[j] > y_i[j]:
-                                    self._update(j, y_k, z_k)
-                            # Rule 2
-                            elif z_i.get(j) == k_agent_id:
-                                self._update(j, y_k, z_k)
-                            # Rule 4
-                            elif z_i.get(j) == None:
-                                self._update(j, y_k, z_k)     
-                            # Rule 3
-                            else:
-                                m = z_i.get(j)
-                                if m is not None:
-                                    try: 
-                                        if s_k.get(m, 0) > s_i.get(m, 0) or y_k[j] > y_i[j]:
-                                            self._update(j, y_k, z_k)   
-                                    except Exception as e:
-                                        pass                                
-
-                        elif z_k.get(j) == self.agent.agent_id:
-                            # Rule 5
-                            if z_i.get(j) == self.agent.agent_id:
-                                self._leave()                            
-                            # Rule 6
-                            elif z_i.get(j) == k_agent_id:
-                                self._reset(j)
-                            # Rule 8
-                            elif z_i.get(j) == None:
-                                self._leave()                            
-                            # Rule 7
-                            else:
-                                m = z_i.get(j)
-                                if m is not None:
-                                    try:                        
-                                        if s_k.get(m, 0) > s_i.get(m, 0):
-                                            self._reset(j)
-                                    except Exception as e:
-                                        pass
-
-                        elif z_k.get(j) == None:
-                            # Rule 14
-                            if z_i.get(j) == self.agent.agent_id:
-                                self._leave()                            
-                            # Rule 15
-                            elif z_i.get(j) == k_agent_id:
-                                self._update(j, y_k, z_k)  
-                            # Rule 17
-                            elif z_i.get(j) == None:
-                                self._leave()                            
-                            # Rule 16
-                            else:
-                                m = z_i.get(j)
-                                if m is not None:
-                                    if s_k.get(m, 0) > s_i.get(m, 0):
-                                        self._reset(j)
-                        
-                        else:
-                            m = z_k.get(j)
-                            if m is not None:
-                                # Rule 9
-                                if z_i.get(j) == self.agent.agent_id:
-                                    if s_k.get(m, 0) > s_i.get(m, 0) and y_k[j] > y_i[j]:
-                                        self._update(j, y_k, z_k)                                                         
-                                # Rule 10
-                                elif z_i.get(j) == k_agent_id:
-                                    if s_k.get(m, 0) > s_i.get(m, 0):
-                                        self._update(j, y_k, z_k)        
-                                    else:
-                                        self._reset(j)
-                                # Rule 11
-                                elif z_i.get(j) == m:                            
-                                    if s_k.get(m, 0) > s_i.get(m, 0):
-                                        self._update(j, y_k, z_k)                                    
-                                # Rule 13
-                                elif z_i.get(j) == None:
-                                    if s_k.get(m, 0) > s_i.get(m, 0):
-                                        self._update(j, y_k, z_k)                                    
-                                # Rule 12
-                                else:
-                                    n = z_i.get(j)
-                                    if n is not None:
-                                        try:
-                                            if s_k.get(m, 0) > s_i.get(m, 0) and s_k.get(n, 0) > s_i.get(n, 0):
-                                                self._update(j, y_k, z_k)
-                                            elif s_k.get(m, 0) > s_i.get(m, 0) and y_k[j] > y_i[j]:
-                                                self._update(j, y_k, z_k)                        
-                                            elif s_k.get(n, 0) > s_i.get(n, 0) and s_i.get(m, 0) > s_k.get(m, 0):
-                                                self._reset(j)
-                                        except Exception as e:
-                                            pass
-                    except Exception as e:
-                        pass
+            # Conflict resolution (Table I): rule table evaluated over all tasks at once, or the per-pair rule ladder
+            # (same result; the table only pays off for large task x neighbor batches)
+            if CONSENSUS_RULE_TABLE and len(candidates) * len(parsed_messages) >= CONSENSUS_TABLE_MIN_PAIRS:
+                self.consensus_table.resolve(self.agent.agent_id, self.z, self.y, self.s,
+                                             [task.task_id for task in candidates], parsed_messages)
+            else:
+                self.resolve_conflicts_legacy(candidates, parsed_messages)
 
             # Update time stamp after conflict resolution (Eqn 5)
             self.update_time_stamp()
@@ -221,7 +133,7 @@ class CBBA:
         # Rebid check: recalculate bid for the first task in the path
         if self.path:
             first_task = self.path[0]
-            current_bid = self.calculate_score_along_path(self.agent.position, [first_task])
+            current_bid = self.calculate_score_along_path([first_task])
             if current_bid >= self.y.get(first_task.task_id, 0):
                 self.y[first_task.task_id] = current_bid
             else:
@@ -236,13 +148,13 @@ class CBBA:
         if True:  # Phase.BUILD_BUNDLE
             self.build_bundle(local_tasks_info)
             # Broadcasting
-            self.agent.message_to_share = {
-                'agent_id': self.agent.agent_id,
-                'assigned_task_id': self.assigned_task.task_id if self.assigned_task is not None else None,
-                'winning_agents': copy.deepcopy(self.z),
-                'winning_bids': copy.deepcopy(self.y),
-                'message_received_time_stamp': copy.deepcopy(self.s)
-                }
+            self.agent.message_to_share = CBBA_MESSAGE.encode(
+                agent_id=self.agent.agent_id,
+                assigned_task_id=self.assigned_task.task_id if self.assigned_task is not None else None,
+                winning_agents=self.z,
+                winning_bids=self.y,
+                message_received_time_stamp=self.s,
+                )
             self.agent.set_planned_tasks(self.path) # For visualisation (SPACE only)
 
         # Convergence Check
@@ -264,6 +176,137 @@ class CBBA:
             # self.agent.reset_movement()  # Neutralise the agent's current movement during converging to a consensus
             return None
     
+    def resolve_conflicts_legacy(self, candidates, parsed_messages):
+        '''
+        Per-(task, neighbor) rule ladder (Table I). Reference implementation of ConsensusTable.resolve.
+        '''
+        # Now process each task with pre-parsed messages
+        for task in candidates:
+            z_i = self.z
+            y_i = self.y
+            s_i = self.s
+            j = task.task_id
+            
+            for parsed_msg in parsed_messages:
+                z_k = parsed_msg.winning_agents
+                y_k = parsed_msg.winning_bids
+                s_k = parsed_msg.message_received_time_stamp
+                k_agent_id = parsed_msg.agent_id
+                
+                # # Skip if task is not in both bid lists
+                # if j not in y_k or j not in y_i: # NOTE: Commented out - this prevents Table I rules (e.g., Rule 4, 13) from firing when z_ij=None. The z_i.get(j) checks handle missing y_i[j] implicitly.
+                #     continue
+
+                try:    
+                    if z_k.get(j) == k_agent_id:
+                        # Rule 1
+                        if z_i.get(j) == self.agent.agent_id:
+                            if y_k[j] > y_i[j]:
+                                self._update(j, y_k, z_k)
+                        # Rule 2
+                        elif z_i.get(j) == k_agent_id:
+                            self._update(j, y_k, z_k)
+                        # Rule 4
+                        elif z_i.get(j) == None:
+                            self._update(j, y_k, z_k)     
+                        # Rule 3
+                        else:
+                            m = z_i.get(j)
+                            if m is not None:
+                                try: 
+                                    if s_k.get(m, 0) > s_i.get(m, 0) or y_k[j] > y_i[j]:
+                                        self._update(j, y_k, z_k)   
+                                except Exception as e:
+                                    pass                                
+
+                    elif z_k.get(j) == self.agent.agent_id:
+                        # Rule 5
+                        if z_i.get(j) == self.agent.agent_id:
+                            self._leave()                            
+                        # Rule 6
+                        elif z_i.get(j) == k_agent_id:
+                            self._reset(j)
+                        # Rule 8
+                        elif z_i.get(j) == None:
+                            self._leave()                            
+                        # Rule 7
+                        else:
+                            m = z_i.get(j)
+                            if m is not None:
+                                try:                        
+                                    if s_k.get(m, 0) > s_i.get(m, 0):
+                                        self._reset(j)
+                                except Exception as e:
+                                    pass
+
+                    elif z_k.get(j) == None:
+                        # Rule 14
+                        if z_i.get(j) == self.agent.agent_id:
+                            self._leave()                            
+                        # Rule 15
+                        elif z_i.get(j) == k_agent_id:
+                            self._update(j, y_k, z_k)  
+                        # Rule 17
+                        elif z_i.get(j) == None:
+                            self._leave()                            
+                        # Rule 16
+                        else:
+                            m = z_i.get(j)
+                            if m is not None:
+                                if s_k.get(m, 0) > s_i.get(m, 0):
+                                    self._reset(j)
+                    
+                    else:
+                        m = z_k.get(j)
+                        if m is not None:
+                            # Rule 9
+                            if z_i.get(j) == self.agent.agent_id:
+                                if s_k.get(m, 0) > s_i.get(m, 0) and y_k[j] > y_i[j]:
+                                    self._update(j, y_k, z_k)                                                         
+                            # Rule 10
+                            elif z_i.get(j) == k_agent_id:
+                                if s_k.get(m, 0) > s_i.get(m, 0):
+                                    self._update(j, y_k, z_k)        
+                                else:
+                                    self._reset(j)
+                            # Rule 11
+                            elif z_i.get(j) == m:                            
+                                if s_k.get(m, 0) > s_i.get(m, 0):
+                                    self._update(j, y_k, z_k)                                    
+                            # Rule 13
+                            elif z_i.get(j) == None:
+                                if s_k.get(m, 0) > s_i.get(m, 0):
+                                    self._update(j, y_k, z_k)                                    
+                            # Rule 12
+                            else:
+                                n = z_i.get(j)
+                                if n is not None:
+                                    try:
+                                        if s_k.get(m, 0) > s_i.get(m, 0) and s_k.get(n, 0) > s_i.get(n, 0):
+                                            self._update(j, y_k, z_k)
+                                        elif s_k.get(m, 0) > s_i.get(m, 0) and y_k[j] > y_i[j]:
+                                            self._update(j, y_k, z_k)                        
+                                        elif s_k.get(n, 0) > s_i.get(n, 0) and s_i.get(m, 0) > s_k.get(m, 0):
+                                            self._reset(j)
+                                    except Exception as e:
+                                        pass
+                except Exception as e:
+                    pass
+
+    def _refresh_parsed_messages(self):
+        current_ids = {msg.get('agent_id') for msg in self.agent.messages_received}
+        for k_agent_id in [k for k in self._parsed_messages if k not in current_ids]:
+            del self._parsed_messages[k_agent_id]
+            self._pending_time_stamps.pop(k_agent_id, None)
+
+        for other_agent_message in self.agent.new_messages_received:
+            k_agent_id = other_agent_message.get('agent_id')
+            if k_agent_id == self.agent.agent_id:
+                continue
+            parsed = CBBA_MESSAGE.decode(other_agent_message)
+            self._parsed_messages[k_agent_id] = parsed
+            self._pending_time_stamps[k_agent_id] = parsed.message_received_time_stamp
+
     def _update(self, task_id, y_k, z_k):
         self.y[task_id] = y_k[task_id]   # Winning bid update
         self.z[task_id] = z_k[task_id]   # Winning agent update
@@ -337,26 +380,36 @@ class CBBA:
         """
 
         # For neighbor agents
-        current_timestamp = int(time.time())
+        current_timestamp = int(self.agent.tick_clock.wall)  # Tick-scoped snapshot shared by all nodes in this tick
         for other_agent in self.agent.messages_received:            
             self.s[other_agent.get('agent_id')] = current_timestamp
 
         
         # For two-hop neighbor agents
-        max_timestamp = {}     
-        for other_agent_message in self.agent.messages_received:
-            time_stamp = other_agent_message.get("message_received_time_stamp")
-            max_timestamp = merge_dicts(max_timestamp, time_stamp)
+        # self.s only grows (max-merge) until neutralized, so time stamps merged on an earlier tick cannot
+        # change the result: merge the ones received since the last merge, or every neighbor after a reset.
+        if self._time_stamp_reset:
+            time_stamps = [msg.message_received_time_stamp for msg in CBBA_MESSAGE.decode_all(self.agent.messages_received)]
+            self._time_stamp_reset = False
+        else:
+            time_stamps = list(self._pending_time_stamps.values())
+        self._pending_time_stamps = {}
 
-        # Finally merge
-        self.s = merge_dicts(self.s, max_timestamp)
+        # Max-merge in place: only entries that grow are written (and copied, if the last broadcast still shares them)
+        for time_stamp in time_stamps:
+            self.s.merge_max(time_stamp)
         
 
 
 
     def get_my_bid_value_list(self, local_tasks_info):
+        if INCREMENTAL_BUNDLE:
+            result = self.get_my_bid_value_list_incremental(local_tasks_info)
+            if result is not None:
+                return result
+
         # Calculate S_p for the constructed path list
-        S_p = self.calculate_score_along_path(self.agent.position, self.path)
+        S_p = self.calculate_score_along_path(self.path)
 
         my_bid_list = {} # My new bid list (key: task_id; value: bid value), denoted by 'c' in the paper (Algorithm 3 Line 3)
         best_insertion_idx_list = {} # (key: task_id; value: bundle insertion position)
@@ -369,7 +422,7 @@ class CBBA:
 
             for idx in range(len(self.path) + 1):
                 _alternative_path = self.get_alternative_path(self.path, task, idx)
-                S_p_plus_j_at_idx = self.calculate_score_along_path(self.agent.position, _alternative_path)
+                S_p_plus_j_at_idx = self.calculate_score_along_path(_alternative_path)
                 _marginal_score_by_new_task.append(S_p_plus_j_at_idx - S_p)
             
             _best_insertion_idx = np.argmax(_marginal_score_by_new_task)
@@ -379,6 +432,39 @@ class CBBA:
 
         return my_bid_list, best_insertion_idx_list
     
+    def get_my_bid_value_list_incremental(self, local_tasks_info):
+        '''
+        get_my_bid_value_list for all candidates at once (InsertionScorer over task_table rows).
+        Returns None if the task table does not hold the candidates and path tasks, so the caller falls back.
+        '''
+        table = self.agent.blackboard.get('task_table')
+        candidates = list(local_tasks_info.values()) if isinstance(local_tasks_info, dict) else local_tasks_info
+        if table is None or len(table) != len(candidates):
+            return None
+        for task, row_task in zip(candidates, table.tasks):
+            if task is not row_task:
+                return None
+        path_rows = []
+        for task in self.path:
+            row = table.index.get(task.task_id)
+            if row is None or table.tasks[row] is not task:
+                return None
+            path_rows.append(row)
+
+        in_path = np.zeros(len(table), dtype=bool)
+        in_path[path_rows] = True
+        candidate_rows = np.flatnonzero(~in_path)
+        if len(candidate_rows) == 0:
+            return {}, {}
+
+        distances = self.agent.distances
+        best_marginal, best_index = self.insertion_scorer.evaluate(
+            distances.agent_to_tasks(), distances.task_to_tasks(), path_rows, candidate_rows)
+        task_ids = table.ids[candidate_rows].tolist()
+        my_bid_list = dict(zip(task_ids, best_marginal.tolist()))
+        best_insertion_idx_list = dict(zip(task_ids, best_index.tolist()))
+        return my_bid_list, best_insertion_idx_list
+
     def get_alternative_path(self, path, task, idx):
         # _new_path = copy.deepcopy(path)
         _new_path = path[:] # Creates a shallow copy of the list
@@ -413,22 +499,27 @@ class CBBA:
 
         return local_tasks_info[best_task_id] if best_task_score > float('-inf') else None
 
-    def calculate_score_along_path(self, agent_position, path): 
+    def calculate_score_along_path(self, path, agent_position=None): 
         """
         Compute S^{p_i} in Eqn (11) in the CBBA paper 
+        agent_position: start of the path (None: the agent's current position, via the per-tick distance cache)
         """
         
-        current_position = agent_position
+        distances = self.agent.distances  # Per-tick distance cache shared with other nodes
         expected_reward_from_task = 0
         distance_to_next_task_from_start = 0
+        previous_task = None
         for task in path:
-            next_position = pygame.Vector2(task.position)
-            distance_to_next_task_from_start += current_position.distance_to(next_position)
+            if previous_task is not None:
+                distance_to_next_task_from_start += distances.between(previous_task, task)
+            elif agent_position is None:
+                distance_to_next_task_from_start += distances.to_task(task)
+            else:
+                distance_to_next_task_from_start += agent_position.distance_to(task.position)
             # Time-discounted reward
-            AGENT_SPEED = 0.5
             expected_reward_from_task += LAMBDA**(distance_to_next_task_from_start/AGENT_SPEED)         
             # expected_reward_from_task += (task.amount - (distance_to_next_task_from_start/self.agent.max_speed + task.amount/self.agent.work_rate))
-            current_position = next_position
+            previous_task = task
 
         return expected_reward_from_task
 
@@ -0,0 +1,346 @@
+from itertools import repeat
+
+import numpy as np
+
+# ---- CBBA consensus rule table (Table I in the CBBA paper, Rules 1-17) ----
+# Each (task j, neighbor k) pair is classified by two relations:
+#   rel_k: who neighbor k thinks wins j (z_kj)  -> SENDER (k itself), RECEIVER (me), NONE, OTHER (m)
+#   rel_i: who I think wins j (z_ij)            -> RECEIVER (me), SENDER (k), NONE, SAME (= z_kj), OTHER (n)
+# The relations are tested in the order of the original if/elif ladder, so SAME only occurs when rel_k is OTHER.
+# RULE_TABLE[rel_k, rel_i] gives the action; conditional actions compare bids (y) and time stamps (s).
+# The table is compiled (_compile_outcomes) into one lookup over every relation/comparison case, so evaluating a
+# neighbor against all tasks is a few array operations.
+
+SENDER, RECEIVER, NONE, OTHER = 0, 1, 2, 3          # rel_k
+I_RECEIVER, I_SENDER, I_NONE, I_SAME, I_OTHER = 0, 1, 2, 3, 4  # rel_i
+
+LEAVE = 0
+UPDATE = 1
+UPDATE_IF_BID = 2             # y_kj > y_ij
+UPDATE_IF_STAMP_OR_BID = 3    # s_kn > s_in or y_kj > y_ij         (n = z_ij)
+RESET = 4
+RESET_IF_STAMP = 5            # s_kn > s_in                        (n = z_ij)
+UPDATE_IF_STAMP_AND_BID = 6   # s_km > s_im and y_kj > y_ij        (m = z_kj)
+UPDATE_ELSE_RESET = 7         # s_km > s_im ? update : reset
+UPDATE_IF_STAMP = 8           # s_km > s_im
+RULE_12 = 9                   # s_km > s_im and (s_kn > s_in or y_kj > y_ij) ? update : (s_kn > s_in and s_im > s_km ? reset)
+
+RULE_TABLE = np.array([
+    # I_RECEIVER               I_SENDER           I_NONE           I_SAME           I_OTHER
+    [UPDATE_IF_BID,            UPDATE,            UPDATE,          LEAVE,           UPDATE_IF_STAMP_OR_BID],  # SENDER
+    [LEAVE,                    RESET,             LEAVE,           LEAVE,           RESET_IF_STAMP],          # RECEIVER
+    [LEAVE,                    UPDATE,            LEAVE,           LEAVE,           RESET_IF_STAMP],          # NONE
+    [UPDATE_IF_STAMP_AND_BID,  UPDATE_ELSE_RESET, UPDATE_IF_STAMP, UPDATE_IF_STAMP, RULE_12],                 # OTHER
+], dtype=np.int8)
+
+# Rule numbers of the paper for each cell (0 = unreachable), for reference and the regression corpus
+RULE_NUMBERS = np.array([
+    [1, 2, 4, 0, 3],
+    [5, 6, 8, 0, 7],
+    [14, 15, 17, 0, 16],
+    [9, 10, 13, 11, 12],
+], dtype=np.int8)
+
+# Outcomes of one (task, neighbor) pair
+KEEP = 0
+SET_BID_AND_WINNER = 1   # _update(j, y_k, z_k)
+SET_BID_ONLY = 2         # _update with z_kj missing: y_kj was written before z_kj raised KeyError
+CLEAR = 3                # _reset(j)
+
+_UNCHANGED = -1
+_RESET = -2
+_NONE_CODE = 0  # agent code of None (no winner / missing entry)
+_MIN_ROUND_PAIRS = 4  # batched rounds must advance this many neighbors per changed task, else finish them scalar
+
+
+def _compile_outcomes():
+    """
+    Flattened OUTCOMES[rel_k, s_km > s_im, s_im > s_km, y_kj present, z_kj present,
+                       rel_i (SAME folded into OTHER), s_kn > s_in, z_ij == z_kj, y_kj > y_ij]
+    with m = z_kj and n = z_ij.
+    Bid comparisons with a missing entry raised KeyError in the ladder (pair skipped): they only count as
+    "higher" when both bids exist, and an update needs y_kj.
+    """
+    outcomes = np.zeros((4, 2, 2, 2, 2, 4, 2, 2, 2), dtype=np.int8)
+    for index in np.ndindex(outcomes.shape):
+        rel_k, stamp_m, stamp_m_older, y_present, z_present, rel_i, stamp_n, same, bid_higher = index
+        if rel_i == 3:  # OTHER: SAME when z_ij == z_kj (only distinguishable when rel_k is OTHER)
+            rel_i = I_SAME if same else I_OTHER
+        action = RULE_TABLE[rel_k, rel_i]
+        update = (action == UPDATE
+                  or (action == UPDATE_IF_BID and bid_higher)
+                  or (action == UPDATE_IF_STAMP_OR_BID and (stamp_n or bid_higher))
+                  or (action == UPDATE_IF_STAMP_AND_BID and stamp_m and bid_higher)
+                  or (action in (UPDATE_ELSE_RESET, UPDATE_IF_STAMP) and stamp_m)
+                  or (action == RULE_12 and stamp_m and (stamp_n or bid_higher)))
+        reset = (action == RESET
+                 or (action == RESET_IF_STAMP and stamp_n)
+                 or (action == UPDATE_ELSE_RESET and not stamp_m)
+                 or (action == RULE_12 and not stamp_m and stamp_n and stamp_m_older))
+        if update and y_present:
+            outcomes[index] = SET_BID_AND_WINNER if z_present else SET_BID_ONLY
+        elif reset:
+            outcomes[index] = CLEAR
+    return outcomes.reshape(-1)
+
+
+OUTCOMES = _compile_outcomes()
+_OUTCOME_LIST = OUTCOMES.tolist()
+
+
+class _NeighborEncoding:
+    """One neighbor message encoded over a task id list (cached while the message and the task list are unchanged)."""
+    __slots__ = ('message', 'task_ids', 'z_codes', 'z_present', 'y', 'y_is_int', 's_codes', 's_values')
+
+
+def _bids(bids, task_ids):
+    """(bid array with NaN for missing entries, int-typed flags): _reset writes int 0, which is not the same payload as 0.0."""
+    values = list(map(bids.get, task_ids, repeat(np.nan)))
+    return (np.array(values, dtype=float),
+            np.fromiter(map(int.__instancecheck__, values), dtype=bool, count=len(values)))
+
+
+class _NeighborBlock:
+    """Neighbor encodings stacked into K x T (and K x agent-code) arrays, in message order."""
+    __slots__ = ('encodings', 'task_ids', 'z_k', 'z_k_present', 'y_k', 'y_k_is_int', 's_k')
+
+    def __init__(self, encodings, task_ids, num_codes):
+        self.encodings = list(encodings)
+        self.task_ids = task_ids
+        self.z_k = np.stack([enc.z_codes for enc in encodings])
+        self.z_k_present = np.stack([enc.z_present for enc in encodings])
+        self.y_k = np.stack([enc.y for enc in encodings])
+        self.y_k_is_int = np.stack([enc.y_is_int for enc in encodings])
+        self.s_k = np.zeros((len(encodings), num_codes))
+        self.s_k[np.repeat(np.arange(len(encodings)), [len(enc.s_codes) for enc in encodings]),
+                 np.concatenate([enc.s_codes for enc in encodings])] = np.concatenate([enc.s_values for enc in encodings])
+
+    def matches(self, encodings, task_ids):
+        return self.task_ids == task_ids and len(self.encodings) == len(encodings) and all(
+            old.message.agent_id == new.message.agent_id for old, new in zip(self.encodings, encodings))
+
+    def update(self, encodings, num_codes):
+        """Re-stack only the rows whose message changed (agent codes only grow: new columns start at 0)."""
+        if self.s_k.shape[1] < num_codes:
+            self.s_k = np.pad(self.s_k, ((0, 0), (0, num_codes - self.s_k.shape[1])))
+        for row, enc in enumerate(encodings):
+            if self.encodings[row] is enc:
+                continue
+            self.encodings[row] = enc
+            self.z_k[row] = enc.z_codes
+            self.z_k_present[row] = enc.z_present
+            self.y_k[row] = enc.y
+            self.y_k_is_int[row] = enc.y_is_int
+            self.s_k[row] = 0.0
+            self.s_k[row, enc.s_codes] = enc.s_values
+
+
+class ConsensusTable:
+    """
+    Table-driven CBBA conflict resolution over all candidate tasks and neighbors at once.
+
+    The ladder runs neighbors in order, each one seeing the z/y writes of the previous ones; the rules for task j
+    only read and write entry j. Here every (neighbor, task) outcome is looked up in OUTCOMES in one batch against
+    my current z/y. For each task, only the first write that actually changes my entry (value, int/float type or
+    presence) has to be applied before later neighbors are evaluated again: writes of an identical entry leave
+    the state, and thus every later outcome, unchanged. Rounds repeat for the tasks that changed, starting after
+    the neighbor that changed them, so the number of rounds is the largest number of effective changes of a task.
+    The result (final values and dict insertion order) is the same as running the per-pair rule ladder.
+    """
+
+    def __init__(self):
+        self._agent_codes = {None: _NONE_CODE}  # agent_id → integer code (grows only)
+        self._encodings = {}                    # neighbor agent_id → _NeighborEncoding
+        self._block = None                      # _NeighborBlock of the last resolve
+        self._own = {}                          # 'z' / 'y' / 's' → (table, version, task_ids, encoding) of my tables
+
+    def _code(self, agent_id):
+        code = self._agent_codes.get(agent_id)
+        if code is None:
+            code = self._agent_codes[agent_id] = len(self._agent_codes)
+        return code
+
+    def _codes(self, agent_ids):
+        codes = list(map(self._agent_codes.get, agent_ids))
+        if None in codes:  # first time seen
+            codes = [self._code(agent_id) for agent_id in agent_ids]
+        return np.array(codes, dtype=np.intp)
+
+    def _encode_stamps(self, stamps):
+        return self._codes(list(stamps)), np.fromiter(stamps.values(), dtype=float, count=len(stamps))
+
+    def _encode_neighbor(self, message, task_ids):
+        cached = self._encodings.get(message.agent_id)
+        if cached is not None and cached.message is message and cached.task_ids == task_ids:
+            return cached
+        z_k = message.winning_agents
+        enc = _NeighborEncoding()
+        enc.message = message
+        enc.task_ids = task_ids
+        enc.z_codes, enc.z_present = self._encode_winners(z_k, task_ids)
+        enc.y, enc.y_is_int = _bids(message.winning_bids, task_ids)
+        enc.s_codes, enc.s_values = self._encode_stamps(message.message_received_time_stamp)
+        self._encodings[message.agent_id] = enc
+        return enc
+
+    def _encode_own(self, name, table, task_ids, encode):
+        """
+        Encoding of my z, y or s table, reused while it is the same CowDict at the same `version` (and the same
+        task list). Plain dicts have no version and are encoded on every call.
+        """
+        version = getattr(table, 'version', None)
+        cached = self._own.get(name)
+        if (version is not None and cached is not None and cached[0] is table and cached[1] == version
+                and cached[2] == task_ids):
+            return cached[3]
+        encoding = encode(table, task_ids)
+        if version is not None:
+            self._own[name] = (table, version, task_ids, encoding)
+        return encoding
+
+    def _encode_winners(self, z, task_ids):
+        return (self._codes(list(map(z.get, task_ids))),
+                np.fromiter(map(z.__contains__, task_ids), dtype=bool, count=len(task_ids)))
+
+    def resolve(self, my_agent_id, z, y, s, task_ids, messages):
+        """
+        Apply the consensus rules for `task_ids` against every neighbor message (decoded CBBA messages, in order).
+        z and y are updated in place; s is only read.
+        """
+        task_ids = tuple(task_ids)
+        num_tasks = len(task_ids)
+        if num_tasks == 0 or not messages:
+            return
+        live = {message.agent_id for message in messages}
+        for agent_id in [a for a in self._encodings if a not in live]:
+            del self._encodings[agent_id]
+
+        encodings = [self._encode_neighbor(message, task_ids) for message in messages]
+        num_neighbors = len(encodings)
+        me = self._code(my_agent_id)
+        senders = np.array([self._code(message.agent_id) for message in messages], dtype=np.intp)
+        # My entries per task (NaN bid = missing entry); copies, since the rounds below update them in place
+        z_i, z_i_present = (array.copy() for array in self._encode_own('z', z, task_ids, self._encode_winners))
+        y_i, y_i_is_int = (array.copy() for array in self._encode_own('y', y, task_ids, _bids))
+        s_i_codes, s_i_values = self._encode_own('s', s, None, lambda stamps, _task_ids: self._encode_stamps(stamps))
+        num_codes = len(self._agent_codes)  # every code used below exists by now
+
+        # ---- terms that depend only on the neighbor messages (K x T, K x codes) ----
+        block = self._block
+        if block is not None and block.matches(encodings, task_ids):
+            block.update(encodings, num_codes)
+        else:
+            block = self._block = _NeighborBlock(encodings, task_ids, num_codes)
+        z_k, z_k_present, y_k, y_k_is_int, s_k = block.z_k, block.z_k_present, block.y_k, block.y_k_is_int, block.s_k
+        s_i_row = np.zeros(num_codes)
+        s_i_row[s_i_codes] = s_i_values
+        stamp_newer = s_k > s_i_row   # s_ka > s_ia per agent code
+        stamp_m = np.take_along_axis(stamp_newer, z_k, axis=1)
+        stamp_m_older = np.take_along_axis(s_i_row > s_k, z_k, axis=1)
+
+        rel_k = np.where(z_k == senders[:, np.newaxis], SENDER,
+                np.where(z_k == me, RECEIVER,
+                np.where(z_k == _NONE_CODE, NONE, OTHER)))
+        case_base = ((((rel_k * 2 + stamp_m) * 2 + stamp_m_older) * 2 + ~np.isnan(y_k)) * 2 + z_k_present) * 8
+
+        # Per neighbor and agent code n = z_ij: rel_i (me > sender > None > other, as in the ladder) and s_kn > s_in,
+        # laid out so that case = ((case_base + by_my_winner[z_ij]) * 2 + same) * 2 + bid_higher.
+        rel_i = np.full((num_neighbors, num_codes), 3, dtype=np.intp)
+        rel_i[:, _NONE_CODE] = I_NONE
+        rel_i[np.arange(num_neighbors), senders] = I_SENDER
+        rel_i[:, me] = I_RECEIVER
+        by_my_winner = rel_i * 2 + stamp_newer
+
+        y_source = np.full(num_tasks, _UNCHANGED, dtype=np.intp)  # last writer: neighbor index, _RESET or _UNCHANGED
+        z_source = np.full(num_tasks, _UNCHANGED, dtype=np.intp)
+        first = np.zeros(num_tasks, dtype=np.intp)  # first neighbor not yet applied, per task
+        active = np.arange(num_tasks)
+        neighbor_index = np.arange(num_neighbors)[:, np.newaxis]
+
+        while len(active):
+            rows = slice(int(first[active].min()), num_neighbors)
+            zi, yi = z_i[active], y_i[active]
+            zk, yk = z_k[rows, active], y_k[rows, active]
+            case = case_base[rows, active] + by_my_winner[neighbor_index[rows], zi]
+            case <<= 1
+            case += zk == zi
+            case <<= 1
+            case += yk > yi  # NaN (missing) compares False
+            outcome = OUTCOMES[case]
+
+            # Writes that change my entry; identical writes are skipped (they leave the state unchanged)
+            y_changes = (yk != yi) | (y_k_is_int[rows, active] != y_i_is_int[active])
+            z_changes = (zk != zi) | ~z_i_present[active]
+            clear_changes = (yi != 0) | ~y_i_is_int[active] | (zi != _NONE_CODE) | ~z_i_present[active]
+            effective = (((outcome == SET_BID_AND_WINNER) & (y_changes | z_changes))
+                         | ((outcome == SET_BID_ONLY) & y_changes)
+                         | ((outcome == CLEAR) & clear_changes))
+            effective &= neighbor_index[rows] >= first[active]
+
+            changed = effective.any(axis=0)
+            active = active[changed]
+            if not len(active):
+                break
+            n = effective[:, changed].argmax(axis=0) + rows.start  # first effective writer per changed task
+            applied = outcome[n - rows.start, np.flatnonzero(changed)]
+            advanced = int((n + 1 - first[active]).sum())
+            self._apply(active, n, applied, z_i, z_i_present, y_i, y_i_is_int, z_k, y_k, y_k_is_int, y_source, z_source)
+            first[active] = n + 1
+            if advanced < _MIN_ROUND_PAIRS * len(active):
+                # Entries that keep changing from neighbor to neighbor: finish them one pair at a time (same lookup)
+                self._finish(active, first, case_base, by_my_winner, z_i, z_i_present, y_i, y_i_is_int,
+                             z_k, y_k, y_k_is_int, y_source, z_source)
+                break
+
+        # Write back the original Python values, in task order (same dict insertion order as the ladder)
+        for row in np.flatnonzero(y_source != _UNCHANGED).tolist():
+            j = task_ids[row]
+            source = y_source[row]
+            y[j] = 0 if source == _RESET else messages[source].winning_bids[j]
+            source = z_source[row]
+            if source == _RESET:
+                z[j] = None
+            elif source != _UNCHANGED:
+                z[j] = messages[source].winning_agents[j]
+
+    @staticmethod
+    def _apply(tasks, n, applied, z_i, z_i_present, y_i, y_i_is_int, z_k, y_k, y_k_is_int, y_source, z_source):
+        """Apply the outcome of neighbor n[t] to task tasks[t]."""
+        cleared = applied == CLEAR
+        sets_winner = applied != SET_BID_ONLY
+        y_i[tasks] = np.where(cleared, 0.0, y_k[n, tasks])
+        y_i_is_int[tasks] = cleared | y_k_is_int[n, tasks]
+        y_source[tasks] = np.where(cleared, _RESET, n)
+        winner_tasks = tasks[sets_winner]
+        z_i[winner_tasks] = np.where(cleared[sets_winner], _NONE_CODE, z_k[n[sets_winner], winner_tasks])
+        z_i_present[winner_tasks] = True
+        z_source[winner_tasks] = np.where(cleared[sets_winner], _RESET, n[sets_winner])
+
+    @staticmethod
+    def _finish(tasks, first, case_base, by_my_winner, z_i, z_i_present, y_i, y_i_is_int,
+                z_k, y_k, y_k_is_int, y_source, z_source):
+        """Scalar pass over the remaining neighbors of `tasks`, using the same case encoding and OUTCOMES lookup."""
+        outcomes = _OUTCOME_LIST
+        by_my_winner = by_my_winner.tolist()
+        for t in tasks.tolist():
+            start = int(first[t])
+            bases = case_base[start:, t].tolist()
+            winners = z_k[start:, t].tolist()
+            bids = y_k[start:, t].tolist()
+            bid_is_int = y_k_is_int[start:, t].tolist()
+            zi, present, yi, yi_int = int(z_i[t]), bool(z_i_present[t]), float(y_i[t]), bool(y_i_is_int[t])
+            y_src, z_src = int(y_source[t]), int(z_source[t])
+            for offset, base in enumerate(bases):
+                zk, yk = winners[offset], bids[offset]
+                outcome = outcomes[(((base + by_my_winner[start + offset][zi]) << 1) + (zk == zi) << 1) + (yk > yi)]
+                if outcome == KEEP:
+                    continue
+                if outcome == CLEAR:
+                    zi, present, yi, yi_int = _NONE_CODE, True, 0.0, True
+                    y_src = z_src = _RESET
+                    continue
+                yi, yi_int, y_src = yk, bid_is_int[offset], start + offset
+                if outcome == SET_BID_AND_WINNER:
+                    zi, present, z_src = zk, True, start + offset
+            z_i[t], z_i_present[t], y_i[t], y_i_is_int[t] = zi, present, yi, yi_int
+            y_source[t], z_source[t] = y_src, z_src
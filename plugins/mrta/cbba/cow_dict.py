@@ -0,0 +1,104 @@
+class CowDict:
+    '''
+    Versioned, copy-on-write dict for the CBBA z / y / s tables.
+
+    `snapshot()` hands out the underlying dict for the outgoing message without copying it. The dict is then
+    shared, and the first mutation afterwards copies it, so a snapshot is never modified after it is handed out
+    (same scheme as the GRAPE Partition). Writes of a value equal to the stored one are skipped: they neither
+    copy a shared dict nor bump `version`.
+
+    `version` increases on every effective change, so two equal versions mean an unchanged table
+    (ConsensusTable re-encodes my z / y / s only when it changes).
+
+    Snapshots are read-only: receivers must not mutate them (decode or copy first), since the dict is this
+    table's storage until its next change.
+
+    Wire form (CBBA message fields): the plain dict.
+    '''
+    __slots__ = ('_data', '_shared', 'version')
+
+    def __init__(self, data=None):
+        self._data = dict(data) if data is not None else {}
+        self._shared = False
+        self.version = 0
+
+    def snapshot(self):
+        '''Dict to put in an outgoing message (shared with this table until the next change; do not mutate it).'''
+        self._shared = True
+        return self._data
+
+    # ---- queries --------------------------------------------------------
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def __eq__(self, other):
+        if isinstance(other, CowDict):
+            return self._data == other._data
+        if isinstance(other, dict):
+            return self._data == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"CowDict({self._data!r})"
+
+    # ---- mutations --------------------------------------------------------
+
+    def _own(self):
+        if self._shared:
+            self._data = dict(self._data)
+            self._shared = False
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        data = self._data
+        if key in data:
+            current = data[key]
+            # Same value and type (int 0 from a reset is not the same entry as 0.0)
+            if current is value or (type(current) is type(value) and current == value):
+                return
+        self._own()
+        self._data[key] = value
+
+    def clear(self):
+        if not self._data:
+            return
+        if self._shared:
+            self._data = {}
+            self._shared = False
+            self.version += 1
+        else:
+            self._own()
+            self._data.clear()
+
+    def merge_max(self, other):
+        '''
+        Entry-wise max-merge of a dict into this table (new keys are appended in `other`'s order, ties keep the
+        stored value), like modules.utils.merge_dicts but touching only the entries that change.
+        '''
+        data = self._data
+        for key, value in other.items():
+            if key not in data or value > data[key]:
+                self[key] = value
+                data = self._data
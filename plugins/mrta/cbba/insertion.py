@@ -0,0 +1,92 @@
+from itertools import repeat
+
+import numpy as np
+
+
+class InsertionScorer:
+    '''
+    Marginal score of inserting candidate tasks into a CBBA path (Eqn (11): S^{p ⊕_n j} - S^{p}),
+    for every candidate and every insertion index at once.
+
+    For the current path it precomputes
+      - the cumulative travel distance D_k to each path task (prefix distances),
+      - the discounted reward r_k = LAMBDA ** (D_k / speed) and the suffix sums R_k = sum_{m >= k} r_m.
+    Inserting j between path[n-1] and path[n] adds the detour
+        delta = d(path[n-1], j) + d(j, path[n]) - d(path[n-1], path[n])
+    to every later task, which multiplies their rewards by LAMBDA ** (delta / speed).
+    The marginal score is therefore O(1) per (candidate, index):
+        LAMBDA ** ((D_{n-1} + d(path[n-1], j)) / speed) + (LAMBDA ** (delta / speed) - 1) * R_n
+    This score only ranks the insertion indices: the bid at the best index is re-walked with the same arithmetic
+    as CBBA.calculate_score_along_path, so it is bit-identical to the per-insertion re-walk.
+    '''
+
+    def __init__(self, discount, speed):
+        self.discount = discount
+        self.speed = speed
+
+    def evaluate(self, start_distances, pairwise_distances, path_rows, candidate_rows):
+        '''
+        start_distances:    agent -> task distance per task_table row
+        pairwise_distances: task -> task distance matrix over task_table rows
+        path_rows:          task_table rows of the current path (in order)
+        candidate_rows:     task_table rows to evaluate (numpy int array)
+        Returns (best marginal score, best insertion index) arrays aligned to candidate_rows.
+        Ties between insertion indices go to the earliest index.
+        The returned score is the exact re-walk (rewalk()), not the O(1) ranking score.
+        '''
+        discount, speed = self.discount, self.speed
+        num_path = len(path_rows)
+
+        # Prefix distances, edge lengths and suffix reward sums of the current path
+        edges = np.empty(num_path)
+        for k, row in enumerate(path_rows):
+            edges[k] = start_distances[row] if k == 0 else pairwise_distances[path_rows[k - 1], row]
+        prefix = np.cumsum(edges)
+        rewards = discount ** (prefix / speed)
+        suffix = np.append(np.cumsum(rewards[::-1])[::-1], 0.0)
+
+        marginals = np.empty((num_path + 1, len(candidate_rows)))
+        for n in range(num_path + 1):
+            if n == 0:
+                reached, to_candidate = 0.0, start_distances[candidate_rows]
+            else:
+                reached, to_candidate = prefix[n - 1], pairwise_distances[path_rows[n - 1], candidate_rows]
+            marginals[n] = discount ** ((reached + to_candidate) / speed)
+            if n < num_path:
+                detour = to_candidate + pairwise_distances[candidate_rows, path_rows[n]] - edges[n]
+                marginals[n] += (discount ** (detour / speed) - 1.0) * suffix[n]
+
+        best_index = np.argmax(marginals, axis=0)
+        best_marginal = self.rewalk(start_distances, pairwise_distances, path_rows, candidate_rows, best_index)
+        return best_marginal, best_index
+
+    def rewalk(self, start_distances, pairwise_distances, path_rows, candidate_rows, insertion_index):
+        '''
+        Marginal score S^{p ⊕_n j} - S^{p} of inserting candidate_rows[c] at insertion_index[c], walked like
+        CBBA.calculate_score_along_path: running distance sum, Python pow per task, running reward sum.
+        O(path) per candidate, vectorized over candidates.
+        '''
+        path = np.asarray(path_rows, dtype=np.intp)
+        num_path = len(path)
+        if num_path == 0:
+            return self._walk(start_distances, pairwise_distances, np.asarray(candidate_rows)[np.newaxis, :])
+
+        # rows[t, c]: task_table row at position t of the path with candidate c inserted
+        position = np.arange(num_path + 1)[:, np.newaxis]
+        rows = np.where(position == insertion_index, candidate_rows,
+                        path[np.where(position < insertion_index, position, position - 1)])
+        current_score = self._walk(start_distances, pairwise_distances, path[:, np.newaxis])[0]
+        return self._walk(start_distances, pairwise_distances, rows) - current_score
+
+    def _walk(self, start_distances, pairwise_distances, rows):
+        '''
+        Path score per column of rows (task_table rows in path order), in the re-walk's operation order.
+        '''
+        legs = np.empty(rows.shape)
+        legs[0] = start_distances[rows[0]]
+        legs[1:] = pairwise_distances[rows[:-1], rows[1:]]
+        reached = np.cumsum(legs, axis=0)  # Sequential sums down each column, like the re-walk's running distance
+        # Per-element Python pow: numpy's float power can differ from Python's ** in the last bit
+        rewards = np.fromiter(map(pow, repeat(self.discount), (reached / self.speed).ravel().tolist()),
+                              dtype=float, count=reached.size).reshape(reached.shape)
+        return np.cumsum(rewards, axis=0)[-1]
@@ -1,6 +1,10 @@
 import random
 import copy
+from itertools import repeat
+import numpy as np
 from modules.utils import config
+from modules.message_schema import MessageSchema, Field
+from plugins.mrta.grape.partition import Partition
 
 KEEP_MOVING_DURING_CONVERGENCE = config['decision_making']['GRAPE'].get('execute_movements_during_convergence', False) # TODO: Remove later as this is just for backward compatibility
 LOCAL_CONVERGENCE = config['decision_making']['GRAPE'].get('local_convergence', False)
@@ -8,6 +12,16 @@ INITIALIZE_PARTITION = config['decision_making']['GRAPE']['initialize_partition'
 REINITIALIZE_PARTITION = config['decision_making']['GRAPE']['reinitialize_partition_on_completion']
 COST_WEIGHT_FACTOR = config['decision_making']['GRAPE']['cost_weight_factor']
 SOCIAL_INHIBITION_FACTOR = config['decision_making']['GRAPE']['social_inhibition_factor']
+VECTORIZED = config['decision_making']['GRAPE'].get('vectorized', True) # Evaluate all utilities at once over blackboard['task_table']
+
+# Message shared with neighbors
+GRAPE_MESSAGE = MessageSchema('GRAPEMessage', [
+    Field('agent_id'),
+    Field('assigned_task_id'),
+    Field('partition', factory=Partition, encode=Partition.snapshot, decode=Partition.from_message),  # agent_id -> task_id
+    Field('evolution_number', default=0),
+    Field('time_stamp', default=0),
+])
 
 class GRAPE:
     def __init__(self, agent):
@@ -15,16 +29,16 @@ class GRAPE:
         self.satisfied = False
         self.evolution_number = 0  # Initialize evolution_number
         self.time_stamp = 0  # Initialize time_stamp            
-        self.partition = {}  # Initialize partition with emptysets        
+        self.partition = Partition()  # Initialize partition (agent_id -> task_id)
         self.assigned_task = None           
 
         self.current_utilities = {}
-        self.agent.message_to_share = { # Message Initialization
-            'agent_id': self.agent.agent_id,
-            'partition': self.partition, 
-            'evolution_number': self.evolution_number,
-            'time_stamp': self.time_stamp
-            } 
+        self.agent.message_to_share = GRAPE_MESSAGE.encode( # Message Initialization
+            agent_id=self.agent.agent_id,
+            partition=self.partition,
+            evolution_number=self.evolution_number,
+            time_stamp=self.time_stamp,
+            )
 
 
     def initialize_partition_by_distance(self, agents_info, tasks_info, partition):
@@ -32,12 +46,11 @@ class GRAPE:
             task_distance = {task.task_id: float('inf') if task.completed else (agent.position - task.position).length() for task in tasks_info}
             if len(task_distance) > 0:
                 preferred_task_id = min(task_distance, key=task_distance.get)
-                self.partition.setdefault(preferred_task_id, set()) # Ensure the task_id key exists in the partition. Set tis value as empty set if it doesn't already exist (This is for dynamic task generation)
-                partition[preferred_task_id].add(agent.agent_id)
+                partition.assign(agent.agent_id, preferred_task_id)
         return partition
 
     def get_neighbor_agents_info_in_partition(self, partition):
-        _neighbor_agents_info = [neighbor_agent for neighbor_agent in self.agent.agents_info if neighbor_agent.agent_id in partition[self.assigned_task.task_id]]
+        _neighbor_agents_info = [neighbor_agent for neighbor_agent in self.agent.agents_info if partition.task_of(neighbor_agent.agent_id) == self.assigned_task.task_id]
         return _neighbor_agents_info
 
     def decide(self, blackboard):
@@ -52,14 +65,16 @@ class GRAPE:
         local_tasks_info = blackboard.get('local_tasks_info', {})
 
         # D-Mutex (Phase 1)
-        self.evolution_number, self.time_stamp, self.partition, self.satisfied = self.distributed_mutex(self.agent.messages_received)
+        # Only messages that changed since the last tick can win: every message already seen has
+        # (evolution_number, time_stamp) <= ours, and ours never decreases.
+        self.evolution_number, self.time_stamp, self.partition, self.satisfied = self.distributed_mutex(self.agent.new_messages_received)
         self.assigned_task = self.get_assigned_task_from_partition(self.partition, local_tasks_info)
         
         # Check if the existing task is done or not available anymore (e.g., completed by others, disappeared due to dynamic environment, etc.)        
         if self.assigned_task is None and previous_assigned_task_id is not None and previous_assigned_task_id not in local_tasks_info:
             # _neighbor_agents_info = self.get_neighbor_agents_info_in_partition(self.partition)    
             # Default routine
-            self.partition[previous_assigned_task_id] = set()  # Empty the previous task's coalition                  
+            self.partition.clear_task(previous_assigned_task_id)  # Empty the previous task's coalition
             self.assigned_task = None
             self.satisfied = False
             
@@ -85,13 +100,13 @@ class GRAPE:
             self.satisfied = True
 
             # Broadcasting # NOTE: Implemented separately
-            self.agent.message_to_share = {
-                'agent_id': self.agent.agent_id,
-                'assigned_task_id': self.assigned_task.task_id if self.assigned_task is not None else None,
-                'partition': self.partition, 
-                'evolution_number': self.evolution_number,
-                'time_stamp': self.time_stamp
-                }
+            self.agent.message_to_share = GRAPE_MESSAGE.encode(
+                agent_id=self.agent.agent_id,
+                assigned_task_id=self.assigned_task.task_id if self.assigned_task is not None else None,
+                partition=self.partition,
+                evolution_number=self.evolution_number,
+                time_stamp=self.time_stamp,
+                )
             
             # NOTE: Since the assigned task has changed, this indicates that convergence has not yet been reached, so it returns None
             return None
@@ -103,16 +118,20 @@ class GRAPE:
 
 
     def discard_myself_from_coalition(self, task):
-        if task is not None:
-            self.partition[task.task_id].discard(self.agent.agent_id)
+        if task is not None and self.partition.task_of(self.agent.agent_id) == task.task_id:
+            self.partition.discard(self.agent.agent_id)
 
 
     
     def update_partition(self, preferred_task_id):                
-        self.discard_myself_from_coalition(self.assigned_task)            
-        self.partition[preferred_task_id].add(self.agent.agent_id)
+        self.partition.assign(self.agent.agent_id, preferred_task_id)  # Leaves the previous coalition
 
     def find_max_utility_task(self, tasks_info):
+        if VECTORIZED:
+            result = self.find_max_utility_task_vectorized(tasks_info)
+            if result is not None:
+                return result
+
         _current_utilities = {
             task.task_id : self.compute_utility(task) for task in tasks_info
         }
@@ -124,16 +143,54 @@ class GRAPE:
 
         return _max_task_id, _max_utility
 
+    def find_max_utility_task_vectorized(self, tasks_info):
+        '''
+        Same result as the scalar path (utility values, first-max tie-break),
+        computed over the rows of blackboard['task_table'].
+        Returns None when the table does not hold exactly `tasks_info` (in order), so the caller falls back.
+        '''
+        table = self.agent.blackboard.get('task_table')
+        if table is None or len(table) != len(tasks_info) or len(tasks_info) == 0:
+            return None
+        for task, row_task in zip(tasks_info, table.tasks):
+            if task is not row_task:
+                return None
+
+        num_collaborators = self.coalition_sizes(table)
+        if isinstance(SOCIAL_INHIBITION_FACTOR, int) and SOCIAL_INHIBITION_FACTOR >= 0:
+            inhibition = num_collaborators ** SOCIAL_INHIBITION_FACTOR  # Exact integers, as in Python
+        else:
+            # Per-element Python pow: numpy's float power can differ from Python's ** in the last bit
+            inhibition = np.fromiter(map(pow, num_collaborators.tolist(), repeat(SOCIAL_INHIBITION_FACTOR)),
+                                     dtype=float, count=len(num_collaborators))
+        distances = self.agent.distances.agent_to_tasks()
+        utilities = table.amount / num_collaborators - COST_WEIGHT_FACTOR * distances * inhibition
+
+        _max_row = int(np.argmax(utilities))  # First maximum, as max() over the insertion-ordered dict
+        self.current_utilities = dict(zip(table.ids.tolist(), utilities.tolist()))
+        return table.ids[_max_row], float(utilities[_max_row])
+
+    def coalition_sizes(self, table):
+        '''
+        Coalition size per task_table row, counting myself as if I joined (num_collaborator in compute_utility).
+        '''
+        counts = self.partition.counts
+        sizes = np.fromiter((counts.get(task_id, 0) for task_id in table.ids.tolist()), dtype=np.int64, count=len(table))
+        sizes += 1
+        my_row = table.index.get(self.partition.task_of(self.agent.agent_id))
+        if my_row is not None:
+            sizes[my_row] -= 1  # Already a member
+        return sizes
+
     def compute_utility(self, task): # Individual Utility Function  
         if task is None:
             return float('-inf')
 
-        self.partition.setdefault(task.task_id, set()) # Ensure the task_id key exists in the partition. Set tis value as empty set if it doesn't already exist (This is for dynamic task generation)
-        num_collaborator = len(self.partition[task.task_id])
-        if self.agent.agent_id not in self.partition[task.task_id]:
+        num_collaborator = self.partition.size(task.task_id)
+        if self.partition.task_of(self.agent.agent_id) != task.task_id:
             num_collaborator += 1
 
-        distance = (self.agent.position - task.position).length()              
+        distance = self.agent.distances.to_task(task)
         utility = task.amount / (num_collaborator) - COST_WEIGHT_FACTOR * distance * (num_collaborator ** SOCIAL_INHIBITION_FACTOR) 
         return utility
 
@@ -143,24 +200,20 @@ class GRAPE:
         _partition = self.partition
         _time_stamp = self.time_stamp
         
-        for message in messages_received:
-            if message['evolution_number'] > _evolution_number or (message['evolution_number'] == _evolution_number and message['time_stamp'] > _time_stamp):
-                _evolution_number = message['evolution_number']
-                _time_stamp = message['time_stamp']
-                _partition = message['partition']
+        for message in GRAPE_MESSAGE.decode_all(messages_received):
+            if message.evolution_number > _evolution_number or (message.evolution_number == _evolution_number and message.time_stamp > _time_stamp):
+                _evolution_number = message.evolution_number
+                _time_stamp = message.time_stamp
+                _partition = message.partition
 
                 _satisfied = False
         
-        _final_partition = {k: set(v) for k, v in _partition.items()}
+        # Adopting a neighbor's partition is a reference swap (copy-on-write wrapper around the received map)
+        _final_partition = _partition if _partition is self.partition else _partition.copy()
         return _evolution_number, _time_stamp, _final_partition, _satisfied
                 
 
     def get_assigned_task_from_partition(self, partition, tasks_info):
 
-        active_partition = {task_id: members for task_id, members in partition.items() if task_id in tasks_info}
-        _assigned_task_id = next(
-            (task_id for task_id, members in active_partition.items()
-             if self.agent.agent_id in members),
-            None
-        )
-        return tasks_info.get(_assigned_task_id)
+        _assigned_task_id = partition.task_of(self.agent.agent_id)
+        return tasks_info.get(_assigned_task_id) if _assigned_task_id is not None else None
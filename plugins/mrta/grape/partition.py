@@ -0,0 +1,109 @@
+class Partition:
+    '''
+    GRAPE partition stored as an agent_id -> task_id map (each agent is in at most one coalition).
+    Coalition sizes (task_id -> number of agents) are derived from the map on first use and kept up to date.
+
+    Copies are copy-on-write: `copy()` and `snapshot()` share the underlying map, and the first mutation
+    afterwards copies it. D-Mutex adoption of a neighbor's partition is therefore O(1), and the map sent in
+    `message_to_share` is never modified after it is handed out.
+
+    Wire form (GRAPE message 'partition' field): the plain agent_id -> task_id dict.
+    '''
+    __slots__ = ('_assignment', '_counts', '_shared')
+
+    def __init__(self, assignment=None, shared=False):
+        self._assignment = assignment if assignment is not None else {}
+        self._counts = None
+        self._shared = shared
+
+    @classmethod
+    def from_message(cls, assignment):
+        '''Wrap a received map without copying it.'''
+        return cls(assignment, shared=True)
+
+    def snapshot(self):
+        '''Map to put in an outgoing message (shared with this partition until the next mutation).'''
+        self._shared = True
+        return self._assignment
+
+    def copy(self):
+        self._shared = True
+        other = Partition(self._assignment, shared=True)
+        other._counts = self._counts
+        return other
+
+    # ---- queries --------------------------------------------------------
+
+    @property
+    def counts(self):
+        '''task_id -> coalition size (tasks without members are absent).'''
+        if self._counts is None:
+            counts = {}
+            for task_id in self._assignment.values():
+                counts[task_id] = counts.get(task_id, 0) + 1
+            self._counts = counts
+        return self._counts
+
+    def task_of(self, agent_id):
+        return self._assignment.get(agent_id)
+
+    def size(self, task_id):
+        return self.counts.get(task_id, 0)
+
+    def members(self, task_id):
+        return {agent_id for agent_id, assigned in self._assignment.items() if assigned == task_id}
+
+    def __len__(self):
+        return len(self._assignment)
+
+    def __eq__(self, other):
+        if isinstance(other, Partition):
+            return self._assignment == other._assignment
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Partition({self._assignment!r})"
+
+    # ---- mutations --------------------------------------------------------
+
+    def _own(self):
+        if self._shared:
+            self._assignment = dict(self._assignment)
+            if self._counts is not None:
+                self._counts = dict(self._counts)
+            self._shared = False
+
+    def assign(self, agent_id, task_id):
+        '''Move agent_id into task_id's coalition (leaving its previous one).'''
+        previous = self._assignment.get(agent_id)
+        if previous == task_id and agent_id in self._assignment:
+            return
+        self._own()
+        counts = self.counts
+        if agent_id in self._assignment:
+            self._decrement(counts, previous)
+        self._assignment[agent_id] = task_id
+        counts[task_id] = counts.get(task_id, 0) + 1
+
+    def discard(self, agent_id):
+        if agent_id not in self._assignment:
+            return
+        self._own()
+        counts = self.counts
+        self._decrement(counts, self._assignment.pop(agent_id))
+
+    def clear_task(self, task_id):
+        '''Empty task_id's coalition.'''
+        if self.size(task_id) == 0:
+            return
+        self._own()
+        self._assignment = {agent_id: assigned for agent_id, assigned in self._assignment.items() if assigned != task_id}
+        self._counts.pop(task_id, None)
+
+    @staticmethod
+    def _decrement(counts, task_id):
+        remaining = counts.get(task_id, 0) - 1
+        if remaining > 0:
+            counts[task_id] = remaining
+        else:
+            counts.pop(task_id, None)
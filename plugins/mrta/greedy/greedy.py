@@ -1,9 +1,21 @@
 import random
 import pygame
 from modules.utils import config
+from modules.message_schema import MessageSchema, Field
 MODE = config['decision_making']['FirstClaimGreedy']['mode']
 W_FACTOR_COST = config['decision_making']['FirstClaimGreedy']['weight_factor_cost']
 ENFORCED_COLLABORATION = config['decision_making']['FirstClaimGreedy'].get('enforced_collaboration', False)
+SPATIAL_INDEX = config['decision_making']['FirstClaimGreedy'].get('spatial_index', True) # MinDist: nearest unclaimed task from a grid index over blackboard['task_table']
+SPATIAL_INDEX_MIN_TASKS = config['decision_making']['FirstClaimGreedy'].get('spatial_index_min_tasks', 64) # Fewer tasks: scan them all (faster there)
+GRID_CELL_SIZE = config['decision_making']['FirstClaimGreedy'].get('grid_cell_size', 0.0) # Grid cell side (0: about 2 tasks per cell)
+
+# Message shared with neighbors
+GREEDY_MESSAGE = MessageSchema('GreedyMessage', [
+    Field('agent_id'),
+    Field('assigned_task_id'),
+    Field('task_position'),  # 디버깅용
+    Field('cost'),
+])
 
 class FirstClaimGreedy: # Task selection within each agent's `situation_awareness_radius`
     def __init__(self, agent):
@@ -11,6 +23,11 @@ class FirstClaimGreedy: # Task selection within each agent's `situation_awarenes
         self.assigned_task = None
         self.my_cost = {}  # task_id -> 내가 해당 task에 대해 계산한 cost (낮을수록 우선)
 
+        # 이웃 claim 증분 관리: 새 메시지만 반영하고, 바뀐 task의 최소 cost만 다시 계산
+        self._neighbor_claims = {}     # neighbor agent_id -> (task_id, cost)
+        self._task_claims = {}         # task_id -> {neighbor agent_id: cost}
+        self._neighbor_cost_map = {}   # task_id -> 이웃 중 최소 cost
+
     def decide(self, blackboard):
         # Place your decision-making code for each agent
         '''
@@ -24,35 +41,38 @@ class FirstClaimGreedy: # Task selection within each agent's `situation_awarenes
         # Check if the existing task is still available
         self.assigned_task = local_tasks_info.get(assigned_task_id)
 
+        # Build neighbor_cost_map once, reuse in both conflict check and filtering
+        # (매 tick 갱신: 이번 tick의 새 메시지를 놓치지 않도록 조기 반환 전에 호출)
+        neighbor_cost_map = self._build_neighbor_cost_map()
+
         # Give up the decision-making process if there is no task nearby
         if len(local_tasks_info) == 0:
             self.assigned_task = None
-            self.agent.message_to_share = {
-                'agent_id': self.agent.agent_id,
-                'assigned_task_id': None,
-                'cost': None,
-                'task_position': None,
-            }
+            self.agent.message_to_share = GREEDY_MESSAGE.encode(agent_id=self.agent.agent_id)
             return None
 
-        # Build neighbor_cost_map once, reuse in both conflict check and filtering
-        neighbor_cost_map = self._build_neighbor_cost_map()
-        
         # Conflict resolution: 현재 assigned task를 이웃이 더 낮은 cost로 claim했으면 양보
         if self.assigned_task is not None:
             if self._has_priority_conflict_fast(assigned_task_id, neighbor_cost_map):
                 self.assigned_task = None
                 self.my_cost.pop(assigned_task_id, None)
 
+        # MinDist + 공간 인덱스: 이웃이 claim한 task만 걸러내고 주변 셀에서 가장 가까운 task 선택
+        table = blackboard.get('task_table')
+        if (MODE == "MinDist" and SPATIAL_INDEX and table is not None and table.source is local_tasks_info
+                and len(table) >= SPATIAL_INDEX_MIN_TASKS):
+            target_task_id, distance = self.find_min_dist_task_indexed(table, neighbor_cost_map)
+            if target_task_id is None:
+                self.agent.message_to_share = GREEDY_MESSAGE.encode(agent_id=self.agent.agent_id)
+                return None
+            self.assigned_task = local_tasks_info[target_task_id]
+            self.my_cost[target_task_id] = distance
+            return self._share_claim()
+
         # 매 tick마다 재평가: conflict resolution 후 최적 task 선택
         candidates = self.filter_tasks_with_conflict_resolution(list(local_tasks_info.values()), neighbor_cost_map)
         if len(candidates) == 0:
-            self.agent.message_to_share = {
-                'agent_id': self.agent.agent_id,
-                'assigned_task_id': None,
-                'cost': None,
-                'task_position': None,
-            }
+            self.agent.message_to_share = GREEDY_MESSAGE.encode(agent_id=self.agent.agent_id)
             return None
 
         if MODE == "Random":
@@ -65,31 +85,56 @@ class FirstClaimGreedy: # Task selection within each agent's `situation_awarenes
         self.assigned_task = local_tasks_info[target_task_id]
         # 매 tick마다 cost 갱신 (로봇 이동에 따라 변함)
         self.my_cost[target_task_id] = self.compute_cost(self.assigned_task)
+        return self._share_claim()
 
-        self.agent.message_to_share = {
-            'agent_id': self.agent.agent_id,
-            'assigned_task_id': self.assigned_task.task_id,
-            'task_position': {'x': self.assigned_task.position.x, 'y': self.assigned_task.position.y},  # 디버깅용 
-            'cost': self.my_cost.get(self.assigned_task.task_id),
-        }
+    def _share_claim(self):
+        """self.assigned_task claim을 이웃에게 공유하고 그 task_id 반환."""
+        self.agent.message_to_share = GREEDY_MESSAGE.encode(
+            agent_id=self.agent.agent_id,
+            assigned_task_id=self.assigned_task.task_id,
+            task_position={'x': self.assigned_task.position.x, 'y': self.assigned_task.position.y},  # 디버깅용
+            cost=self.my_cost.get(self.assigned_task.task_id),
+        )
 
         return self.assigned_task.task_id
 
     def _build_neighbor_cost_map(self) -> dict:
-        neighbor_cost_map = {}
-        for msg in self.agent.messages_received:
-            # 딕셔너리가 'assigned_task_id'와 'cost'를 항상 가지고 있다면 직접 접근([])이 최선
-            try:
-                t_id = msg['assigned_task_id']
-                c = msg['cost']
-                if t_id is None or c is None: continue
-                
-                # 기존 값보다 작을 때만 갱신 (if-in 보다 get 기본값 활용이 깔끔함)
-                if c < neighbor_cost_map.get(t_id, 1e18): 
-                    neighbor_cost_map[t_id] = c
-            except KeyError:
+        """이웃별 claim(task_id, cost)의 task별 최소 cost.
+        내용이 바뀐 메시지(new_messages_received)와 통신 범위를 벗어난 이웃만 반영한다."""
+        current_ids = {msg.get('agent_id') for msg in self.agent.messages_received}
+        dirty_tasks = set()
+
+        for agent_id in [a for a in self._neighbor_claims if a not in current_ids]:
+            dirty_tasks.add(self._drop_claim(agent_id))
+
+        for msg in GREEDY_MESSAGE.decode_all(self.agent.new_messages_received):
+            agent_id = msg.agent_id
+            dirty_tasks.add(self._drop_claim(agent_id))
+            t_id = msg.assigned_task_id
+            c = msg.cost
+            if t_id is None or c is None:
                 continue
-        return neighbor_cost_map
+            self._neighbor_claims[agent_id] = (t_id, c)
+            self._task_claims.setdefault(t_id, {})[agent_id] = c
+            dirty_tasks.add(t_id)
+
+        for t_id in dirty_tasks:
+            claims = self._task_claims.get(t_id)
+            if claims:
+                self._neighbor_cost_map[t_id] = min(claims.values())
+            else:
+                self._task_claims.pop(t_id, None)
+                self._neighbor_cost_map.pop(t_id, None)
+        return self._neighbor_cost_map
+
+    def _drop_claim(self, agent_id):
+        """이웃의 기존 claim 제거 후 해당 task_id 반환 (claim이 없었으면 None)."""
+        claim = self._neighbor_claims.pop(agent_id, None)
+        if claim is None:
+            return None
+        t_id = claim[0]
+        self._task_claims.get(t_id, {}).pop(agent_id, None)
+        return t_id
 
     def _has_priority_conflict_fast(self, task_id: int, neighbor_cost_map: dict) -> bool:
         """이웃이 나보다 낮은 cost로 task_id를 claim했으면 True 반환."""
@@ -139,6 +184,24 @@ class FirstClaimGreedy: # Task selection within each agent's `situation_awarenes
         _min_task_id = min(_tasks_distance, key=_tasks_distance.get)
         return _min_task_id
 
+    def find_min_dist_task_indexed(self, table, neighbor_cost_map: dict):
+        """find_min_dist_task(filter_tasks_with_conflict_resolution(...))와 같은 결과를 격자 인덱스로 계산.
+        제외 판정은 이웃이 claim한 task에만 필요하므로 neighbor_cost_map만 돌고(my_cost 정리도 동일),
+        최근접 질의는 table.grid_index()의 주변 셀만 본다. 반환: (task_id, 거리) 또는 (None, inf)."""
+        excluded = set()
+        for task_id, neighbor_cost in neighbor_cost_map.items():
+            row = table.index.get(task_id)
+            if row is None:
+                continue
+            my_cost = self.my_cost.get(task_id)
+            if my_cost is None or neighbor_cost < my_cost:
+                excluded.add(row)
+                self.my_cost.pop(task_id, None)
+        row, distance = table.grid_index(GRID_CELL_SIZE).nearest(self.agent.position, excluded)
+        if row is None:
+            return None, distance
+        return table.ids[row], distance
+
     def find_max_utility_task(self, tasks_info):
         _current_utilities = {
             task.task_id: self.compute_utility(task) for task in tasks_info
@@ -160,12 +223,12 @@ class FirstClaimGreedy: # Task selection within each agent's `situation_awarenes
         if task is None:
             return float('-inf')
 
-        distance = (self.agent.position - task.position).length()
+        distance = self.agent.distances.to_task(task)
         return task.amount - W_FACTOR_COST * distance
 
     def compute_distance(self, task): # Individual Utility Function
         if task is None:
             return float('inf')
 
-        distance = (self.agent.position - task.position).length()
+        distance = self.agent.distances.to_task(task)
         return distance
@@ -1,12 +1,47 @@
 import numpy as np
-from collections import deque
 from scipy.optimize import linear_sum_assignment
-from modules.utils import config
+from modules.utils import config, NeighborState, TaskRecord
+from modules.message_schema import MessageSchema, Field
+from plugins.mrta.hungarian.dynamic_hungarian import DynamicAssignment
+from plugins.mrta.hungarian.link_state import LinkStateDatabase
+from plugins.mrta.hungarian.sparse_assignment import sparse_assignment
 from enum import Enum
 
 # Configuration
 LAMBDA = config['decision_making']['Hungarian']['task_reward_discount_factor']
 DUMMY_COST = config['decision_making']['Hungarian']['dummy_cost']
+EPSILON = float(config['decision_making']['Hungarian'].get('epsilon', 1e-10)) # Cost change / tightness tolerance of the warm-started assignment
+DYNAMIC_ASSIGNMENT = config['decision_making']['Hungarian'].get('dynamic_assignment', True) # Repair the previous matching instead of solving from scratch
+FULL_SOLVE_FRACTION = config['decision_making']['Hungarian'].get('full_solve_fraction', 0.3) # Solve from scratch when more rows than this are unmatched by the changes
+WARM_START_MIN_SIZE = config['decision_making']['Hungarian'].get('warm_start_min_size', 64) # Smaller clusters are solved with scipy directly every tick
+SPARSE_MIN_SIZE = config['decision_making']['Hungarian'].get('sparse_min_size', 200) # Clusters with max(agents, tasks) >= this use the sparse k-nearest mode (0: never)
+SPARSE_K = config['decision_making']['Hungarian'].get('sparse_k', 10) # Candidate tasks per agent in the sparse mode
+LINK_STATE_LOG = config['decision_making']['Hungarian'].get('link_state_log', 64) # Recent LSA origins sent so neighbors read only what changed
+LINK_STATE_REBUILD_FRACTION = config['decision_making']['Hungarian'].get('link_state_rebuild_fraction', 0.5) # Rebuild links/components in one pass when this fraction of LSAs changed in a tick
+AGENT_SPEED = 0.5 # Speed used for the time-discounted weights
+
+
+def _agent_records(items):
+    return [a if isinstance(a, NeighborState) else NeighborState.from_dict(a) for a in items]
+
+
+def _task_records(items):
+    return [t if isinstance(t, TaskRecord) else TaskRecord.from_dict(t) for t in items]
+
+
+# Message shared with neighbors (agents_info / tasks_info entries are decoded to records)
+HUNGARIAN_MESSAGE = MessageSchema('HungarianMessage', [
+    Field('agent_id'),
+    Field('link_states', factory=dict),  # Link-state database: origin agent_id -> [seq, neighbor ids]
+    Field('link_state_version'),  # Increases by one per LSA accepted into link_states
+    Field('link_state_log', factory=list),  # Origins of the last accepted LSAs (the last one at link_state_version)
+    Field('position'),
+    Field('agents_info', factory=list, decode=_agent_records),
+    Field('tasks_info', factory=list, decode=_task_records),
+    Field('completed_tasks', factory=set),
+    Field('assigned_task_id'),
+    Field('gamma', default=0),  # Countervalue for lead robot selection
+])
 
 class Phase(Enum):
     SYNC = 1
@@ -35,13 +70,22 @@ class DistributedHungarian:
         self.task_idx_to_id = {}
         self.task_idx_to_obj = {}
         
+        # Warm-started assignment engine (keeps the matching and dual potentials between ticks)
+        self.assignment = DynamicAssignment(DUMMY_COST, EPSILON, FULL_SOLVE_FRACTION, WARM_START_MIN_SIZE)
+
         # Assignment tracking
         self.assigned_task = None
         self.completed_tasks = set()
         self.gamma = 0  # Countervalue γ^i (논문의 Build_Latest_Graph 수렴 추적)
 
+        # Link-state view of the communication graph (cluster membership R)
+        self.link_state = LinkStateDatabase(agent.agent_id, LINK_STATE_LOG, LINK_STATE_REBUILD_FRACTION)
+        self._r_ids = []             # sorted ids of my component
+        self._r_version = None       # link_state.version that _r_ids was computed for
+        self._p_ids = frozenset()    # task ids of P
+        self._p_order = []           # ... sorted (re-sorted only when the set changes)
+
         # Init message
-        self.global_adjacency = {}
         self._update_message()
 
     # ==============================================================
@@ -52,7 +96,8 @@ class DistributedHungarian:
         previous_assigned_task_id = self.assigned_task.task_id if self.assigned_task is not None else None  # For Debug        
 
         _local_tasks_info = blackboard.get('local_tasks_info', {})
-        messages = self.agent.messages_received
+        # Neighbor messages decoded once per tick (messages without a sender id are ignored)
+        messages = [m for m in HUNGARIAN_MESSAGE.decode_all(self.agent.messages_received) if m.agent_id is not None]
         
         # Handle completed task
         self.assigned_task = _local_tasks_info.get(previous_assigned_task_id)        
@@ -101,21 +146,14 @@ class DistributedHungarian:
 
     def _detect_cluster_changes(self, messages):
         """군집 내 멤버 변경(유입/이탈) 감지"""
-        current_r_ids = {getattr(a, 'agent_id', a.get('agent_id') if isinstance(a, dict) else None) for a in self.R}
+        current_r_ids = {a.agent_id for a in self.R}
         perceived_ids = {self.agent.agent_id}
         
-        for a in messages:
-            perceived_ids.add(a.get('agent_id'))
-            
         for msg in messages:
-            if msg:
-                for agent in msg.get('agents_info', []):
-                    aid = getattr(agent, 'agent_id', None)
-                    if aid is None and isinstance(agent, dict):
-                        aid = agent.get('agent_id')
-                    
-                    if aid is not None:
-                        perceived_ids.add(aid)
+            perceived_ids.add(msg.agent_id)
+            for agent in msg.agents_info:
+                if agent.agent_id is not None:
+                    perceived_ids.add(agent.agent_id)
         
         if not current_r_ids.issubset(perceived_ids):
             self.gamma = 0
@@ -129,103 +167,66 @@ class DistributedHungarian:
 
     def _build_latest_graph(self, messages, local_tasks):
         """Sync Graph"""
-        valid_msgs = [m for m in messages if m and 'agent_id' in m]
-        
         # 1. Collect Candidates
-        candidates = {self.agent.agent_id:
-                        {
-                            'agent_id': self.agent.agent_id,
-                            'position': self.agent.position
-                        }
-                    }
+        candidates = {self.agent.agent_id: NeighborState(self.agent.agent_id, self.agent.position)}
         for msg in messages:
-            candidates[msg['agent_id']] = {
-                'agent_id': msg['agent_id'],
-                'position': msg.get('position', None)}
-        for msg in valid_msgs:
-            for agent in msg.get('agents_info', []):
-                aid = getattr(agent, 'agent_id', None)
-                if aid is None and isinstance(agent, dict):
-                    aid = agent.get('agent_id')
-                
+            candidates[msg.agent_id] = NeighborState(msg.agent_id, msg.position)
+        for msg in messages:
+            for agent in msg.agents_info:
+                aid = agent.agent_id
                 if aid is not None and aid not in candidates:
                     candidates[aid] = agent
         
-        # 2. Link State Graph Reconstruction
-        # We maintain a global view `self.global_adjacency`.
-        # Rule: We TRUST the direct neighbor's report about THEMSELF.
-        # But we also accumulate their view of the world to bridge gaps.
-        
+        # 2. Link State Database
+        # 내 LSA(이번 틱에 들은 이웃)를 갱신하고, 이웃의 데이터베이스는 버전이 바뀐 경우에만 origin별 seq로 병합한다.
+        # 링크/연결 요소는 component()에서 틱당 한 번, 바뀐 origin만 반영한다 (많이 바뀌면 한 번에 재구성).
         _agent_id = self.agent.agent_id
-        
-        # 2.1 Update My Local View in Global Graph
-        my_neighbors = {msg['agent_id'] for msg in messages if 'agent_id' in msg}
-
-        # 2.2 Merge Neighbors' Views via Link State Advertisement
-        new_global_adj = {_agent_id: my_neighbors}
-        
-        for msg in valid_msgs:
-            sender_id = msg.get('agent_id')
-            if sender_id is None: continue
-            
-            # Merge Sender's Full Graph
-            received_graph = msg.get('adjacency_graph', {})
-            for node, neighbors in received_graph.items():
-                if node not in new_global_adj:
-                    new_global_adj[node] = set(neighbors)
-                else:
-                    new_global_adj[node].update(neighbors)
-                    
-        self.global_adjacency = new_global_adj
-
-        # BFS to find Connected Component (Reachability)
-        visited = {_agent_id}
-        queue = deque([_agent_id])
-
-        while queue:
-            curr = queue.popleft()
-            for n in self.global_adjacency.get(curr, set()):
-                if n not in visited:
-                    visited.add(n)
-                    if n in self.global_adjacency:
-                        queue.append(n)
+        self.link_state.set_local_links(msg.agent_id for msg in messages)
+        for msg in messages:
+            self.link_state.receive(msg.agent_id, msg.link_state_version, msg.link_states, msg.link_state_log)
+        visited = self.link_state.component()
 
         # Update R
-        self.R = [candidates[aid] for aid in sorted(visited) if aid in candidates]
+        if self._r_version != self.link_state.version:
+            self._r_ids = sorted(visited)
+            self._r_version = self.link_state.version
+        self.R = [candidates[aid] for aid in self._r_ids if aid in candidates]
         new_R_ids = visited
         
         # Update P
         observed_task_ids = {t.task_id for t in local_tasks.values()}
 
         # Collect tasks from all reachable neighbors
-        current_p_map = {getattr(t, 'task_id', t.get('task_id') if isinstance(t, dict) else None): t for t in self.P}
+        current_p_map = {t.task_id: t for t in self.P}
         for t in local_tasks.values():
             current_p_map[t.task_id] = t
 
         # Handle Completed Tasks + tasks_info (merged loop)
-        for msg in valid_msgs:
-            if msg['agent_id'] not in new_R_ids:
+        for msg in messages:
+            if msg.agent_id not in new_R_ids:
                 continue
-            for tid in msg.get('completed_tasks', set()):
+            for tid in msg.completed_tasks:
                 if tid not in self.completed_tasks:
                     self.completed_tasks.add(tid)
-            for t in msg.get('tasks_info', []):
-                tid = getattr(t, 'task_id', t.get('task_id') if isinstance(t, dict) else None)
+            for t in msg.tasks_info:
+                tid = t.task_id
                 if tid is not None and tid not in self.completed_tasks:
                     observed_task_ids.add(tid)
                     current_p_map[tid] = t
 
-        # Filter P
-        self.P = [t for tid, t in current_p_map.items() if tid in observed_task_ids and tid not in self.completed_tasks]
-        self.P.sort(key=lambda t: getattr(t, 'task_id', t.get('task_id') if isinstance(t, dict) else None))
+        # Filter P (task_id 순서는 task 집합이 바뀔 때만 다시 정렬)
+        p_ids = frozenset(tid for tid in current_p_map if tid in observed_task_ids and tid not in self.completed_tasks)
+        if p_ids != self._p_ids:
+            self._p_ids = p_ids
+            self._p_order = sorted(p_ids)
+        self.P = [current_p_map[tid] for tid in self._p_order]
 
         # Lead Robot Selection via γ (논문의 Build_Latest_Graph)
         # γ가 가장 높은 로봇(= 가장 수렴된 상태)의 countervalue를 상속
         neighbor_gammas = {_agent_id: self.gamma}
-        for msg in valid_msgs:
-            sender = msg.get('agent_id')
-            if sender in visited:
-                neighbor_gammas[sender] = msg.get('gamma', 0)
+        for msg in messages:
+            if msg.agent_id in visited:
+                neighbor_gammas[msg.agent_id] = msg.gamma
 
         lead_id = max(neighbor_gammas, key=neighbor_gammas.get)
         lead_gamma = neighbor_gammas[lead_id]
@@ -236,25 +237,19 @@ class DistributedHungarian:
     # Messaging
     # ==============================================================
     def _update_message(self):
-        # Prepare Graph to Send
-        graph_to_send = self.global_adjacency.copy()
-        # Ensure my fresh local view is in the message
-        _agent_id = self.agent.agent_id
-        graph_to_send[_agent_id] = {
-            msg.get('agent_id') for msg in self.agent.messages_received
-            if msg and 'agent_id' in msg
-        }
-
-        self.agent.message_to_share = {
-                                       'agent_id': _agent_id,
-                                       'adjacency_graph': graph_to_send, # Send Full Graph
-                                       'position': self.agent.position,
-                                       'agents_info': self.R, # Send Full Agent Objects (Data Payload)
-                                       'tasks_info': self.P, # Send Full Task Objects (Data Payload)
-                                       'completed_tasks': self.completed_tasks,
-                                       'assigned_task_id': self.assigned_task.task_id if self.assigned_task else None,
-                                       'gamma': self.gamma,  # Countervalue for lead robot selection
-                                       }
+        link_states, link_state_log = self.link_state.wire()
+        self.agent.message_to_share = HUNGARIAN_MESSAGE.encode(
+            agent_id=self.agent.agent_id,
+            link_states=link_states, # Link-state database (same dict object until it changes)
+            link_state_version=self.link_state.version,
+            link_state_log=link_state_log,
+            position=self.agent.position,
+            agents_info=self.R, # Send Full Agent Objects (Data Payload)
+            tasks_info=self.P, # Send Full Task Objects (Data Payload)
+            completed_tasks=self.completed_tasks,
+            assigned_task_id=self.assigned_task.task_id if self.assigned_task else None,
+            gamma=self.gamma,
+            )
 
     def _update_visualization(self):
         if self.assigned_task:
@@ -268,18 +263,69 @@ class DistributedHungarian:
     
     def _run_centralized_hungarian(self):
         """Run standard Hungarian locally on self.R and self.P"""
-        self._build_weights_matrix()
-
-        w = np.where(np.isinf(self.weights), 1e9, self.weights)
-        row_ind, col_ind = linear_sum_assignment(w)
-        matching = list(zip(row_ind.tolist(), col_ind.tolist()))
+        matching = None
+        if SPARSE_MIN_SIZE and max(len(self.R), len(self.P)) >= SPARSE_MIN_SIZE:
+            matching = self._solve_sparse()  # None: the k nearest tasks cannot cover the cluster, solve it dense
+        if matching is None:
+            if DYNAMIC_ASSIGNMENT and max(len(self.R), len(self.P)) >= WARM_START_MIN_SIZE:
+                matching = self._solve_dynamic()
+            else:
+                self.assignment.reset()  # Small cluster: scipy directly (the engine's bookkeeping costs more)
+                self._build_weights_matrix()
+                w = np.where(np.isinf(self.weights), 1e9, self.weights)
+                row_ind, col_ind = linear_sum_assignment(w)
+                matching = list(zip(row_ind.tolist(), col_ind.tolist()))
 
         result = self._assign_from_matching(matching)
         self.gamma += 1  # 매칭 완료 시 γ 증가 (논문의 Local_Hungarian 수렴 카운터)
         return result
 
         
+    def _solve_dynamic(self):
+        """Warm-started assignment: rows/columns keyed by agent/task id, weights recomputed only for moved/new ones"""
+        agent_keys = [(a.position.x, a.position.y) for a in self.R]
+        task_keys = [(t.position.x, t.position.y) for t in self.P]
+        agent_pos = np.array(agent_keys, dtype=float).reshape(-1, 2)
+        task_pos = np.array(task_keys, dtype=float).reshape(-1, 2)
+        col_for_row = self.assignment.solve(
+            [a.agent_id for a in self.R], [t.task_id for t in self.P], agent_keys, task_keys,
+            lambda rows, cols: self._weights(agent_pos[rows], task_pos[cols]))
+        self._build_index_maps()
+        return list(enumerate(col_for_row.tolist()))  # -1: dummy task
+
+    def _solve_sparse(self):
+        """Large clusters: only each agent's SPARSE_K nearest tasks are candidates (sparse rectangular assignment)"""
+        agent_pos = np.array([[a.position.x, a.position.y] for a in self.R], dtype=float).reshape(-1, 2)
+        task_pos = np.array([[t.position.x, t.position.y] for t in self.P], dtype=float).reshape(-1, 2)
+        col_for_row = sparse_assignment(agent_pos, task_pos, SPARSE_K, self._weights_of_distances)
+        if col_for_row is None:
+            return None
+        self._build_index_maps()
+        return list(enumerate(col_for_row.tolist()))  # -1: no task
+
+    @staticmethod
+    def _weights_of_distances(distances):
+        return 1.0 / (LAMBDA ** (distances / AGENT_SPEED))
+
+    @classmethod
+    def _weights(cls, agent_pos, task_pos):
+        diff = agent_pos[:, np.newaxis, :] - task_pos[np.newaxis, :, :]
+        distances = np.sqrt((diff ** 2).sum(axis=2))
+        return cls._weights_of_distances(distances)
+
     def _build_weights_matrix(self):
+        num_agents, num_tasks = self._build_index_maps()
+        n = max(num_agents, num_tasks)
+        weights = np.full((n, n), DUMMY_COST, dtype=float)
+
+        if num_agents > 0 and num_tasks > 0:
+            agent_pos = np.array([[a.position.x, a.position.y] for a in self.R])
+            task_pos  = np.array([[t.position.x, t.position.y] for t in self.P])
+            weights[:num_agents, :num_tasks] = self._weights(agent_pos, task_pos)
+
+        self.weights = weights
+
+    def _build_index_maps(self):
         # Flatten R and P for matrix construction
         local_agents = self.R
         local_tasks = self.P
@@ -294,27 +340,13 @@ class DistributedHungarian:
         # Build mappings
         self.agent_idx_to_id = {}
         for i, a in enumerate(local_agents):
-            aid = getattr(a, 'agent_id', None)
-            if aid is None and isinstance(a, dict):
-                aid = a.get('agent_id')
-            self.agent_idx_to_id[i] = aid
+            self.agent_idx_to_id[i] = a.agent_id
             
         self.task_idx_to_id = {}
         self.task_idx_to_obj = {}
         for j, t in enumerate(local_tasks):
-            tid = getattr(t, 'task_id', t.get('task_id') if isinstance(t, dict) else None)
-            self.task_idx_to_id[j] = tid
+            self.task_idx_to_id[j] = t.task_id
             self.task_idx_to_obj[j] = t
-            
-        weights = np.full((n, n), DUMMY_COST, dtype=float)
-
-        if num_agents > 0 and num_tasks > 0:
-            AGENT_SPEED = 0.5
-            agent_pos = np.array([[a.get('position').x, a.get('position').y] for a in local_agents])
-            task_pos  = np.array([[t.position.x, t.position.y] for t in local_tasks])
-            diff = agent_pos[:, np.newaxis, :] - task_pos[np.newaxis, :, :]
-            distances = np.sqrt((diff ** 2).sum(axis=2))
-            weights[:num_agents, :num_tasks] = 1.0 / (LAMBDA ** (distances / AGENT_SPEED))
 
         # Setting Dummies
         if num_agents > num_tasks:
@@ -324,8 +356,7 @@ class DistributedHungarian:
         elif num_agents < num_tasks:
             for i in range(num_agents, n):
                 self.agent_idx_to_id[i] = f"dummy_agent_{i}"
-        
-        self.weights = weights
+        return num_agents, num_tasks
 
     def _assign_from_matching(self, matching):
         # Identify my assignment
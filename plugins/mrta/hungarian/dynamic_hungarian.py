@@ -0,0 +1,303 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+INFEASIBLE_COST = 1e9  # stands in for inf entries (as in the full solve)
+
+
+class DynamicAssignment:
+    '''
+    Warm-started (dynamic) Hungarian assignment over rows (agents) and columns (tasks) identified by id.
+
+    Each row/column also carries a key (e.g. its position): the cost of an entry may only change when the key
+    of its row or column changes. The engine keeps the square cost matrix (real block padded with `dummy_cost`
+    rows/columns), the optimal matching and its dual potentials u (rows) and v (columns). On the next solve:
+      1. rows/columns are matched to the previous ones by id (dummy slots by position); inserted ones are new,
+         deleted ones free their partner. Costs are computed only for new rows/columns and for the ones whose
+         key changed (`cost_fn`), so an unchanged tick costs O(n) and one moved agent O(n) cost entries;
+      2. the duals of the changed and new columns are recomputed as the column minimum of the reduced costs
+         over the other rows, then those of the changed and new rows as the row minimum over every column,
+         which restores dual feasibility everywhere;
+      3. repaired matched pairs that are no longer tight (reduced cost > `tolerance`) are unmatched;
+      4. every free row is re-inserted with one shortest augmenting path (Dijkstra on reduced costs), which
+         keeps the duals feasible and the matching optimal (the step scipy's solver repeats from scratch).
+    When more than `full_solve_fraction` of the rows are free after the repair (or there is no previous
+    solution), it solves from scratch with scipy and recovers the duals of that matching with Bellman-Ford
+    on the column graph. Below `min_warm_size` slots the fixed cost of the repair steps exceeds scipy's
+    solve: changed small problems are solved from scratch without duals (unchanged ticks still reuse the
+    previous matching).
+
+    Every agent of a cluster solves the same problem and acts on its own row only, so the result must not
+    depend on the engine's history. A repaired matching is kept only when no other assignment of equal
+    total cost (within tolerance) gives a real row a different column; on such a tie the problem is solved
+    from scratch on a freshly built matrix, i.e. exactly what a cold solve returns.
+    '''
+
+    def __init__(self, dummy_cost=0.0, tolerance=1e-10, full_solve_fraction=0.3, min_warm_size=0):
+        self.dummy_cost = dummy_cost
+        self.tolerance = tolerance
+        self.full_solve_fraction = full_solve_fraction
+        self.min_warm_size = min_warm_size
+        self.reset()
+        self.last_mode = None     # 'full', 'warm' or 'reuse' (for benchmarks / debugging)
+        self.last_augmentations = 0
+
+    def reset(self):
+        self._row_ids, self._col_ids = [], []
+        self._row_keys, self._col_keys = [], []
+        self._cost = np.zeros((0, 0))
+        self._u = self._v = None  # None: matching without duals (solved below min_warm_size)
+        self._col4row = np.zeros(0, dtype=np.intp)
+        self._row4col = np.zeros(0, dtype=np.intp)
+
+    def solve(self, row_ids, col_ids, row_keys, col_keys, cost_fn):
+        '''
+        row_ids / col_ids:   ids of the real rows / columns
+        row_keys / col_keys: per row / column, anything comparable with == (the cost inputs, e.g. positions)
+        cost_fn(rows, cols): cost block for row and column index arrays (into row_ids / col_ids); inf allowed
+        Returns the matched column index (into col_ids) per real row, -1 for rows matched to a dummy column.
+        '''
+        row_ids, col_ids, row_keys, col_keys = list(row_ids), list(col_ids), list(row_keys), list(col_keys)
+        num_rows, num_cols = len(row_ids), len(col_ids)
+        n = max(num_rows, num_cols)
+        if n == 0:
+            self.reset()
+            self.last_mode, self.last_augmentations = 'reuse', 0
+            return np.zeros(0, dtype=np.intp)
+
+        if not self._repair(row_ids, col_ids, row_keys, col_keys, cost_fn):
+            # Built from scratch (not the repaired matrix) so the costs are bit-identical to a cold solve's
+            matrix = np.full((n, n), self.dummy_cost, dtype=float)
+            if num_rows and num_cols:
+                self._fill(matrix, np.arange(num_rows), np.arange(num_cols), cost_fn, full=True)
+            self._full_solve(matrix, with_duals=n >= self.min_warm_size)
+            self._cost = matrix
+        self._row_ids, self._col_ids, self._row_keys, self._col_keys = row_ids, col_ids, row_keys, col_keys
+
+        col4row = self._col4row[:num_rows]
+        return np.where(col4row < num_cols, col4row, -1)
+
+    @staticmethod
+    def _fill(matrix, rows, cols, cost_fn, full=False):
+        '''Write cost_fn(rows, cols) into matrix (`full`: rows/cols are every real row/column, i.e. a slice).'''
+        block = np.asarray(cost_fn(rows, cols), dtype=float)
+        if full:
+            target = matrix[:len(rows), :len(cols)]
+            target[...] = block
+            np.copyto(target, INFEASIBLE_COST, where=np.isinf(target))
+        else:
+            matrix[np.ix_(rows, cols)] = np.where(np.isinf(block), INFEASIBLE_COST, block)
+
+    # ---- warm start ---------------------------------------------------------
+
+    @staticmethod
+    def _slot_map(old_ids, new_ids, old_n, new_n):
+        '''New slot -> old slot (-1 for new). Real slots by id; dummy slots by position among the dummies.'''
+        old_index = {slot_id: k for k, slot_id in enumerate(old_ids)}
+        src = np.full(new_n, -1, dtype=np.intp)
+        src[:len(new_ids)] = [old_index.get(slot_id, -1) for slot_id in new_ids]
+        dummies = min(new_n - len(new_ids), old_n - len(old_ids))
+        src[len(new_ids):len(new_ids) + dummies] = np.arange(len(old_ids), len(old_ids) + dummies)
+        return src
+
+    @staticmethod
+    def _changed(src, old_keys, new_keys):
+        '''Real slots that are new or whose key changed.'''
+        return np.array([k < 0 or old_keys[k] != key for k, key in zip(src[:len(new_keys)].tolist(), new_keys)],
+                        dtype=bool)
+
+    def _repair(self, row_ids, col_ids, row_keys, col_keys, cost_fn):
+        '''Warm-start from the previous solution. Returns False when a full solve is needed.'''
+        old_n = len(self._cost)
+        num_rows, num_cols = len(row_ids), len(col_ids)
+        n = max(num_rows, num_cols)
+        if old_n == 0:
+            return False
+        tol = self.tolerance
+
+        same_slots = n == old_n and row_ids == self._row_ids and col_ids == self._col_ids
+        if same_slots and row_keys == self._row_keys and col_keys == self._col_keys:
+            self.last_mode, self.last_augmentations = 'reuse', 0
+            return True
+        if self._u is None or n < self.min_warm_size:
+            return False
+
+        if same_slots:
+            # Same rows and columns (the usual tick): only keys changed
+            identity = np.arange(n)
+            changed_rows = self._changed(identity, self._row_keys, row_keys)
+            changed_cols = self._changed(identity, self._col_keys, col_keys)
+            matrix = self._cost  # updated in place (never handed out)
+            u, v, col4row = self._u, self._v, self._col4row
+            repair_rows, repair_cols = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        else:
+            row_src = self._slot_map(self._row_ids, row_ids, old_n, n)
+            col_src = self._slot_map(self._col_ids, col_ids, old_n, n)
+            kept_rows, kept_cols = np.flatnonzero(row_src >= 0), np.flatnonzero(col_src >= 0)
+            changed_rows = self._changed(row_src, self._row_keys, row_keys)
+            changed_cols = self._changed(col_src, self._col_keys, col_keys)
+
+            # Carry costs, duals and the matching over (partners of deleted slots become free)
+            matrix = np.full((n, n), self.dummy_cost, dtype=float)
+            matrix[np.ix_(kept_rows, kept_cols)] = self._cost[np.ix_(row_src[kept_rows], col_src[kept_cols])]
+            u, v = np.zeros(n), np.zeros(n)
+            u[kept_rows] = self._u[row_src[kept_rows]]
+            v[kept_cols] = self._v[col_src[kept_cols]]
+            new_col_of_old = np.full(old_n, -1, dtype=np.intp)
+            new_col_of_old[col_src[kept_cols]] = kept_cols
+            col4row = np.full(n, -1, dtype=np.intp)
+            col4row[kept_rows] = new_col_of_old[self._col4row[row_src[kept_rows]]]
+            repair_rows, repair_cols = row_src < 0, col_src < 0  # new slots (dummies included)
+
+        # New costs for the changed / new real lines
+        rows, cols = np.flatnonzero(changed_rows), np.flatnonzero(changed_cols)
+        if len(rows) and num_cols:
+            self._fill(matrix, rows, np.arange(num_cols), cost_fn)
+        if len(cols) and num_rows:
+            self._fill(matrix, np.setdiff1d(np.arange(num_rows), rows), cols, cost_fn)
+        repair_rows[rows] = True
+        repair_cols[cols] = True
+
+        # Dual repair: columns against the rows that keep their dual, then rows against every column
+        if repair_cols.any():
+            steady_rows = ~repair_rows
+            if steady_rows.any():
+                v[repair_cols] = (matrix[np.ix_(steady_rows, repair_cols)] - u[steady_rows, np.newaxis]).min(axis=0)
+            else:
+                v[repair_cols] = 0.0
+        if repair_rows.any():
+            u[repair_rows] = (matrix[repair_rows] - v).min(axis=1)
+
+        # Keep only matched pairs that are still tight (only repaired duals can have moved)
+        touched = repair_rows.copy()
+        matched = np.flatnonzero(col4row >= 0)
+        touched[matched] |= repair_cols[col4row[matched]]
+        matched = np.flatnonzero(touched & (col4row >= 0))
+        slack = matrix[matched, col4row[matched]] - u[matched] - v[col4row[matched]]
+        col4row[matched[slack > tol]] = -1
+
+        free_rows = np.flatnonzero(col4row < 0)
+        if len(free_rows) > self.full_solve_fraction * n:
+            return False
+        row4col = np.full(n, -1, dtype=np.intp)
+        matched = np.flatnonzero(col4row >= 0)
+        row4col[col4row[matched]] = matched
+
+        for row in free_rows.tolist():
+            self._augment(matrix, u, v, col4row, row4col, row)
+        if self._has_tie(matrix, u, v, col4row, num_rows, num_cols):
+            return False
+        self._cost, self._u, self._v, self._col4row, self._row4col = matrix, u, v, col4row, row4col
+        self.last_mode, self.last_augmentations = 'warm', len(free_rows)
+        return True
+
+    def _has_tie(self, matrix, u, v, col4row, num_rows, num_cols):
+        '''
+        True when another optimal matching gives some real row a different column (the repaired matching
+        then depends on the path that led to it, a cold solve's on scipy's tie-break).
+
+        Alternative optimal matchings are alternating cycles of tight edges: in the column graph with an edge
+        c -> c' when the row matched to c is tight on c', any cycle. Dummy columns and the columns held by
+        dummy rows are interchangeable among themselves without changing a real row's column, so they are
+        merged into one node first (dummy rows have equal costs and duals: one of them gives its edges).
+        A cycle exists iff a strongly connected component has more than one node.
+        '''
+        n = len(matrix)
+        rows = np.arange(min(num_rows + 1, n))
+        row_index, targets = np.nonzero(matrix[rows] - u[rows, np.newaxis] - v <= self.tolerance * n)
+        sources = col4row[row_index]
+        node = np.arange(n)
+        spare = node >= num_cols
+        spare[col4row[num_rows:]] = True
+        if spare.any():
+            node[spare] = np.flatnonzero(spare)[0]
+        sources, targets = node[sources], node[targets]
+        edges = sources != targets
+        for _ in range(16):
+            # Cheap passes first: an edge from a node without incoming edges or to one without outgoing edges
+            # is on no cycle (the tight graph is usually a few short chains)
+            sources, targets = sources[edges], targets[edges]
+            if len(sources) == 0:
+                return False
+            has_out, has_in = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+            has_out[sources] = True
+            has_in[targets] = True
+            edges = has_in[sources] & has_out[targets]
+            if edges.all():
+                break
+        else:
+            sources, targets = sources[edges], targets[edges]
+        graph = csr_matrix((np.ones(len(sources)), (sources, targets)), shape=(n, n))
+        _, labels = connected_components(graph, directed=True, connection='strong')
+        return np.bincount(labels).max() > 1
+
+    @staticmethod
+    def _augment(matrix, u, v, col4row, row4col, free_row):
+        '''One shortest augmenting path from free_row (Dijkstra on reduced costs), then the dual update.'''
+        n = len(matrix)
+        shortest = np.full(n, np.inf)
+        path = np.full(n, -1, dtype=np.intp)
+        scanned_cols = np.zeros(n, dtype=bool)
+        scanned_rows = []
+        min_val = 0.0
+        row = free_row
+        while True:
+            scanned_rows.append(row)
+            reduced = min_val + matrix[row] - u[row] - v
+            better = ~scanned_cols & (reduced < shortest)
+            path[better] = row
+            shortest[better] = reduced[better]
+            candidates = np.where(scanned_cols, np.inf, shortest)
+            min_val = candidates.min()
+            ties = np.flatnonzero(candidates == min_val)
+            unassigned = ties[row4col[ties] < 0]
+            sink = unassigned[0] if len(unassigned) else ties[0]  # prefer ending the path
+            scanned_cols[sink] = True
+            if row4col[sink] < 0:
+                break
+            row = row4col[sink]
+
+        # Duals: tree rows and scanned columns move by the distance they are short of the sink
+        u[free_row] += min_val
+        others = np.array(scanned_rows[1:], dtype=np.intp)
+        u[others] += min_val - shortest[col4row[others]]
+        v[scanned_cols] -= min_val - shortest[scanned_cols]
+
+        # Flip the alternating path
+        col = sink
+        while True:
+            row = path[col]
+            row4col[col] = row
+            col4row[row], col = col, col4row[row]
+            if row == free_row:
+                break
+
+    # ---- cold start ---------------------------------------------------------
+
+    def _full_solve(self, matrix, with_duals=True):
+        n = len(matrix)
+        rows, cols = linear_sum_assignment(matrix)
+        col4row = np.empty(n, dtype=np.intp)
+        col4row[rows] = cols
+        row4col = np.empty(n, dtype=np.intp)
+        row4col[cols] = rows
+        self._col4row, self._row4col = col4row, row4col
+        self.last_mode, self.last_augmentations = 'full', n
+        if not with_duals:
+            self._u = self._v = None
+            return
+
+        # Duals of the optimal matching: v = shortest distances on the column graph where moving the row of
+        # column a to column b costs matrix[row4col[a], b] - matrix[row4col[a], a] (no negative cycles at the
+        # optimum), then u from the tight matched edges.
+        matched_cost = matrix[rows, cols]
+        weights = matrix[row4col] - matched_cost[row4col][:, np.newaxis]  # weights[a, b]
+        distance = np.zeros(n)
+        for _ in range(n):
+            relaxed = np.minimum(distance, (distance[:, np.newaxis] + weights).min(axis=0))
+            if np.array_equal(relaxed, distance):
+                break
+            distance = relaxed
+        self._v = distance
+        self._u = matched_cost - distance[col4row]  # rows come back as 0..n-1
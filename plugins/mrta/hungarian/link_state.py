@@ -0,0 +1,225 @@
+from collections import deque
+from itertools import count
+
+
+class LinkStateDatabase:
+    '''
+    Link-state view of the communication graph for the distributed Hungarian cluster (R) membership.
+
+    Every agent originates one link-state advertisement (LSA): its sequence number and the ids it currently hears.
+    The sequence number increases only when that neighbor set changes. Receivers keep, per origin, the LSA with the
+    highest sequence number, so an old view relayed by a neighbor can never overwrite a newer one (and links of
+    agents that left disappear instead of circulating between neighbors forever).
+
+    A link u-v is up when both u's and v's LSAs list each other (two-way check); this agent's own links are the ids
+    it hears this tick, since they are fresher than any relayed LSA.
+
+    Incremental work:
+      - `version` increases by one per accepted LSA and the log lists the origins of the last `log_limit` of them.
+        A neighbor whose version did not change since the last tick is skipped; one that is at most `log_limit`
+        versions ahead is read only for the logged origins. Otherwise its whole database is compared.
+      - Links and components are brought up to date once per tick, in component(), for the origins whose
+        neighbor set changed since the last call (an origin that changed several times is diffed once).
+      - Connected components are kept as a node -> label map (the smaller component is relabelled on a merge).
+        Only a removed link searches the graph: a BFS from both of its ends that stops as soon as they meet, so
+        the work is bounded by the smaller side when the component does split.
+      - When the changed origins are at least `rebuild_fraction` of the database (small clusters with moving
+        agents), links and components are rebuilt in one pass instead, which is cheaper than diffing them.
+
+    Wire form (message fields): {origin: [seq, [neighbor ids]]} and the log (list of origins, the last one at
+    `version`). Both are replaced, never modified, after they have been handed out.
+    '''
+
+    def __init__(self, origin, log_limit=64, rebuild_fraction=0.5):
+        self.origin = origin
+        self.log_limit = log_limit
+        self.rebuild_fraction = rebuild_fraction
+        self.version = 0
+        self._seq = 0
+        self._lsas = {}           # origin -> (seq, frozenset of neighbor ids)
+        self._log = []            # origins of the last accepted LSAs (the last one at self.version)
+        self._links = {}          # node -> set of nodes with an up (two-way) link
+        self._label = {}          # node -> component label
+        self._members = {}        # label -> set of members
+        self._labels = count()
+        self._stale = {}          # origin -> neighbor set the links were last computed for (changed since then)
+        self._wire = {}
+        self._wire_log = []
+        self._wire_changes = set()  # origins whose LSA changed since the last wire()
+        self._seen_versions = {}  # sender id -> database version processed last
+
+    # ---- updates --------------------------------------------------------
+
+    def set_local_links(self, neighbor_ids):
+        '''My own LSA: the ids heard this tick (a new sequence number only when the set changes).'''
+        neighbors = frozenset(neighbor_ids)
+        current = self._lsas.get(self.origin)
+        if current is not None and current[1] == neighbors:
+            return
+        self._seq += 1
+        self._install(self.origin, self._seq, neighbors)
+
+    def receive(self, sender_id, sender_version, link_states, log=()):
+        '''Merge a neighbor's database (only the LSAs it accepted since the version processed last, if logged).'''
+        last = self._seen_versions.get(sender_id)
+        if sender_version is not None and last == sender_version:
+            return
+        self._seen_versions[sender_id] = sender_version
+        if sender_version is not None and last is not None and 0 < sender_version - last <= len(log):
+            changed = dict.fromkeys(log[len(log) - (sender_version - last):])
+            entries = [(origin, link_states[origin]) for origin in changed if origin in link_states]
+        else:
+            entries = link_states.items()
+        for origin, (seq, neighbors) in entries:
+            if origin == self.origin:
+                if seq > self._seq:
+                    # My LSA from before a restart is still around: re-originate above it
+                    self._seq = seq + 1
+                    self._install(self.origin, self._seq, self._lsas.get(self.origin, (0, frozenset()))[1])
+                continue
+            current = self._lsas.get(origin)
+            if current is None or seq > current[0]:
+                self._install(origin, seq, frozenset(neighbors))
+
+    def _install(self, origin, seq, neighbors):
+        current = self._lsas.get(origin)
+        previous = current[1] if current is not None else frozenset()
+        self._lsas[origin] = (seq, neighbors)
+        self.version += 1
+        self._log.append(origin)
+        if len(self._log) > self.log_limit:
+            del self._log[:-self.log_limit]
+        self._wire_changes.add(origin)
+        self._stale.setdefault(origin, previous)
+
+    def _refresh(self):
+        '''Apply the LSAs accepted since the last call to the links and components.'''
+        stale = {origin: previous for origin, previous in self._stale.items() if previous != self._lsas[origin][1]}
+        self._stale = {}
+        if not stale:
+            return
+        if len(stale) >= self.rebuild_fraction * len(self._lsas):
+            self._rebuild()
+            return
+        # New links first, then the removed ones one at a time, so every split starts from up-to-date labels
+        removed = []
+        for origin, previous in stale.items():
+            for node in self._lsas[origin][1] ^ previous:
+                up = self._link_up(origin, node)
+                if up == (node in self._links.get(origin, ())):
+                    continue
+                if up:
+                    self._links.setdefault(origin, set()).add(node)
+                    self._links.setdefault(node, set()).add(origin)
+                    self._merge(origin, node)
+                else:
+                    removed.append((origin, node))
+        for a, b in removed:
+            if b in self._links[a]:  # the same link can be listed from both ends
+                self._links[a].discard(b)
+                self._links[b].discard(a)
+                self._split(a, b)
+
+    def _rebuild(self):
+        '''Links and components from scratch: every two-way link of the database, then one BFS per component.'''
+        lsas = self._lsas
+        mine = lsas[self.origin][1] if self.origin in lsas else frozenset()
+        links = {node: set() for node in lsas}
+        links[self.origin] = set(mine)
+        for node in mine:
+            links.setdefault(node, set()).add(self.origin)
+        for origin, (_, neighbors) in lsas.items():
+            if origin == self.origin:
+                continue
+            # Each two-way link is seen once from either end (my own links were added above)
+            up = links[origin]
+            for node in neighbors:
+                other = lsas.get(node)
+                if other is not None and node != self.origin and origin in other[1]:
+                    up.add(node)
+        self._links = links
+        self._label = {}
+        self._members = {}
+        for start in links:
+            if start in self._label:
+                continue
+            label = next(self._labels)
+            members = {start}
+            queue = deque([start])
+            while queue:
+                for other in links[queue.popleft()]:
+                    if other not in members:
+                        members.add(other)
+                        queue.append(other)
+            for node in members:
+                self._label[node] = label
+            self._members[label] = members
+
+    def _link_up(self, a, b):
+        if self.origin in (a, b):
+            # My own links: what I hear this tick, fresher than any relayed LSA
+            mine = self._lsas.get(self.origin)
+            return mine is not None and (b if a == self.origin else a) in mine[1]
+        lsa_a, lsa_b = self._lsas.get(a), self._lsas.get(b)
+        return lsa_a is not None and lsa_b is not None and b in lsa_a[1] and a in lsa_b[1]
+
+    # ---- components -------------------------------------------------------
+
+    def _label_of(self, node):
+        label = self._label.get(node)
+        if label is None:
+            label = self._label[node] = next(self._labels)
+            self._members[label] = {node}
+        return label
+
+    def _merge(self, a, b):
+        label_a, label_b = self._label_of(a), self._label_of(b)
+        if label_a == label_b:
+            return
+        if len(self._members[label_a]) < len(self._members[label_b]):
+            label_a, label_b = label_b, label_a
+        moved = self._members.pop(label_b)
+        for node in moved:
+            self._label[node] = label_a
+        self._members[label_a] |= moved
+
+    def _split(self, a, b):
+        '''After the a-b link went down: BFS from both ends in turn until they meet (still one component) or one
+        side runs out, which is then relabelled as its own component (work bounded by the smaller side).'''
+        seen = ({a}, {b})
+        frontiers = (deque([a]), deque([b]))
+        while frontiers[0] and frontiers[1]:
+            for side in (0, 1):
+                node = frontiers[side].popleft()
+                for other in self._links.get(node, ()):
+                    if other in seen[1 - side]:
+                        return
+                    if other not in seen[side]:
+                        seen[side].add(other)
+                        frontiers[side].append(other)
+        detached = seen[0] if not frontiers[0] else seen[1]
+        self._members[self._label[a]] -= detached
+        new_label = next(self._labels)
+        for node in detached:
+            self._label[node] = new_label
+        self._members[new_label] = detached
+
+    def component(self):
+        '''Ids connected to this agent over up links (including itself). Do not modify the returned set.'''
+        if self._stale:
+            self._refresh()
+        return self._members[self._label_of(self.origin)]
+
+    # ---- wire form ----------------------------------------------------------
+
+    def wire(self):
+        '''({origin: [seq, sorted neighbor ids]}, log) for the outgoing message (new objects only after a change).'''
+        if self._wire_changes:
+            wire = dict(self._wire)
+            for origin in self._wire_changes:
+                seq, neighbors = self._lsas[origin]
+                wire[origin] = [seq, sorted(neighbors)]
+            self._wire = wire
+            self._wire_log = list(self._log)
+            self._wire_changes = set()
+        return self._wire, self._wire_log
@@ -0,0 +1,49 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+from scipy.spatial import cKDTree
+
+
+def sparse_assignment(agent_pos, task_pos, k, weight_fn):
+    '''
+    Rectangular assignment restricted to each agent's k nearest tasks (sparse LAPJV, no dummy padding).
+
+    agent_pos: (R, 2) array, task_pos: (P, 2) array
+    weight_fn(distances): edge weights (cost to minimize) for an array of agent-task distances; inf = no edge
+
+    The candidate edges come from a k-d tree over the tasks, so memory and time grow with R * k instead of
+    max(R, P)^2. Every agent also gets a private outside option ("no task") whose penalty is larger than any
+    total of real edges: the solver first maximizes the number of agents with a task, then minimizes their
+    total weight over the candidates.
+    Returns the matched task index per agent (-1: no task), or None when the candidate graph cannot give a task
+    to min(R, P) agents (e.g. many agents whose nearest tasks are all in the same hotspot): the dense solve
+    would, so the caller should fall back to it.
+    '''
+    num_agents, num_tasks = len(agent_pos), len(task_pos)
+    if num_agents == 0 or num_tasks == 0:
+        return np.full(num_agents, -1, dtype=np.intp)
+
+    k = min(k, num_tasks)
+    distances, neighbors = cKDTree(task_pos).query(agent_pos, k=k)
+    distances, neighbors = distances.reshape(num_agents, k), neighbors.reshape(num_agents, k)
+    weights = np.asarray(weight_fn(distances), dtype=float)
+    edges = np.isfinite(weights)
+    if edges.any():
+        # Shift to strictly positive weights (explicit zeros would read as missing edges). Every agent is
+        # matched exactly once, so a common offset does not change the optimum.
+        weights = weights - min(0.0, weights[edges].min()) + 1.0
+        penalty = weights[edges].max() * (num_agents + 1)
+    else:
+        penalty = 1.0
+
+    rows = np.concatenate([np.nonzero(edges)[0], np.arange(num_agents)])
+    cols = np.concatenate([neighbors[edges], num_tasks + np.arange(num_agents)])
+    data = np.concatenate([weights[edges], np.full(num_agents, penalty)])
+    graph = csr_matrix((data, (rows, cols)), shape=(num_agents, num_tasks + num_agents))
+
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+    task_for_agent = np.full(num_agents, -1, dtype=np.intp)
+    task_for_agent[matched_rows] = np.where(matched_cols < num_tasks, matched_cols, -1)
+    if np.count_nonzero(task_for_agent >= 0) < min(num_agents, num_tasks):
+        return None
+    return task_for_agent
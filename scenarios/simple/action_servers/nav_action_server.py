@@ -23,6 +23,13 @@ from sensor_msgs.msg import LaserScan
 from nav2_msgs.action import NavigateToPose
 from builtin_interfaces.msg import Duration as DurationMsg
 
+# goal_pose 갱신의 header.frame_id = '<frame>#<goal UUID hex>' (modules/base_bt_nodes_ros.py의 GOAL_ID_SEPARATOR)
+GOAL_ID_SEPARATOR = "#"
+
+
+def goal_id_hex(goal_id) -> str:
+    return bytes(bytearray(goal_id.uuid)).hex()
+
 
 def clamp(value: float, min_val: float, max_val: float) -> float:
     return max(min_val, min(max_val, value))
@@ -68,7 +75,9 @@ class UGVNavServer(Node):
         self._current_pose: Optional[PoseStamped] = None
         self._raw_scan: Optional[LaserScan] = None
         self._active_goal_handle = None
+        self._active_goal_id: Optional[str] = None  # 활성 goal의 UUID (hex): goal_pose 갱신은 이 goal의 것만 반영
         self._goal_lock = threading.Lock()
+        self._goal_update: Optional[Tuple[float, float]] = None  # 활성 goal에 대해 goal_pose로 들어온 최신 목표 (x, y)
 
         # Processed scan cache (normalized + clipped)
         self._scan_ranges: Optional[List[float]] = None
@@ -89,6 +98,11 @@ class UGVNavServer(Node):
             LaserScan, "scan", self._scan_callback, 10,
             callback_group=self._cb_group
         )
+        # Streaming goal update: RUNNING 중인 goal의 목표를 cancel/재전송 없이 갱신
+        self._goal_update_sub = self.create_subscription(
+            PoseStamped, "goal_pose", self._goal_update_callback, 10,
+            callback_group=self._cb_group
+        )
 
         # Action Server
         self._action_server = ActionServer(
@@ -224,8 +238,24 @@ class UGVNavServer(Node):
                 self.get_logger().info("Preempting current goal with new goal")
                 self._active_goal_handle.abort()
             self._active_goal_handle = goal_handle
+            self._active_goal_id = goal_id_hex(goal_handle.goal_id)
+            self._goal_update = None  # 이전 goal에 대한 갱신은 버림
         goal_handle.execute()
 
+    def _goal_update_callback(self, msg: PoseStamped):
+        """활성 goal에 대한 목표 갱신만 반영.
+        goal_pose와 액션은 별개 전송 경로라 이전 goal에 대한 갱신이 새 goal 수락 뒤에 도착할 수 있으므로,
+        frame_id의 goal UUID가 활성 goal과 다르거나 없으면 무시한다."""
+        _, separator, goal_id = msg.header.frame_id.rpartition(GOAL_ID_SEPARATOR)
+        if not separator:
+            return
+        with self._goal_lock:
+            if self._active_goal_handle is None or not self._active_goal_handle.is_active:
+                return
+            if goal_id != self._active_goal_id:
+                return
+            self._goal_update = (float(msg.pose.position.x), float(msg.pose.position.y))
+
     def _publish_cmd(self, linear: float, angular: float):
         # angular.z > 0 => left turn (as user confirmed)
         msg = TwistStamped()
@@ -417,6 +447,11 @@ class UGVNavServer(Node):
                     time.sleep(sleep_duration)
                     continue
 
+                # RUNNING 중 goal_pose 토픽으로 들어온 최신 목표 반영
+                with self._goal_lock:
+                    if goal_handle is self._active_goal_handle and self._goal_update is not None:
+                        goal_x, goal_y = self._goal_update
+
                 px = self._current_pose.pose.position.x
                 py = self._current_pose.pose.position.y
                 distance = math.hypot(goal_x - px, goal_y - py)
@@ -1,12 +1,13 @@
-import math
-import json
 import random
 
 import pygame
 
 from modules.base_bt_nodes import BTNodeList, Status, Sequence, Fallback, ReactiveSequence, ReactiveFallback, AssignTask, SyncCondition
-from modules.base_bt_nodes_ros import ActionWithROSAction, ActionWithROSTopic, ConditionWithROSTopics
-from modules.utils import config, AttrDict, msg_serialize_default, msg_deserialize_hook
+from modules.base_bt_nodes_ros import RetargetableActionWithROSAction, ActionWithROSTopic, ConditionWithROSTopics
+from modules.utils import config, TaskRecord, msg_deserialize_hook
+from modules.local_comm import LocalCommChannel
+from modules.shm_transport import ShmLocalComm
+from modules.task_table import TaskTable
 
 from geometry_msgs.msg import PoseStamped
 from nav_msgs.msg import Odometry
@@ -34,6 +35,7 @@ BTNodeList.CONDITION_NODES.extend(CUSTOM_CONDITION_NODES)
 # ── Config shortcuts ───────────────────────────────────────────────────────────
 
 _map_bounds = config.get('tasks', {}).get('locations', {})
+_comm_transport = (config.get('local_comm') or {}).get('transport', 'ros')  # ros | shm
 
 
 # ── Nodes  ─────────────────────────────────────────────────────────────────────
@@ -41,16 +43,34 @@ _map_bounds = config.get('tasks', {}).get('locations', {})
 class GatherLocalInfo(ConditionWithROSTopics):
     def __init__(self, name, agent):
         ns = agent.ros_namespace or ''
+        # JSON-over-String 토픽은 raw 구독: String 객체 생성 없이 버퍼에서 바로 디코딩
+        raw_json_topics = [('world/fire/list', 'local_tasks_info')]
+        if _comm_transport == 'ros':
+            raw_json_topics.append((f"{ns}/local_comm/inbox", 'local_comm_inbox', msg_deserialize_hook))
+        elif _comm_transport != 'shm':
+            raise ValueError(f"[ERROR] Unknown local_comm transport '{_comm_transport}'. Options: ros, shm")
         super().__init__(name, agent, [
             (PoseStamped, f"{ns}/pose_world", "ego_pose"),
-            (String, 'world/fire/list', 'local_tasks_info'),
-            (String, f"{ns}/local_comm/inbox", 'local_comm_inbox'),
-        ])
-
-        # outbox publisher: 자신의 상태를 robot_supervisor에 broadcast
-        self._pub_outbox = agent.ros_bridge.node.create_publisher(
-            String, f"{ns}/local_comm/outbox", 10
-        )
+        ], raw_json_topics=raw_json_topics)
+
+        if _comm_transport == 'ros':
+            # outbox publisher: 자신의 상태를 robot_supervisor에 broadcast
+            self._pub_outbox = agent.ros_bridge.node.create_publisher(
+                String, f"{ns}/local_comm/outbox", 10
+            )
+            self._shm = None
+        else:
+            # 같은 호스트의 agent끼리 공유 메모리 ring buffer로 직접 교환 (robot_supervisor 중계 없음)
+            self._pub_outbox = None
+            self._shm = ShmLocalComm.from_config(agent.agent_id)
+        self._comm = LocalCommChannel()  # config: local_comm.codec (json | binary), local_comm.delta
+        self._inbox_messages = []  # 마지막으로 디코딩한 inbox (새 inbox가 올 때만 다시 디코딩)
+
+        # fire list 파싱 캐시: payload가 그대로면 직전 결과(dict 객체 자체)를 재사용
+        self._fire_list_raw = None     # 마지막으로 파싱한 fire list 직렬화 버퍼
+        self._local_tasks_info = {}    # task_id → task 레코드 (blackboard["local_tasks_info"])
+        self._task_sources = {}        # task_id → 레코드를 만든 원본 JSON dict (변경 감지용)
+        self._task_table = TaskTable({})  # local_tasks_info의 numpy 열 뷰 (blackboard["task_table"])
 
         self.agent = agent  # outbox 송신 위해 agent 속성 저장
 
@@ -60,35 +80,73 @@ class GatherLocalInfo(ConditionWithROSTopics):
         # [1] Outbox broadcast: 이전 틱에서 설정한 상태를 먼저 송신
         outbox = getattr(agent, 'message_to_share', {})  # GatherLocalInfo 실행 시점에 agent의 임시 속성에서 메시지 가져오기
         if outbox is not None:
-            msg = String()
-            msg.data = json.dumps(outbox, default=msg_serialize_default)
-            self._pub_outbox.publish(msg)
+            payload = self._comm.pack(outbox)
+            if self._shm is not None:
+                self._shm.publish(payload, agent.tick_clock.wall)
+            else:
+                msg = String()
+                msg.data = payload
+                self._pub_outbox.publish(msg)
 
         # [2] 필수 topic 수신 확인: 하나라도 없으면 False
         required = ["ego_pose", "local_tasks_info"]
         if any(k not in cache for k in required):
             return False
 
-        # [3] 필수 데이터 처리
-        try:
-            tasks_list = [AttrDict(t) for t in json.loads(cache["local_tasks_info"].data)]
-            for task in tasks_list:
-                task['position'] = pygame.math.Vector2(task['x'], task['y'])
-                task['amount'] = task.get('radius', 0.0)
-                # 여기서 또다른 전처리가 필요하면 추가 가능
-        except (json.JSONDecodeError, TypeError):
-            tasks_list = []
-        blackboard["local_tasks_info"] = {t.task_id: t for t in tasks_list}
-        self.agent.position = pygame.math.Vector2(cache["ego_pose"].pose.position.x, cache["ego_pose"].pose.position.y)
+        # [3] 필수 데이터 처리: fire list는 새 메시지이고 payload가 바뀌었을 때만 다시 파싱
+        if self.is_new("local_tasks_info"):
+            fire_list = cache["local_tasks_info"]
+            if fire_list.raw != self._fire_list_raw:
+                self._fire_list_raw = fire_list.raw
+                self._local_tasks_info = self._parse_fire_list(fire_list)
+                self._task_table = TaskTable(self._local_tasks_info)
+        blackboard["local_tasks_info"] = self._local_tasks_info
+        blackboard["task_table"] = self._task_table
+        if self.is_new("ego_pose"):
+            self.agent.position = pygame.math.Vector2(cache["ego_pose"].pose.position.x, cache["ego_pose"].pose.position.y)
 
         # [4] 수신 메시지: 미수신 시 빈 리스트로 폴백
-        try:
-            self.agent.messages_received = json.loads(cache["local_comm_inbox"].data, object_hook=msg_deserialize_hook)
-        except (KeyError, AttributeError, json.JSONDecodeError, TypeError):
-            self.agent.messages_received = []
+        if self._shm is not None:
+            payloads, changed = self._shm.collect(self.agent.position, agent.tick_clock.wall)
+            if changed:
+                try:
+                    self._inbox_messages = self._comm.unpack(payloads)
+                except (ValueError, TypeError):
+                    self._inbox_messages = []
+        elif self.is_new("local_comm_inbox"):
+            try:
+                self._inbox_messages = self._comm.unpack(cache["local_comm_inbox"].value)
+            except (KeyError, AttributeError, ValueError, TypeError):
+                self._inbox_messages = []
+        self.agent.messages_received = list(self._inbox_messages)  # 디코딩 결과는 재사용하므로 리스트만 복사
+        self.agent.new_messages_received = self._comm.select_new(self._inbox_messages)  # 송신자 버전이 바뀐 메시지만
 
         return True
 
+    def _parse_fire_list(self, fire_list):
+        """fire list → {task_id: task}. 원본 항목이 그대로인 task는 이전 레코드 객체를 재사용한다."""
+        try:
+            sources = {t['task_id']: t for t in fire_list.value}
+        except (ValueError, TypeError, KeyError):
+            self._task_sources = {}
+            return {}
+
+        tasks_info = {}
+        for task_id, source in sources.items():
+            task = self._local_tasks_info.get(task_id)
+            if task is None or self._task_sources.get(task_id) != source:
+                task = TaskRecord.from_dict(source)  # position = Vector2(x, y), amount = radius
+                # 여기서 또다른 전처리가 필요하면 추가 가능
+            tasks_info[task_id] = task
+        self._task_sources = sources
+        return tasks_info
+
+    def close(self):
+        # 종료 시 공유 메모리 ring(mmap, 본인 ring 파일) 해제
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
 
 class IsTaskCompleted(SyncCondition):
     def __init__(self, name, agent):
@@ -119,28 +177,37 @@ class IsArrivedAtTarget(ConditionWithROSTopics):
         if "ego_pose" not in cache:
             return False
 
-        ego_pose = cache["ego_pose"]
         target_id = blackboard.get("assigned_task_id", None)
 
         target_info = blackboard.get("local_tasks_info", {}).get(target_id)
         if target_info is None:
             return False
 
-        dist = math.hypot(ego_pose.pose.position.x - target_info['x'], ego_pose.pose.position.y - target_info['y'])
-        return dist <= self.default_thresh + target_info['radius']
+        dist = agent.distances.to_task(target_info)  # agent.position(= 이번 틱 ego_pose) 기준, 플러그인과 공유
+        return dist <= self.default_thresh + target_info.radius
 
 
-class MoveToTarget(ActionWithROSAction):
+class MoveToTarget(RetargetableActionWithROSAction):
     """
     Navigate to the assigned task position using Nav2 NavigateToPose.
     Mirrors space-sim _MoveToTask / agent.follow() → NavigateToPose.
+    When the assignment changes mid-navigation, the active goal is retargeted via `goal_pose`.
     """
 
     def __init__(self, name, agent):
         ns = agent.ros_namespace or ''
-        super().__init__(name, agent, (NavigateToPose, f'{ns}/navigate_to_pose'))
+        super().__init__(name, agent, (NavigateToPose, f'{ns}/navigate_to_pose'), (PoseStamped, f'{ns}/goal_pose'))
         self.moving_task_id = None  # 현재 이동 중인 task 정보 저장 (없으면 None)
 
+    def _build_pose(self, agent, task):
+        ps = PoseStamped()
+        ps.header.frame_id    = 'world'
+        ps.header.stamp       = agent.tick_clock.to_msg()
+        ps.pose.position.x    = float(task.x)
+        ps.pose.position.y    = float(task.y)
+        ps.pose.orientation.w = 1.0
+        return ps
+
     def _build_goal(self, agent, blackboard):
         task_id = blackboard.get('assigned_task_id')
         task    = blackboard.get('local_tasks_info', {}).get(task_id)
@@ -149,25 +216,24 @@ class MoveToTarget(ActionWithROSAction):
 
         self.moving_task_id = task_id  # 이동 시작 시점에 task_id 저장
 
-        ps = PoseStamped()
-        ps.header.frame_id    = 'world'
-        ps.header.stamp       = self.ros.node.get_clock().now().to_msg()
-        ps.pose.position.x    = float(task['x'])
-        ps.pose.position.y    = float(task['y'])
-        ps.pose.orientation.w = 1.0
-
         goal      = NavigateToPose.Goal()
-        goal.pose = ps
+        goal.pose = self._build_pose(agent, task)
         return goal
 
     def _on_running(self, agent, blackboard):
-        # 이동 중에도 목표 위치가 유효한지 체크: 만약 할당된 Task이 사라졌다면 목표 취소
+        # 이동 중에도 목표 위치가 유효한지 체크
         self.status = Status.RUNNING  # 기본적으로 RUNNING 유지
         task_id = blackboard.get('assigned_task_id')
-        if task_id != self.moving_task_id:        
-            if self._goal_handle is not None:
+        if task_id != self.moving_task_id:
+            task = blackboard.get('local_tasks_info', {}).get(task_id)
+            if task is not None:
+                # 할당이 다른 Task로 바뀜: 진행 중인 goal의 목표만 갱신
+                self.retarget(self._build_pose(agent, task))
+                self.moving_task_id = task_id
+            elif self._goal_handle is not None:
+                # 할당된 Task가 사라짐: 목표 취소 후 실패 반환
                 self._goal_handle.cancel_goal_async()
-                self.status = Status.FAILURE  # 목표 취소 후 실패 반환
+                self.status = Status.FAILURE
         return self.status
 
 
@@ -187,7 +253,7 @@ class ExecuteTask(ActionWithROSTopic):
         return msg
 
 
-class Explore(ActionWithROSAction):
+class Explore(RetargetableActionWithROSAction):
     """
     Navigate to a random point within the map bounds.
     Mirrors space-sim _ExploreArea.
@@ -195,7 +261,7 @@ class Explore(ActionWithROSAction):
 
     def __init__(self, name, agent, timeout=20.0):
         ns = agent.ros_namespace or ''
-        super().__init__(name, agent, (NavigateToPose, f'{ns}/navigate_to_pose'))
+        super().__init__(name, agent, (NavigateToPose, f'{ns}/navigate_to_pose'), (PoseStamped, f'{ns}/goal_pose'))
         self.timeout = timeout  # 최대 탐색 시간 (초)
         self.time_started = None
 
@@ -208,20 +274,22 @@ class Explore(ActionWithROSAction):
         )
         return x, y
 
-    def _build_goal(self, agent, blackboard):
+    def _build_random_pose(self, agent):
         ps = PoseStamped()
         ps.header.frame_id    = 'world'
-        ps.header.stamp       = self.ros.node.get_clock().now().to_msg()
+        ps.header.stamp       = agent.tick_clock.to_msg()
 
         x, y = self.get_random_goal()
         ps.pose.position.x    = x
         ps.pose.position.y    = y
         ps.pose.orientation.w = 1.0
+        return ps
 
+    def _build_goal(self, agent, blackboard):
         goal      = NavigateToPose.Goal()
-        goal.pose = ps
+        goal.pose = self._build_random_pose(agent)
 
-        self.time_started = self.ros.node.get_clock().now().nanoseconds / 1e9  # 시간 초기화  
+        self.time_started = agent.tick_clock.ros_sec  # 시간 초기화  
         return goal
 
     # ★ RUNNING 중 타임아웃 시 새로운 목표로 갱신
@@ -229,16 +297,9 @@ class Explore(ActionWithROSAction):
         if self.time_started is None:
             return  # 아직 목표가 설정되지 않음
         
-        elapsed_time = (self.ros.node.get_clock().now().nanoseconds / 1e9) - self.time_started
+        elapsed_time = agent.tick_clock.ros_sec - self.time_started
         if elapsed_time > self.timeout:
-            # 타임아웃: 현재 목표 취소 및 새로운 랜덤 목표로 갱신
-            if self._goal_handle is not None:
-                self._goal_handle.cancel_goal_async()
-            
-            # 새로운 목표 생성 및 송신
-            new_goal = self._build_goal(agent, blackboard)
-            if new_goal is not False:
-                self.client.send_goal_async(new_goal).add_done_callback(self._on_goal_response)
-            self.time_started = self.ros.node.get_clock().now().nanoseconds / 1e9  # 시간 초기화  
+            # 타임아웃: 진행 중인 goal의 목표를 새로운 랜덤 목표로 갱신 (goal 재전송 없음)
+            self.retarget(self._build_random_pose(agent))
+            self.time_started = agent.tick_clock.ros_sec  # 시간 초기화  
         return Status.RUNNING
-
@@ -5,9 +5,12 @@ Robot Supervisor
   /{agent_id}/pose_world (PoseStamped) 로 publish
 
 - 로봇간 local communication 중계:
-  /{agent_id}/local_comm/outbox (JSON) 를 수집하고
+  /{agent_id}/local_comm/outbox (코덱 payload 텍스트) 를 수집하고
   수신 로봇의 comm_radius 기준으로 이웃만 필터링하여
   /{agent_id}/local_comm/inbox (JSON array) 로 publish
+  * JSON 코덱 payload는 재인코딩 없이 배열 원소로 그대로 이어 붙임
+  * 그 외 코덱 payload(예: 'B:' binary, 'Z:' 압축)는 JSON 문자열 원소로 전달 (BT runner가 접두사로 디코딩)
+  * 이웃 payload 구성이 직전 송신과 같으면 INBOX_REFRESH_PERIOD 동안 재송신 생략
 
 - (debug 모드) communication topology 시각화:
   /world/visualisation/comm_topology (MarkerArray) 로 publish
@@ -21,13 +24,16 @@ Robot Supervisor
 # robot_launch.py의 ROBOTS_NAME_LIST와 동일하게 유지할 것
 ROBOT_DEF_PREFIXES = ["Fire_UGV"]
 OUTBOX_TIMEOUT = 0.5  # seconds: 이 시간 이상 outbox 미수신 시 stale로 판정
+INBOX_REFRESH_PERIOD = 1.0  # seconds: 이웃 payload가 그대로여도 이 주기로는 inbox 재송신 (늦게 구독한 노드용)
 COMM_RADIUS    = 30.0 # metres: local communication emulation 수신 반경
 
 from controller import Supervisor
+import base64
 import json
 import math
 import os
 import time
+import zlib
 import rclpy
 from rclpy.node import Node
 import tf2_ros
@@ -75,16 +81,48 @@ class TrackedRobot:
             String, f"/{self.agent_id}/local_comm/inbox", 10
         )
 
-        self.last_outbox = None       # 최신 outbox dict (None = 아직 수신 전)
+        self.last_outbox = None       # 최신 outbox dict (None = 아직 수신 전 또는 JSON이 아닌 코덱)
+        self.last_outbox_raw = None   # 최신 outbox payload 텍스트 (inbox 중계용)
         self.last_outbox_time = None  # 마지막 수신 시각 (stale 감지용)
+        self._compressed_outbox = None  # 아직 압축 해제하지 않은 'Z:' payload (debug 시각화 시에만 해제)
+
+        self.last_inbox_raw = None    # 직전에 publish한 이웃 payload 튜플 (변경 없으면 재송신 생략)
+        self.last_inbox_time = None
 
     def _on_outbox(self, msg: String):
+        data = msg.data
+        if data.startswith('Z:'):
+            # 압축 payload: 그대로 중계하고, 시각화용 필드는 필요할 때(get_outbox) 압축 해제해서 읽음
+            self.last_outbox = None
+            self.last_outbox_raw = json.dumps(data)
+            self.last_outbox_time = time.time()
+            self._compressed_outbox = data
+            return
+        self._compressed_outbox = None
+        if not data.startswith('{'):
+            # JSON이 아닌 코덱 payload: 해석 없이 그대로 중계 (시각화용 필드는 읽을 수 없음)
+            self.last_outbox = None
+            self.last_outbox_raw = json.dumps(data)
+            self.last_outbox_time = time.time()
+            return
         try:
-            self.last_outbox = json.loads(msg.data)
+            self.last_outbox = json.loads(data)
+            self.last_outbox_raw = data
             self.last_outbox_time = time.time()
         except json.JSONDecodeError as e:
             self.node.get_logger().warn(f"[{self.agent_id}] outbox JSON parse error: {e}")
 
+    def get_outbox(self):
+        """시각화용 최신 outbox dict. 'Z:<digest>:<base85 zlib>' 압축 JSON payload는 처음 요청될 때 해제한다."""
+        if self._compressed_outbox is not None:
+            data, self._compressed_outbox = self._compressed_outbox, None
+            try:
+                raw = zlib.decompress(base64.b85decode(data[data.index(':', 2) + 1:]))
+                self.last_outbox = json.loads(raw) if raw.startswith(b'{') else None  # 압축된 binary 코덱 payload는 원래 바이트
+            except (ValueError, zlib.error) as e:
+                self.node.get_logger().warn(f"[{self.agent_id}] compressed outbox decode error: {e}")
+        return self.last_outbox
+
     def get_position_2d(self):
         """Webots translation field에서 (x, y) 반환"""
         t = self.translation_field.getSFVec3f()
@@ -113,9 +151,19 @@ class TrackedRobot:
 
         self.pub_pose_world.publish(msg)
 
-    def publish_inbox(self, neighbors: list):
+    def publish_inbox(self, neighbors_raw: list):
+        """이웃 outbox payload(JSON 원소 텍스트)를 재인코딩 없이 JSON 배열로 이어 붙여 publish.
+        직전과 같은 구성이면 INBOX_REFRESH_PERIOD가 지나기 전까지 생략한다."""
+        neighbors_raw = tuple(neighbors_raw)
+        now = time.time()
+        if (neighbors_raw == self.last_inbox_raw and self.last_inbox_time is not None
+                and now - self.last_inbox_time < INBOX_REFRESH_PERIOD):
+            return
+        self.last_inbox_raw = neighbors_raw
+        self.last_inbox_time = now
+
         msg = String()
-        msg.data = json.dumps(neighbors)
+        msg.data = '[' + ','.join(neighbors_raw) + ']'
         self.pub_inbox.publish(msg)
 
 
@@ -222,7 +270,7 @@ class RobotSupervisor:
                 sx, sy = sender.get_position_2d()
                 dist = math.sqrt((rx - sx) ** 2 + (ry - sy) ** 2)
                 if dist <= COMM_RADIUS:
-                    neighbors.append(sender.last_outbox)
+                    neighbors.append(sender.last_outbox_raw)
                     if self.debug:
                         positions[sender.agent_id] = sender.get_position_3d()
                         comm_edges.add(frozenset([receiver.agent_id, sender.agent_id]))
@@ -292,7 +340,7 @@ class RobotSupervisor:
         for robot in self.tracked:
             if self._is_stale(robot):
                 continue
-            outbox = robot.last_outbox
+            outbox = robot.get_outbox()
             if outbox is None:
                 continue
             assigned_task_id = outbox.get('assigned_task_id')
@@ -320,7 +368,7 @@ class RobotSupervisor:
         for idx, robot in enumerate(self.tracked):
             if self._is_stale(robot):
                 continue
-            outbox = robot.last_outbox
+            outbox = robot.get_outbox()
             if outbox is None:
                 continue
             planned_tasks_id = outbox.get('planned_tasks_id')
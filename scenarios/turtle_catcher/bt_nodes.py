@@ -20,7 +20,7 @@ BTNodeList.CONDITION_NODES.extend(CUSTOM_CONDITION_NODES)
 
 from turtlesim.msg import Pose as TPose
 from std_srvs.srv import SetBool
-from modules.base_bt_nodes_ros import ConditionWithROSTopics, ActionWithROSAction, ActionWithROSService
+from modules.base_bt_nodes_ros import ConditionWithROSTopics, RetargetableActionWithROSAction, ActionWithROSService
 
 
 class IsNearby(ConditionWithROSTopics):
@@ -54,15 +54,15 @@ class IsNearby(ConditionWithROSTopics):
 from geometry_msgs.msg import PoseStamped
 from nav2_msgs.action import NavigateToPose
 
-class MoveTo(ActionWithROSAction):
+class MoveTo(RetargetableActionWithROSAction):
     def __init__(self, name, agent, action, goal_pose_topic):
         ns = agent.ros_namespace or ""  # 네임스페이스 없으면 루트
+        # RUNNING일 때 목표를 흘려 보낼 토픽
+        goal_topic = f"{ns}/{goal_pose_topic}" if ns else goal_pose_topic
         super().__init__(name, agent, 
-            (NavigateToPose, f"{ns}/{action}")
+            (NavigateToPose, f"{ns}/{action}"),
+            (PoseStamped, goal_topic)
         )
-        # RUNNING일 때 목표를 흘려 보낼 퍼블리셔
-        goal_topic = f"{ns}/{goal_pose_topic}" if ns else goal_pose_topic
-        self.goal_pub = self.ros.node.create_publisher(PoseStamped, goal_topic, 10)
 
 
     # --- helpers ---
@@ -81,7 +81,7 @@ class MoveTo(ActionWithROSAction):
 
         ps = PoseStamped()
         ps.header.frame_id = 'map'
-        ps.header.stamp = self.ros.node.get_clock().now().to_msg()
+        ps.header.stamp = agent.tick_clock.to_msg()
         ps.pose.position.x = x
         ps.pose.position.y = y
         ps.pose.orientation.w = 1.0  # yaw = 0
@@ -97,10 +97,10 @@ class MoveTo(ActionWithROSAction):
         x, y = xy
         ps = PoseStamped()
         ps.header.frame_id = 'map'
-        ps.header.stamp = self.ros.node.get_clock().now().to_msg()
+        ps.header.stamp = agent.tick_clock.to_msg()
         ps.pose.position.x = x; ps.pose.position.y = y
         ps.pose.orientation.w = 1.0
-        self.goal_pub.publish(ps)
+        self.retarget(ps)
         return Status.RUNNING
 
 